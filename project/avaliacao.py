@@ -0,0 +1,434 @@
+"""
+Avaliação dos parâmetros de detecção contra quadros rotulados. Varre uma grade (ou amostras aleatórias) de
+configurações (capturers.haar_blob.ConfiguracaoCaptura) num pool de processos, mede para cada uma a acurácia
+da atenção, a taxa de alarme falso e os quadros por segundo, e marca as que estão na fronteira de Pareto.
+
+Rótulos (1 = prestando atenção, 0 = não):
+    vídeo: CSV com o mesmo nome ao lado do vídeo (aula.mp4 -> aula.csv), colunas quadro,atencao
+    pasta de imagens: rotulos.csv dentro da pasta, colunas arquivo,atencao
+Quadros sem rótulo são processados (alimentam o histórico de atenção), mas não entram nas métricas.
+
+    python avaliacao.py aula.mp4 fotos/ --espaco espaco.json -p 4 --melhor melhor.json
+    python main.py --configuracao melhor.json
+
+Espaço da varredura em JSON: cada parâmetro com uma lista de valores (grade: todas as combinações) ou, com
+--aleatorio, também {"min": ..., "max": ...} (sorteio uniforme; inteiro se os dois limites forem inteiros).
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Optional
+
+import cv2
+from batch import OpcoesAnalise, criar_captura
+from capturers.haar_blob import CONFIGURACAO_PADRAO, MOTOR_BLOB, MOTOR_COMPONENTES, ConfiguracaoCaptura, ErroCV2
+from frame_sources import FimDoVideo, FolderFrameSource, VideoFrameSource
+from frame_sources.folder import listar_imagens
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_ROTULOS_PASTA = "rotulos.csv"
+# Usado sem --espaco: os parâmetros que mais mexem no alerta e no custo da cascata de rosto
+ESPACO_PADRAO = {
+    "margem_centro": [0.35, 0.45, 0.55],
+    "limiar_atencao": [3, 4, 5],
+    "fator_escala_rosto": [1.1, 1.2, 1.3],
+    "vizinhos_olhos": [4, 6],
+}
+VALORES_VERDADEIROS = {"1", "true", "sim", "s"}
+VALORES_FALSOS = {"0", "false", "nao", "não", "n"}
+
+
+@dataclass
+class ItemRotulado:
+    """Vídeo ou pasta de imagens com o rótulo de atenção por quadro (índice no vídeo, nome do arquivo na pasta)."""
+
+    origem: Path
+    rotulos: dict
+
+
+def _ler_booleano(valor: str, arquivo: Path) -> bool:
+    normalizado = valor.strip().lower()
+    if normalizado in VALORES_VERDADEIROS:
+        return True
+    if normalizado in VALORES_FALSOS:
+        return False
+    raise ValueError(f"Rótulo de atenção inválido em {arquivo}: {valor!r}")
+
+
+def ler_item(origem: Path) -> ItemRotulado:
+    """Lê os rótulos de um vídeo (CSV ao lado) ou de uma pasta de imagens (rotulos.csv dentro)."""
+    if origem.is_dir():
+        arquivo, coluna, chave = origem / ARQUIVO_ROTULOS_PASTA, "arquivo", str
+    else:
+        arquivo, coluna, chave = origem.with_suffix(".csv"), "quadro", int
+    if not arquivo.is_file():
+        raise FileNotFoundError(f"Rótulos não encontrados para {origem}: {arquivo}")
+    with arquivo.open(newline="", encoding="utf-8") as entrada:
+        leitor = csv.DictReader(entrada)
+        if leitor.fieldnames is None or not {coluna, "atencao"} <= set(leitor.fieldnames):
+            raise ValueError(f"{arquivo} precisa das colunas {coluna},atencao")
+        rotulos = {chave(linha[coluna].strip()): _ler_booleano(linha["atencao"], arquivo) for linha in leitor}
+    if not rotulos:
+        raise ValueError(f"Nenhum quadro rotulado em {arquivo}")
+    return ItemRotulado(origem, rotulos)
+
+
+def _validar_parametros(espaco: dict):
+    nomes = {campo.name for campo in fields(ConfiguracaoCaptura)}
+    desconhecidos = set(espaco) - nomes
+    if desconhecidos:
+        raise ValueError(f"Parâmetros de configuração desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+
+def _criar_configuracao(base: ConfiguracaoCaptura, valores: dict) -> Optional[ConfiguracaoCaptura]:
+    """Configuração base com os `valores` trocados; None se a combinação for inválida (limiar > histórico etc.)."""
+    try:
+        return replace(base, **valores)
+    except ValueError as erro:
+        logger.debug("Combinação descartada %s: %s", valores, erro)
+        return None
+
+
+def gerar_grade(espaco: dict, base: ConfiguracaoCaptura = CONFIGURACAO_PADRAO) -> list[ConfiguracaoCaptura]:
+    """Todas as combinações válidas dos valores do espaço (cada parâmetro com uma lista)."""
+    _validar_parametros(espaco)
+    for nome, valores in espaco.items():
+        if not isinstance(valores, list) or not valores:
+            raise ValueError(f"Na grade, {nome} precisa de uma lista de valores (intervalos só com --aleatorio)")
+    nomes = list(espaco)
+    configuracoes = []
+    for combinacao in itertools.product(*espaco.values()):
+        configuracao = _criar_configuracao(base, dict(zip(nomes, combinacao)))
+        if configuracao is not None and configuracao not in configuracoes:
+            configuracoes.append(configuracao)
+    return configuracoes
+
+
+def _sortear(nome: str, valores, gerador: random.Random):
+    if isinstance(valores, list) and valores:
+        return gerador.choice(valores)
+    if isinstance(valores, dict) and {"min", "max"} <= set(valores):
+        minimo, maximo = valores["min"], valores["max"]
+        if isinstance(minimo, int) and isinstance(maximo, int):
+            return gerador.randint(minimo, maximo)
+        return round(gerador.uniform(minimo, maximo), 4)
+    raise ValueError(f'{nome}: use uma lista de valores ou {{"min": ..., "max": ...}}')
+
+
+def sortear_configuracoes(
+    espaco: dict, quantidade: int, semente: Optional[int] = None, base: ConfiguracaoCaptura = CONFIGURACAO_PADRAO
+) -> list[ConfiguracaoCaptura]:
+    """Até `quantidade` configurações válidas e distintas sorteadas do espaço."""
+    _validar_parametros(espaco)
+    gerador = random.Random(semente)
+    configuracoes = []
+    # Espaços pequenos (ou quase todo inválido) não têm `quantidade` combinações distintas: desiste depois de tentar
+    for _ in range(quantidade * 20):
+        if len(configuracoes) == quantidade:
+            break
+        valores = {nome: _sortear(nome, intervalo, gerador) for nome, intervalo in espaco.items()}
+        configuracao = _criar_configuracao(base, valores)
+        if configuracao is not None and configuracao not in configuracoes:
+            configuracoes.append(configuracao)
+    return configuracoes
+
+
+def _quadros_item(item: ItemRotulado):
+    """Gera (chave do rótulo, quadro) de um vídeo ou pasta, na ordem."""
+    if item.origem.is_dir():
+        arquivos = listar_imagens(item.origem)
+        fonte = FolderFrameSource(item.origem, arquivos=arquivos, memoria_max_mb=0)
+        fonte.start()
+        try:
+            for arquivo in arquivos:
+                quadro = fonte.next_frame()
+                if quadro is None:
+                    logger.error("Não foi possível ler a imagem: %s", arquivo)
+                    continue
+                yield Path(arquivo).name, quadro
+        finally:
+            fonte.stop()
+        return
+    fonte = VideoFrameSource(item.origem)
+    fonte.start()
+    try:
+        while True:
+            try:
+                quadro = fonte.next_frame()
+            except FimDoVideo:
+                return
+            yield fonte.quadro_atual, quadro
+    finally:
+        fonte.stop()
+
+
+def avaliar_configuracao(configuracao: ConfiguracaoCaptura, itens: list[ItemRotulado], opcoes: OpcoesAnalise) -> dict:
+    """
+    Processa todos os itens com a configuração (uma captura nova por item) e compara atencao_ok com os rótulos.
+    Alarme falso: alerta (sem atenção) num quadro rotulado como atenção. O fps conta só o process, sem decodificação.
+    """
+    opcoes = replace(opcoes, configuracao=configuracao)
+    acertos = rotulados = atentos = alarmes_falsos = desatentos = alertas_perdidos = quadros = 0
+    segundos = 0.0
+    for item in itens:
+        captura = criar_captura(opcoes)
+        for chave, quadro in _quadros_item(item):
+            inicio = time.perf_counter()
+            try:
+                captura.process(quadro, opcoes.limiar_esquerdo, opcoes.limiar_direito)
+            except (cv2.error, ErroCV2):
+                # process já registrou o erro e marcou o quadro como sem atenção
+                pass
+            segundos += time.perf_counter() - inicio
+            quadros += 1
+            rotulo = item.rotulos.get(chave)
+            if rotulo is None:
+                continue
+            atencao_ok = captura.ultimo_resultado.atencao_ok
+            rotulados += 1
+            acertos += atencao_ok == rotulo
+            if rotulo:
+                atentos += 1
+                alarmes_falsos += not atencao_ok
+            else:
+                desatentos += 1
+                alertas_perdidos += atencao_ok
+    return {
+        "quadros": quadros,
+        "quadros_rotulados": rotulados,
+        "acuracia": acertos / rotulados if rotulados else 0.0,
+        "taxa_alarme_falso": alarmes_falsos / atentos if atentos else 0.0,
+        "taxa_alerta_perdido": alertas_perdidos / desatentos if desatentos else 0.0,
+        "fps": quadros / segundos if segundos > 0 else 0.0,
+    }
+
+
+def fronteira_pareto(metricas: list[dict]) -> list[bool]:
+    """
+    True para as configurações que nenhuma outra supera ao mesmo tempo em acurácia (maior), alarme falso (menor)
+    e fps (maior), sendo estritamente melhor em pelo menos um.
+    """
+
+    def chave(m):
+        return m["acuracia"], -m["taxa_alarme_falso"], m["fps"]
+
+    chaves = [chave(m) for m in metricas]
+    return [
+        not any(all(o >= a for o, a in zip(outra, atual)) and outra != atual for outra in chaves) for atual in chaves
+    ]
+
+
+def executar(
+    configuracoes: list[ConfiguracaoCaptura],
+    itens: list[ItemRotulado],
+    opcoes: OpcoesAnalise = OpcoesAnalise(),
+    processos: Optional[int] = None,
+) -> list[dict]:
+    """
+    Avalia as configurações em paralelo (uma por tarefa) e devolve, na ordem recebida, dicionários com a
+    configuração, as métricas e a marca de Pareto. O fps só é comparável entre configurações com no máximo um
+    processo por núcleo.
+    """
+    processos = max(1, min(processos or os.cpu_count() or 1, len(configuracoes)))
+    metricas: list[Optional[dict]] = [None] * len(configuracoes)
+    if processos == 1:
+        for i, configuracao in enumerate(configuracoes):
+            metricas[i] = avaliar_configuracao(configuracao, itens, opcoes)
+            _registrar_progresso(i, len(configuracoes), metricas[i])
+    else:
+        # Cada processo já ocupa um núcleo; as threads internas do OpenCV só competiriam entre si
+        with ProcessPoolExecutor(max_workers=processos, initializer=cv2.setNumThreads, initargs=(1,)) as executor:
+            futuros = {
+                executor.submit(avaliar_configuracao, configuracao, itens, opcoes): i
+                for i, configuracao in enumerate(configuracoes)
+            }
+            for concluidas, futuro in enumerate(as_completed(futuros)):
+                i = futuros[futuro]
+                metricas[i] = futuro.result()
+                _registrar_progresso(concluidas, len(configuracoes), metricas[i])
+    pareto = fronteira_pareto(metricas)
+    return [
+        {"configuracao": asdict(configuracao), "metricas": m, "pareto": p}
+        for configuracao, m, p in zip(configuracoes, metricas, pareto)
+    ]
+
+
+def _registrar_progresso(concluidas: int, total: int, metricas: dict):
+    logger.info(
+        "%d/%d: acurácia %.1f%%, alarme falso %.1f%%, %.1f fps",
+        concluidas + 1,
+        total,
+        metricas["acuracia"] * 100,
+        metricas["taxa_alarme_falso"] * 100,
+        metricas["fps"],
+    )
+
+
+def melhor_resultado(resultados: list[dict]) -> dict:
+    """Na fronteira de Pareto: maior acurácia, depois menor alarme falso, depois maior fps."""
+    return max(
+        (r for r in resultados if r["pareto"]),
+        key=lambda r: (r["metricas"]["acuracia"], -r["metricas"]["taxa_alarme_falso"], r["metricas"]["fps"]),
+    )
+
+
+def _diferencas(configuracao: dict, base: ConfiguracaoCaptura) -> str:
+    padrao = asdict(base)
+    return " ".join(f"{nome}={valor:g}" for nome, valor in configuracao.items() if valor != padrao[nome]) or "(base)"
+
+
+def imprimir_resumo(resultados: list[dict], base: ConfiguracaoCaptura = CONFIGURACAO_PADRAO, saida=sys.stdout):
+    """Tabela com a fronteira de Pareto primeiro e, dentro de cada grupo, da maior para a menor acurácia."""
+    ordenados = sorted(resultados, key=lambda r: (not r["pareto"], -r["metricas"]["acuracia"], -r["metricas"]["fps"]))
+    saida.write(f"{'P':<2} {'acurácia':>9} {'alarme falso':>13} {'alerta perdido':>15} {'fps':>8}  parâmetros\n")
+    for r in ordenados:
+        m = r["metricas"]
+        saida.write(
+            f"{'*' if r['pareto'] else '':<2} {m['acuracia'] * 100:>8.1f}% {m['taxa_alarme_falso'] * 100:>12.1f}%"
+            f" {m['taxa_alerta_perdido'] * 100:>14.1f}% {m['fps']:>8.1f}  {_diferencas(r['configuracao'], base)}\n"
+        )
+    saida.write(
+        f"{sum(r['pareto'] for r in resultados)} de {len(resultados)} configurações na fronteira de Pareto (*)\n"
+    )
+
+
+def gravar(resultados: list[dict], caminho: Path):
+    """Grava os resultados em CSV (uma coluna por parâmetro e métrica) ou JSONL, pela extensão."""
+    with caminho.open("w", newline="", encoding="utf-8") as saida:
+        if caminho.suffix.lower() == ".csv":
+            escritor = None
+            for r in resultados:
+                linha = {**r["configuracao"], **r["metricas"], "pareto": r["pareto"]}
+                if escritor is None:
+                    escritor = csv.DictWriter(saida, fieldnames=list(linha))
+                    escritor.writeheader()
+                escritor.writerow(linha)
+        else:
+            for r in resultados:
+                saida.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Varre parâmetros de detecção contra quadros rotulados: acurácia x alarme falso x fps."
+    )
+    parser.add_argument(
+        "origens", type=Path, nargs="+", help="Vídeos (com .csv de rótulos ao lado) ou pastas (com rotulos.csv)"
+    )
+    parser.add_argument(
+        "--espaco", dest="espaco", type=Path, default=None, help="JSON com os valores de cada parâmetro a variar"
+    )
+    parser.add_argument(
+        "--aleatorio",
+        dest="aleatorio",
+        type=int,
+        default=None,
+        help="Sorteia N configurações do espaço em vez de percorrer a grade inteira",
+    )
+    parser.add_argument("--semente", dest="semente", type=int, default=None, help="Semente do sorteio")
+    parser.add_argument(
+        "--configuracao",
+        dest="configuracao",
+        type=Path,
+        default=None,
+        help="JSON com a configuração base (parâmetros fora do espaço ficam com estes valores)",
+    )
+    parser.add_argument(
+        "-p", "--processos", dest="processos", type=int, default=None, help="Número de processos (padrão: núcleos)"
+    )
+    parser.add_argument(
+        "-o", "--saida", dest="saida", type=Path, default=None, help="Grava todos os resultados (.csv ou .jsonl)"
+    )
+    parser.add_argument(
+        "--melhor",
+        dest="melhor",
+        type=Path,
+        default=None,
+        help="Grava a configuração de maior acurácia da fronteira de Pareto (para --configuracao)",
+    )
+    parser.add_argument("--limiar-esq", dest="limiar_esquerdo", type=int, default=70, help="Threshold do olho esquerdo")
+    parser.add_argument("--limiar-dir", dest="limiar_direito", type=int, default=70, help="Threshold do olho direito")
+    parser.add_argument(
+        "--rastrear-rosto",
+        action="store_true",
+        dest="rastrear_rosto",
+        help="Procura o rosto em volta da posição anterior",
+    )
+    parser.add_argument(
+        "--escala-varredura",
+        dest="escala_varredura",
+        type=float,
+        default=1.0,
+        help="Fator de redução do quadro na varredura completa do rosto",
+    )
+    parser.add_argument(
+        "--motor-pupila",
+        dest="motor_pupila",
+        choices=[MOTOR_BLOB, MOTOR_COMPONENTES],
+        default=MOTOR_BLOB,
+        help="Detecção de pupila: blob (SimpleBlobDetector) ou componentes (componentes conexos)",
+    )
+    parser.add_argument(
+        "--limiar-automatico",
+        action="store_true",
+        dest="limiar_automatico",
+        help="Calibra o threshold de cada olho automaticamente (--limiar-esq/--limiar-dir viram o padrão)",
+    )
+    parser.add_argument(
+        "--olhos-geometricos",
+        action="store_true",
+        dest="olhos_geometricos",
+        help="Prevê os olhos pela caixa do rosto; a cascata de olhos só verifica de tempos em tempos",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = obter_argumentos()
+    base = CONFIGURACAO_PADRAO if args.configuracao is None else ConfiguracaoCaptura.ler(args.configuracao)
+    espaco = ESPACO_PADRAO if args.espaco is None else json.loads(args.espaco.read_text(encoding="utf-8"))
+    try:
+        itens = [ler_item(origem) for origem in args.origens]
+        if args.aleatorio is None:
+            configuracoes = gerar_grade(espaco, base)
+        else:
+            configuracoes = sortear_configuracoes(espaco, args.aleatorio, args.semente, base)
+    except (FileNotFoundError, ValueError) as erro:
+        sys.exit(str(erro))
+    if not configuracoes:
+        sys.exit("Nenhuma configuração válida no espaço")
+    logger.info(
+        "%d configurações x %d quadros rotulados",
+        len(configuracoes),
+        sum(len(item.rotulos) for item in itens),
+    )
+    opcoes = OpcoesAnalise(
+        limiar_esquerdo=args.limiar_esquerdo,
+        limiar_direito=args.limiar_direito,
+        rastrear_rosto=args.rastrear_rosto,
+        escala_varredura=args.escala_varredura,
+        motor_pupila=args.motor_pupila,
+        limiar_automatico=args.limiar_automatico,
+        olhos_geometricos=args.olhos_geometricos,
+    )
+    resultados = executar(configuracoes, itens, opcoes, args.processos)
+    imprimir_resumo(resultados, base)
+    if args.saida is not None:
+        gravar(resultados, args.saida)
+    if args.melhor is not None:
+        melhor = melhor_resultado(resultados)
+        ConfiguracaoCaptura(**melhor["configuracao"]).gravar(args.melhor)
+        logger.info("Melhor configuração gravada em %s", args.melhor)
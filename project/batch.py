@@ -0,0 +1,438 @@
+"""
+Análise em lote, sem interface gráfica.
+Processa um vídeo, uma pasta de imagens ou uma sessão gravada (frame_sources.sessao) o mais rápido que
+a CPU permitir, dividindo o trabalho entre processos (trechos de quadros do vídeo ou da sessão, ou grupos
+de arquivos da pasta), e grava o resultado de cada quadro em JSONL ou CSV, na ordem original.
+Numa sessão, cada quadro usa os thresholds gravados com ele (entrada determinística para regressão).
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import cv2
+from capturers.cache import CacheResultado
+from capturers.haar_blob import (
+    CONFIGURACAO_PADRAO,
+    MOTOR_BLOB,
+    MOTOR_COMPONENTES,
+    TAMANHO_HISTORICO_ATENCAO,
+    ConfiguracaoCaptura,
+    ErroCV2,
+    HaarCascadeBlobCapture,
+    ResultadoQuadro,
+)
+from frame_sources import FimDoVideo, FolderFrameSource, SessaoFrameSource, VideoFrameSource
+from frame_sources.folder import listar_imagens
+from frame_sources.sessao import eh_sessao, ler_indice
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_SAIDA = [
+    "quadro",
+    "tempo_ms",
+    "arquivo",
+    "rosto_x",
+    "rosto_y",
+    "rosto_w",
+    "rosto_h",
+    "olho_esquerdo",
+    "olho_direito",
+    "pupila_esq_x",
+    "pupila_esq_y",
+    "pupila_dir_x",
+    "pupila_dir_y",
+    "atencao_quadro",
+    "atencao_ok",
+    "limiar_esq",
+    "limiar_dir",
+]
+
+
+@dataclass(frozen=True)
+class OpcoesAnalise:
+    """Parâmetros repassados a cada processo de trabalho."""
+
+    limiar_esquerdo: int = 70
+    limiar_direito: int = 70
+    rastrear_rosto: bool = False
+    escala_varredura: float = 1.0
+    motor_pupila: str = MOTOR_BLOB
+    limiar_automatico: bool = False
+    olhos_geometricos: bool = False
+    cache_quadros: bool = False
+    limiar_mudanca: float = 2.0
+    # Vídeo: analisa um a cada `passo` quadros, só no intervalo [inicio_s, fim_s)
+    passo: int = 1
+    inicio_s: Optional[float] = None
+    fim_s: Optional[float] = None
+    configuracao: ConfiguracaoCaptura = CONFIGURACAO_PADRAO
+
+
+@dataclass(frozen=True)
+class Trecho:
+    """Parte do trabalho de um processo: quadros [inicio, fim) de um vídeo ou sessão, ou uma lista de arquivos."""
+
+    origem: Path
+    inicio: int
+    fim: Optional[int] = None
+    arquivos: tuple = ()
+    sessao: bool = False
+
+
+def linha_resultado(
+    indice: int, resultado: ResultadoQuadro, tempo_ms: Optional[float] = None, arquivo: Optional[str] = None
+) -> dict:
+    """Converte o resultado de um quadro numa linha plana (mesmas colunas no JSONL e no CSV)."""
+    rosto = resultado.rosto or (None, None, None, None)
+    pupila_esq = resultado.pupila_esquerda or (None, None)
+    pupila_dir = resultado.pupila_direita or (None, None)
+    return {
+        "quadro": indice,
+        "tempo_ms": tempo_ms,
+        "arquivo": arquivo,
+        "rosto_x": rosto[0],
+        "rosto_y": rosto[1],
+        "rosto_w": rosto[2],
+        "rosto_h": rosto[3],
+        "olho_esquerdo": resultado.olho_esquerdo,
+        "olho_direito": resultado.olho_direito,
+        "pupila_esq_x": pupila_esq[0],
+        "pupila_esq_y": pupila_esq[1],
+        "pupila_dir_x": pupila_dir[0],
+        "pupila_dir_y": pupila_dir[1],
+        "atencao_quadro": resultado.atencao_quadro,
+        "atencao_ok": resultado.atencao_ok,
+        "limiar_esq": resultado.limiar_esquerdo,
+        "limiar_dir": resultado.limiar_direito,
+    }
+
+
+def criar_captura(opcoes: OpcoesAnalise):
+    """HaarCascadeBlobCapture configurada pelas opções (envolvida por CacheResultado se pedido)."""
+    captura = HaarCascadeBlobCapture(
+        rastrear_rosto=opcoes.rastrear_rosto,
+        escala_varredura=opcoes.escala_varredura,
+        motor_pupila=opcoes.motor_pupila,
+        limiar_automatico=opcoes.limiar_automatico,
+        olhos_geometricos=opcoes.olhos_geometricos,
+        configuracao=opcoes.configuracao,
+    )
+    if opcoes.cache_quadros:
+        return CacheResultado(captura, limiar_mudanca=opcoes.limiar_mudanca)
+    return captura
+
+
+def _processar_quadro(captura, quadro, opcoes: OpcoesAnalise, limiares=(None, None)) -> ResultadoQuadro:
+    limiar_esq = opcoes.limiar_esquerdo if limiares[0] is None else limiares[0]
+    limiar_dir = opcoes.limiar_direito if limiares[1] is None else limiares[1]
+    try:
+        captura.process(quadro, limiar_esq, limiar_dir)
+    except (cv2.error, ErroCV2):
+        # process já registrou o erro e marcou o quadro como sem atenção
+        pass
+    return captura.ultimo_resultado
+
+
+def _processar_trecho_video(trecho: Trecho, opcoes: OpcoesAnalise) -> list[dict]:
+    """
+    Processa um a cada `passo` quadros de [inicio, fim) do vídeo (os pulados não são decodificados).
+    Começa alguns quadros analisados antes do início (descartados) para o histórico de atenção chegar aquecido.
+    """
+    captura = criar_captura(opcoes)
+    historico = opcoes.configuracao.tamanho_historico_atencao
+    aquecimento = min(trecho.inicio // opcoes.passo, historico) * opcoes.passo
+    fonte = VideoFrameSource(
+        trecho.origem, passo=opcoes.passo, inicio_quadro=trecho.inicio - aquecimento, fim_quadro=trecho.fim
+    )
+    fonte.start()
+    linhas = []
+    try:
+        while True:
+            try:
+                quadro = fonte.next_frame()
+            except FimDoVideo:
+                break
+            resultado = _processar_quadro(captura, quadro, opcoes)
+            if fonte.quadro_atual >= trecho.inicio:
+                linhas.append(linha_resultado(fonte.quadro_atual, resultado, tempo_ms=fonte.tempo_atual_ms))
+    finally:
+        fonte.stop()
+    return linhas
+
+
+def _processar_trecho_pasta(trecho: Trecho, opcoes: OpcoesAnalise) -> list[dict]:
+    """Processa um grupo de arquivos; os primeiros `inicio - aquecimento` só aquecem o histórico."""
+    captura = criar_captura(opcoes)
+    # Cada arquivo é lido uma única vez: antecipa a decodificação, mas não guarda cache
+    fonte = FolderFrameSource(trecho.origem, arquivos=list(trecho.arquivos), memoria_max_mb=0)
+    fonte.start()
+    aquecimento = len(trecho.arquivos) - (trecho.fim - trecho.inicio)
+    linhas = []
+    try:
+        for posicao, arquivo in enumerate(trecho.arquivos):
+            quadro = fonte.next_frame()
+            if quadro is None:
+                logger.error("Não foi possível ler a imagem: %s", arquivo)
+                continue
+            resultado = _processar_quadro(captura, quadro, opcoes)
+            if posicao >= aquecimento:
+                indice = trecho.inicio + posicao - aquecimento
+                linhas.append(linha_resultado(indice, resultado, arquivo=Path(arquivo).name))
+    finally:
+        fonte.stop()
+    return linhas
+
+
+def _processar_trecho_sessao(trecho: Trecho, opcoes: OpcoesAnalise) -> list[dict]:
+    """Processa os quadros [inicio, fim) da sessão com os thresholds gravados, aquecendo o histórico antes."""
+    captura = criar_captura(opcoes)
+    aquecimento = min(trecho.inicio, opcoes.configuracao.tamanho_historico_atencao)
+    fonte = SessaoFrameSource(trecho.origem, tempo_real=False, inicio=trecho.inicio - aquecimento, fim=trecho.fim)
+    fonte.start()
+    linhas = []
+    try:
+        for indice in range(fonte.inicio, fonte.fim):
+            quadro = fonte.next_frame()
+            resultado = _processar_quadro(captura, quadro, opcoes, fonte.limiares())
+            if indice >= trecho.inicio:
+                tempo_ms = float(fonte.registro_atual["tempo"]) * 1000.0
+                linhas.append(linha_resultado(indice, resultado, tempo_ms=tempo_ms))
+            del quadro
+    finally:
+        fonte.stop()
+    return linhas
+
+
+def _inicializar_processo():
+    # Cada processo já ocupa um núcleo; as threads internas do OpenCV só competiriam entre si
+    cv2.setNumThreads(1)
+
+
+def _processar_trecho(trecho: Trecho, opcoes: OpcoesAnalise) -> list[dict]:
+    if trecho.sessao:
+        return _processar_trecho_sessao(trecho, opcoes)
+    if trecho.arquivos:
+        return _processar_trecho_pasta(trecho, opcoes)
+    return _processar_trecho_video(trecho, opcoes)
+
+
+def dividir_video(
+    caminho: Path,
+    tamanho_trecho: int,
+    passo: int = 1,
+    inicio_s: Optional[float] = None,
+    fim_s: Optional[float] = None,
+) -> list[Trecho]:
+    """
+    Divide o vídeo (ou o intervalo [inicio_s, fim_s)) em trechos de `tamanho_trecho` quadros; sem fim_s, o último
+    vai até o fim real do arquivo. Os trechos têm tamanho múltiplo de `passo`, para a amostragem não mudar entre eles.
+    """
+    captura = cv2.VideoCapture(str(caminho))
+    if not captura.isOpened():
+        raise FileNotFoundError(f"Não foi possível abrir o vídeo: {caminho}")
+    total = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = captura.get(cv2.CAP_PROP_FPS) or 0.0
+    captura.release()
+    if (inicio_s is not None or fim_s is not None) and fps <= 0:
+        raise ValueError(f"O vídeo não informa o fps; não dá para usar --inicio/--fim: {caminho}")
+    inicio = int(round(inicio_s * fps)) if inicio_s is not None else 0
+    fim = int(round(fim_s * fps)) if fim_s is not None else None
+    if total <= 0:
+        return [Trecho(caminho, inicio, fim)]
+    tamanho_trecho = -(-tamanho_trecho // passo) * passo
+    limite = total if fim is None else min(fim, total)
+    inicios = list(range(inicio, limite, tamanho_trecho)) or [inicio]
+    return [Trecho(caminho, i, i + tamanho_trecho) for i in inicios[:-1]] + [Trecho(caminho, inicios[-1], fim)]
+
+
+def dividir_pasta(pasta: Path, tamanho_trecho: int, historico: int = TAMANHO_HISTORICO_ATENCAO) -> list[Trecho]:
+    """
+    Divide as imagens da pasta (em ordem natural) em grupos, incluindo as `historico` anteriores para aquecimento.
+    """
+    arquivos = listar_imagens(pasta)
+    if not arquivos:
+        raise FileNotFoundError(f"Pasta vazia ou sem imagens: {pasta}")
+    trechos = []
+    for inicio in range(0, len(arquivos), tamanho_trecho):
+        fim = min(inicio + tamanho_trecho, len(arquivos))
+        aquecimento = min(inicio, historico)
+        trechos.append(Trecho(pasta, inicio, fim, tuple(arquivos[inicio - aquecimento : fim])))
+    return trechos
+
+
+def dividir_sessao(local: Path, tamanho_trecho: int) -> list[Trecho]:
+    """Divide a sessão gravada em trechos de `tamanho_trecho` quadros."""
+    total = len(ler_indice(local))
+    if total == 0:
+        raise FileNotFoundError(f"Sessão sem quadros: {local}")
+    return [
+        Trecho(local, inicio, min(inicio + tamanho_trecho, total), sessao=True)
+        for inicio in range(0, total, tamanho_trecho)
+    ]
+
+
+def analisar(
+    origem: Path, opcoes: OpcoesAnalise, processos: Optional[int] = None, tamanho_trecho: int = 500
+) -> Iterator[dict]:
+    """Gera as linhas de resultado de todos os quadros, em ordem, processando os trechos em paralelo."""
+    if eh_sessao(origem):
+        trechos = dividir_sessao(origem, tamanho_trecho)
+    elif origem.is_dir():
+        trechos = dividir_pasta(origem, tamanho_trecho, opcoes.configuracao.tamanho_historico_atencao)
+    else:
+        trechos = dividir_video(origem, tamanho_trecho, opcoes.passo, opcoes.inicio_s, opcoes.fim_s)
+    processos = max(1, min(processos or os.cpu_count() or 1, len(trechos)))
+    if processos == 1:
+        for trecho in trechos:
+            yield from _processar_trecho(trecho, opcoes)
+        return
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo) as executor:
+        for linhas in executor.map(_processar_trecho, trechos, [opcoes] * len(trechos)):
+            yield from linhas
+
+
+def gravar(linhas: Iterator[dict], saida, formato: str) -> int:
+    """Grava as linhas em JSONL ou CSV; retorna quantas foram gravadas."""
+    total = 0
+    if formato == "csv":
+        escritor = csv.DictWriter(saida, fieldnames=CAMPOS_SAIDA)
+        escritor.writeheader()
+        for linha in linhas:
+            escritor.writerow(linha)
+            total += 1
+    else:
+        for linha in linhas:
+            saida.write(json.dumps(linha, ensure_ascii=False) + "\n")
+            total += 1
+    return total
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Análise em lote (sem interface) de um vídeo ou pasta de imagens com o Eye Tracker."
+    )
+    parser.add_argument(
+        "origem", type=Path, help="Arquivo de vídeo, pasta de imagens (.png, .jpg, .bmp) ou pasta de sessão gravada"
+    )
+    parser.add_argument(
+        "-o", "--saida", dest="saida", type=Path, default=None, help="Arquivo de saída (padrão: saída padrão)"
+    )
+    parser.add_argument(
+        "-f",
+        "--formato",
+        dest="formato",
+        choices=["jsonl", "csv"],
+        default=None,
+        help="Formato da saída; por padrão deduzido da extensão de --saida (jsonl se não houver)",
+    )
+    parser.add_argument(
+        "-p", "--processos", dest="processos", type=int, default=None, help="Número de processos (padrão: núcleos)"
+    )
+    parser.add_argument(
+        "--tamanho-trecho",
+        dest="tamanho_trecho",
+        type=int,
+        default=500,
+        help="Quadros (ou arquivos) por trecho enviado a cada processo",
+    )
+    parser.add_argument("--limiar-esq", dest="limiar_esquerdo", type=int, default=70, help="Threshold do olho esquerdo")
+    parser.add_argument("--limiar-dir", dest="limiar_direito", type=int, default=70, help="Threshold do olho direito")
+    parser.add_argument(
+        "--rastrear-rosto",
+        action="store_true",
+        dest="rastrear_rosto",
+        help="Procura o rosto em volta da posição anterior",
+    )
+    parser.add_argument(
+        "--escala-varredura",
+        dest="escala_varredura",
+        type=float,
+        default=1.0,
+        help="Fator de redução do quadro na varredura completa do rosto",
+    )
+    parser.add_argument(
+        "--motor-pupila",
+        dest="motor_pupila",
+        choices=[MOTOR_BLOB, MOTOR_COMPONENTES],
+        default=MOTOR_BLOB,
+        help="Detecção de pupila: blob (SimpleBlobDetector) ou componentes (componentes conexos)",
+    )
+    parser.add_argument(
+        "--limiar-automatico",
+        action="store_true",
+        dest="limiar_automatico",
+        help="Calibra o threshold de cada olho automaticamente (--limiar-esq/--limiar-dir viram o padrão)",
+    )
+    parser.add_argument(
+        "--olhos-geometricos",
+        action="store_true",
+        dest="olhos_geometricos",
+        help="Prevê os olhos pela caixa do rosto; a cascata de olhos só verifica de tempos em tempos",
+    )
+    parser.add_argument(
+        "--cache-quadros",
+        action="store_true",
+        dest="cache_quadros",
+        help="Reaproveita o resultado anterior quando o quadro quase não mudou",
+    )
+    parser.add_argument(
+        "--limiar-mudanca",
+        dest="limiar_mudanca",
+        type=float,
+        default=2.0,
+        help="Diferença média (0-255) abaixo da qual o quadro conta como inalterado",
+    )
+    parser.add_argument(
+        "--passo",
+        dest="passo",
+        type=int,
+        default=1,
+        help="Vídeo: analisa um a cada N quadros (os outros não são decodificados)",
+    )
+    parser.add_argument("--inicio", dest="inicio_s", type=float, default=None, help="Vídeo: começa neste instante (s)")
+    parser.add_argument("--fim", dest="fim_s", type=float, default=None, help="Vídeo: termina neste instante (s)")
+    parser.add_argument(
+        "--configuracao",
+        dest="configuracao",
+        type=Path,
+        default=None,
+        help="JSON com parâmetros de detecção (por exemplo, o --melhor de avaliacao.py)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    args = obter_argumentos()
+    formato = args.formato or ("csv" if args.saida is not None and args.saida.suffix.lower() == ".csv" else "jsonl")
+    opcoes = OpcoesAnalise(
+        limiar_esquerdo=args.limiar_esquerdo,
+        limiar_direito=args.limiar_direito,
+        rastrear_rosto=args.rastrear_rosto,
+        escala_varredura=args.escala_varredura,
+        motor_pupila=args.motor_pupila,
+        limiar_automatico=args.limiar_automatico,
+        olhos_geometricos=args.olhos_geometricos,
+        cache_quadros=args.cache_quadros,
+        limiar_mudanca=args.limiar_mudanca,
+        passo=args.passo,
+        inicio_s=args.inicio_s,
+        fim_s=args.fim_s,
+        configuracao=CONFIGURACAO_PADRAO if args.configuracao is None else ConfiguracaoCaptura.ler(args.configuracao),
+    )
+    linhas = analisar(args.origem, opcoes, processos=args.processos, tamanho_trecho=args.tamanho_trecho)
+    if args.saida is None:
+        total = gravar(linhas, sys.stdout, formato)
+    else:
+        with open(args.saida, "w", newline="", encoding="utf-8") as saida:
+            total = gravar(linhas, saida, formato)
+    print(f"{total} quadros processados", file=sys.stderr)
@@ -0,0 +1,4 @@
+"""
+Benchmarks do Eye Tracker. Rodar a partir da pasta project/, por exemplo:
+python -m benchmarks.pipeline --saida base.json
+"""
@@ -0,0 +1,125 @@
+"""
+Benchmark de alocações do process em regime: quanto cada quadro aloca (pico acima do que já estava alocado,
+pelo tracemalloc, que inclui os arrays do NumPy e as saídas do OpenCV), quanto fica retido e quantas coletas
+do GC acontecem a cada 1000 quadros. Roda sobre as entradas estáticas de benchmarks.pipeline (o mesmo quadro
+repetido) e sobre a sequência sintética em movimento de benchmarks.olhos (olhos mudam de tamanho a cada quadro).
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy
+from benchmarks.olhos import sequencia_sintetica
+from benchmarks.pipeline import IMAGENS_BASE, LIMIAR_PADRAO, RESOLUCOES, gerar_entradas
+from capturers.haar_blob import HaarCascadeBlobCapture
+
+
+class _ContadorGC:
+    """Coletas do GC por geração enquanto estiver instalado em gc.callbacks."""
+
+    def __init__(self):
+        self.coletas = [0, 0, 0]
+
+    def __call__(self, fase, info):
+        if fase == "start":
+            self.coletas[info["generation"]] += 1
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *_):
+        gc.callbacks.remove(self)
+
+
+def medir_alocacoes(quadros: list[numpy.ndarray], aquecimento: int = 20, **opcoes) -> dict:
+    """Process em todos os `quadros` (depois de `aquecimento` quadros) com tracemalloc e contagem de coletas."""
+    captura = HaarCascadeBlobCapture(**opcoes)
+    for i in range(aquecimento):
+        captura.process(quadros[i % len(quadros)], LIMIAR_PADRAO, LIMIAR_PADRAO)
+    buffers = getattr(captura, "buffers", None)
+    alocacoes_pool = buffers.alocacoes if buffers is not None else None
+    picos = numpy.empty(len(quadros))
+    tempos = numpy.empty(len(quadros))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicial = tracemalloc.get_traced_memory()[0]
+        with _ContadorGC() as contador:
+            for i, quadro in enumerate(quadros):
+                antes = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                inicio = time.perf_counter()
+                captura.process(quadro, LIMIAR_PADRAO, LIMIAR_PADRAO)
+                tempos[i] = time.perf_counter() - inicio
+                picos[i] = tracemalloc.get_traced_memory()[1] - antes
+        # A coleta completa esvazia as listas livres do interpretador, que o tracemalloc contaria como retidas
+        gc.collect()
+        retido = tracemalloc.get_traced_memory()[0] - inicial
+    finally:
+        tracemalloc.stop()
+    n = len(quadros)
+    return {
+        "quadros": n,
+        "kb_pico_p50": round(float(numpy.percentile(picos, 50)) / 1024, 2),
+        "kb_pico_max": round(float(picos.max()) / 1024, 2),
+        "kb_retidos_por_quadro": round(retido / n / 1024, 3),
+        "coletas_gc_por_1000": [round(c * 1000 / n, 1) for c in contador.coletas],
+        # Com tracemalloc ligado: serve para comparar entradas, não como latência real
+        "p50_ms_tracemalloc": round(float(numpy.percentile(tempos, 50)) * 1000, 3),
+        "realocacoes_pool": None if buffers is None else buffers.alocacoes - alocacoes_pool,
+        "kb_pool": None if buffers is None else round(buffers.bytes_reservados / 1024, 1),
+    }
+
+
+def executar(quadros: int = 200, resolucoes=tuple(RESOLUCOES), **opcoes) -> dict:
+    entradas = {
+        nome: [quadro] * quadros
+        for nome, quadro in gerar_entradas(resolucoes).items()
+        if "+ruido" not in nome and "original" not in nome
+    }
+    # Metade dos quadros com cada imagem de base
+    entradas["movimento@480p"] = list(sequencia_sintetica(max(quadros // len(IMAGENS_BASE), 1)))
+    return {nome: medir_alocacoes(lista, **opcoes) for nome, lista in entradas.items()}
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Alocações e coletas do GC por quadro do process em regime.")
+    parser.add_argument("-n", "--quadros", dest="quadros", type=int, default=200, help="Quadros medidos por entrada")
+    parser.add_argument(
+        "-r",
+        "--resolucoes",
+        dest="resolucoes",
+        nargs="+",
+        choices=list(RESOLUCOES),
+        default=["480p", "720p"],
+        help="Resoluções das entradas estáticas",
+    )
+    parser.add_argument(
+        "--olhos-geometricos", action="store_true", dest="olhos_geometricos", help="Mede o modo de olhos geométricos"
+    )
+    parser.add_argument("-o", "--saida", dest="saida", type=Path, default=None, help="Salva o resultado em JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    resultado = executar(args.quadros, tuple(args.resolucoes), olhos_geometricos=args.olhos_geometricos)
+    print(
+        f"{'entrada':<18} {'KB pico p50':>12} {'KB pico máx':>12} {'KB retidos/q':>13}"
+        f" {'GC g0/g1/g2 por 1000':>21} {'realocações':>12}"
+    )
+    for nome, r in resultado.items():
+        coletas = "/".join(f"{c:g}" for c in r["coletas_gc_por_1000"])
+        realocacoes = "-" if r["realocacoes_pool"] is None else r["realocacoes_pool"]
+        print(
+            f"{nome:<18} {r['kb_pico_p50']:>12.2f} {r['kb_pico_max']:>12.2f} {r['kb_retidos_por_quadro']:>13.3f}"
+            f" {coletas:>21} {realocacoes:>12}"
+        )
+    if args.saida is not None:
+        args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
@@ -0,0 +1,68 @@
+"""
+Benchmark de inicialização, como a pagam os workers de lote a cada spawn.
+Cada medição roda num interpretador novo e separa: import das capturas e fontes, primeiro quadro
+(FileFrameSource) e primeira detecção (process, incluindo o carregamento das cascatas).
+O PyQt6 fica bloqueado no processo filho: se algum desses imports passar a depender de Qt, a medição falha.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy
+from benchmarks.pipeline import resumir
+from settings import settings
+
+ETAPAS = ("importacao", "primeiro_quadro", "primeira_deteccao", "processo")
+
+SCRIPT_FILHO = """
+import json, sys, time
+sys.modules["PyQt6"] = None
+inicio = time.perf_counter()
+from capturers.haar_blob import HaarCascadeBlobCapture
+from frame_sources import FileFrameSource
+importado = time.perf_counter()
+fonte = FileFrameSource()
+fonte.start()
+quadro = fonte.next_frame()
+lido = time.perf_counter()
+HaarCascadeBlobCapture().process(quadro, 70, 70)
+detectado = time.perf_counter()
+print(json.dumps([importado - inicio, lido - importado, detectado - lido]))
+"""
+
+
+def medir_uma_vez() -> list[float]:
+    """Tempos (s) de cada etapa num interpretador novo; `processo` inclui a subida do Python."""
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", SCRIPT_FILHO], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+    )
+    total = time.perf_counter() - inicio
+    return json.loads(saida.stdout.strip().splitlines()[-1]) + [total]
+
+
+def executar(repeticoes: int = 10) -> dict:
+    tempos = numpy.array([medir_uma_vez() for _ in range(repeticoes)])
+    return {etapa: resumir(tempos[:, i]) for i, etapa in enumerate(ETAPAS)}
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede import, primeiro quadro e primeira detecção.")
+    parser.add_argument("-n", "--repeticoes", dest="repeticoes", type=int, default=10, help="Processos medidos")
+    parser.add_argument("-o", "--saida", dest="saida", type=Path, default=None, help="Salva o resultado em JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    resultados = executar(args.repeticoes)
+    print(f"{'etapa':<20} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+    for etapa, r in resultados.items():
+        print(f"{etapa:<20} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['media_ms']:>9.1f}")
+    if args.saida is not None:
+        args.saida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
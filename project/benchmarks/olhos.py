@@ -0,0 +1,171 @@
+"""
+Benchmark dos olhos geométricos contra a cascata de olhos em todo quadro.
+Os dois modos recebem o mesmo rosto em cada quadro (uma única detecção de rosto por quadro) de um vídeo
+ou de uma sequência sintética com as imagens de capturers/dump em movimento (translação, escala e ruído).
+Relata a latência da etapa de olhos (e de olhos + pupilas + desenho) de cada modo e a concordância com a
+cascata: IoU das caixas dos olhos, presença dos olhos, atenção do quadro e distância entre as pupilas.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy
+from benchmarks.pipeline import IMAGENS_BASE, LIMIAR_PADRAO, RESOLUCOES, _compor, resumir
+from capturers.haar_blob import HaarCascadeBlobCapture
+from capturers.multi_rosto import iou
+from frame_sources import FimDoVideo, VideoFrameSource
+from metricas import Metricas
+from settings import settings
+
+# Linhas removidas do topo do recorte do olho (HaarCascadeBlobCapture._cortar_sobrancelhas)
+CORTE_SOBRANCELHAS = 15
+
+
+def sequencia_sintetica(quadros: int = 150, resolucao: str = "480p", semente: int = 0):
+    """Cada imagem de base, composta no quadro e movida suavemente; ruído gaussiano leve com semente fixa."""
+    gerador = numpy.random.default_rng(semente)
+    largura, altura = RESOLUCOES[resolucao]
+    for nome in IMAGENS_BASE:
+        base = _compor(cv2.imread(str(settings.BASE_DIR / "capturers" / "dump" / nome)), (largura, altura))
+        for i in range(quadros):
+            escala = 1.0 + 0.06 * numpy.sin(i / 17.0)
+            matriz = cv2.getRotationMatrix2D((largura / 2, altura / 2), 0.0, escala)
+            matriz[:, 2] += (25 * numpy.sin(i / 11.0), 12 * numpy.cos(i / 13.0))
+            quadro = cv2.warpAffine(base, matriz, (largura, altura), borderValue=(127, 127, 127))
+            ruido = gerador.normal(0.0, 4.0, quadro.shape)
+            yield numpy.clip(quadro + ruido, 0, 255).astype(numpy.uint8)
+
+
+def quadros_video(caminho: Path, limite: int):
+    fonte = VideoFrameSource(caminho, fim_quadro=limite)
+    fonte.start()
+    try:
+        while True:
+            yield fonte.next_frame()
+    except FimDoVideo:
+        pass
+    finally:
+        fonte.stop()
+
+
+def _pupila_no_rosto(caixa: Optional[tuple], pupila: Optional[tuple]) -> Optional[numpy.ndarray]:
+    if caixa is None or pupila is None:
+        return None
+    return numpy.array((caixa[0] + pupila[0], caixa[1] + CORTE_SOBRANCELHAS + pupila[1]))
+
+
+def executar(quadros, intervalo_verificacao: int) -> dict:
+    detector = HaarCascadeBlobCapture()
+    modos = {
+        "cascata": HaarCascadeBlobCapture(),
+        "geometrico": HaarCascadeBlobCapture(olhos_geometricos=True, intervalo_verificacao_olhos=intervalo_verificacao),
+    }
+    for captura in modos.values():
+        captura.metricas = Metricas(janela=100000)
+    tempos = {nome: [] for nome in modos}
+    ious = {"esquerdo": [], "direito": []}
+    distancias = []
+    concordancia_olhos = concordancia_atencao = comparados = 0
+    for quadro in quadros:
+        rosto, caixa = detector.localizar_rosto(quadro)
+        if rosto is None:
+            continue
+        x, y, w, h = caixa
+        saidas = {}
+        for nome, captura in modos.items():
+            copia = quadro.copy()
+            inicio = time.perf_counter()
+            captura.processar_rosto(copia, copia[y : y + h, x : x + w], caixa, LIMIAR_PADRAO, LIMIAR_PADRAO)
+            tempos[nome].append(time.perf_counter() - inicio)
+            saidas[nome] = (captura.caixas_olhos, captura.ultimo_resultado)
+        (caixas_ref, ref), (caixas_geo, geo) = saidas["cascata"], saidas["geometrico"]
+        comparados += 1
+        concordancia_olhos += (ref.olho_esquerdo, ref.olho_direito) == (geo.olho_esquerdo, geo.olho_direito)
+        concordancia_atencao += ref.atencao_quadro == geo.atencao_quadro
+        for lado, a, b in zip(ious, caixas_ref, caixas_geo):
+            if a is not None and b is not None:
+                ious[lado].append(iou(a, b))
+        for a, b in (
+            (
+                _pupila_no_rosto(caixas_ref[0], ref.pupila_esquerda),
+                _pupila_no_rosto(caixas_geo[0], geo.pupila_esquerda),
+            ),
+            (_pupila_no_rosto(caixas_ref[1], ref.pupila_direita), _pupila_no_rosto(caixas_geo[1], geo.pupila_direita)),
+        ):
+            if a is not None and b is not None:
+                distancias.append(float(numpy.linalg.norm(a - b)))
+    if not comparados:
+        raise SystemExit("Nenhum rosto encontrado nos quadros.")
+    latencia = {}
+    for nome, captura in modos.items():
+        p50, p95, p99 = captura.metricas.quantis_ms("olhos")
+        latencia[nome] = {
+            "olhos": {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)},
+            "olhos_pupilas_desenho": resumir(numpy.array(tempos[nome])),
+            "verificacoes_olhos": captura.metricas.contadores.get("verificacoes_olhos", comparados),
+        }
+    return {
+        "quadros": comparados,
+        "latencia": latencia,
+        "precisao": {
+            "iou_esquerdo": _resumo_simples(ious["esquerdo"]),
+            "iou_direito": _resumo_simples(ious["direito"]),
+            "concordancia_olhos": concordancia_olhos / comparados,
+            "concordancia_atencao": concordancia_atencao / comparados,
+            "distancia_pupilas_px": _resumo_simples(distancias),
+        },
+    }
+
+
+def _resumo_simples(valores: list[float]) -> Optional[dict]:
+    if not valores:
+        return None
+    p10, p50, p95 = numpy.percentile(valores, (10, 50, 95))
+    return {"media": float(numpy.mean(valores)), "p10": float(p10), "p50": float(p50), "p95": float(p95)}
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Compara olhos geométricos com a cascata de olhos em todo quadro.")
+    parser.add_argument(
+        "-v", "--video", dest="video", type=Path, default=None, help="Vídeo (padrão: sequência sintética)"
+    )
+    parser.add_argument(
+        "-n", "--quadros", dest="quadros", type=int, default=150, help="Quadros (por imagem, se sintético)"
+    )
+    parser.add_argument(
+        "-i",
+        "--intervalo-verificacao",
+        dest="intervalo_verificacao",
+        type=int,
+        default=15,
+        help="Intervalo de verificação do modo geométrico",
+    )
+    parser.add_argument("-o", "--saida", dest="saida", type=Path, default=None, help="Salva o resultado em JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    quadros = quadros_video(args.video, args.quadros) if args.video else sequencia_sintetica(args.quadros)
+    resultado = executar(quadros, args.intervalo_verificacao)
+    print(f"{resultado['quadros']} quadros com rosto")
+    print(f"{'modo':<12} {'olhos p50 ms':>13} {'olhos p95 ms':>13} {'total p50 ms':>13} {'verificações':>13}")
+    for nome, r in resultado["latencia"].items():
+        print(
+            f"{nome:<12} {r['olhos']['p50_ms']:>13.3f} {r['olhos']['p95_ms']:>13.3f}"
+            f" {r['olhos_pupilas_desenho']['p50_ms']:>13.3f} {r['verificacoes_olhos']:>13}"
+        )
+    precisao = resultado["precisao"]
+    for lado in ("iou_esquerdo", "iou_direito", "distancia_pupilas_px"):
+        r = precisao[lado]
+        if r is not None:
+            print(f"{lado:<22} média {r['media']:.3f}  p10 {r['p10']:.3f}  p50 {r['p50']:.3f}  p95 {r['p95']:.3f}")
+    print(f"{'concordância olhos':<22} {precisao['concordancia_olhos']:.1%}")
+    print(f"{'concordância atenção':<22} {precisao['concordancia_atencao']:.1%}")
+    if args.saida is not None:
+        args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
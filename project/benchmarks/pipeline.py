@@ -0,0 +1,230 @@
+"""
+Benchmark por estágio do pipeline de captura.
+Mede detectar_rosto, detectar_olhos, rastrear_blob (e o motor pupila_cc), desenhar, Window.opencv_to_qt,
+exibicao (conversão no tamanho do rótulo), process completo e process_pipeline (capturers.pipeline em regime:
+tempo entre resultados com as etapas sobrepostas)
+sobre as imagens de capturers/dump e variantes sintéticas (escaladas e com ruído) em 480p/720p/1080p.
+Relata p50/p95/p99 e quadros/s, salva em JSON e compara com uma execução anterior.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import cv2
+import numpy
+from capturers import pupila_cc
+from capturers.haar_blob import HaarCascadeBlobCapture
+from capturers.pipeline import CapturaPipeline
+from settings import settings
+
+RESOLUCOES = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+IMAGENS_BASE = ("man.png", "woman.png")
+# Fração da altura do quadro ocupada pela imagem de base nas variantes sintéticas
+OCUPACAO_ROSTO = 0.6
+SIGMA_RUIDO = 8.0
+LIMIAR_PADRAO = 70
+# Tamanho do rótulo de vídeo da janela (baseImage em GUImain.ui)
+TAMANHO_EXIBICAO = (640, 480)
+
+
+def _compor(imagem: numpy.ndarray, resolucao: tuple[int, int]) -> numpy.ndarray:
+    """Centraliza a imagem, escalada para OCUPACAO_ROSTO da altura, num quadro cinza do tamanho pedido."""
+    largura, altura = resolucao
+    escala = altura * OCUPACAO_ROSTO / imagem.shape[0]
+    redimensionada = cv2.resize(imagem, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+    quadro = numpy.full((altura, largura, 3), 127, numpy.uint8)
+    h, w = redimensionada.shape[:2]
+    y, x = (altura - h) // 2, (largura - w) // 2
+    quadro[y : y + h, x : x + w] = redimensionada
+    return quadro
+
+
+def gerar_entradas(resolucoes=tuple(RESOLUCOES), semente: int = 0) -> dict[str, numpy.ndarray]:
+    """Imagens originais do dump mais variantes escaladas e com ruído gaussiano (semente fixa)."""
+    gerador = numpy.random.default_rng(semente)
+    entradas = {}
+    for nome in IMAGENS_BASE:
+        imagem = cv2.imread(str(settings.BASE_DIR / "capturers" / "dump" / nome))
+        if imagem is None:
+            raise FileNotFoundError(f"Imagem de benchmark não encontrada: {nome}")
+        base = Path(nome).stem
+        entradas[f"{base}@original"] = imagem
+        for rotulo in resolucoes:
+            quadro = _compor(imagem, RESOLUCOES[rotulo])
+            entradas[f"{base}@{rotulo}"] = quadro
+            ruido = gerador.normal(0.0, SIGMA_RUIDO, quadro.shape)
+            entradas[f"{base}@{rotulo}+ruido"] = numpy.clip(quadro + ruido, 0, 255).astype(numpy.uint8)
+    return entradas
+
+
+def _opencv_to_qt() -> Optional[Callable]:
+    """Window.opencv_to_qt, se PyQt6 estiver disponível."""
+    try:
+        from gui.application_window import Window
+    except ImportError:
+        return None
+    return Window.opencv_to_qt
+
+
+def _conversor_exibicao() -> Optional[Callable]:
+    """ConversorExibicao.converter (caminho de exibição da janela), se PyQt6 estiver disponível."""
+    try:
+        from gui.exibicao import ConversorExibicao
+    except ImportError:
+        return None
+    return ConversorExibicao().converter
+
+
+def casos_estagio(quadro: numpy.ndarray, pipeline: CapturaPipeline) -> dict[str, Callable[[], object]]:
+    """
+    Funções sem argumento para cada estágio, preparadas com as saídas reais dos estágios anteriores.
+    Estágios que dependem de um rosto/olho não encontrado nesta entrada ficam de fora.
+    `pipeline` mede process_pipeline; quem chama o fecha depois das medições.
+    """
+    captura = HaarCascadeBlobCapture()
+    casos = {
+        "detectar_rosto": lambda: captura.detectar_rosto(quadro),
+        "process": lambda: captura.process(quadro, LIMIAR_PADRAO, LIMIAR_PADRAO),
+    }
+    # O pipeline só lê o quadro: o mesmo array pode estar em andamento mais de uma vez
+    casos["process_pipeline"] = lambda: pipeline.process(quadro, LIMIAR_PADRAO, LIMIAR_PADRAO)
+    converter = _opencv_to_qt()
+    if converter is not None:
+        casos["opencv_to_qt"] = lambda: converter(quadro)
+    exibicao = _conversor_exibicao()
+    if exibicao is not None:
+        largura, altura = TAMANHO_EXIBICAO
+        casos["exibicao"] = lambda: exibicao(quadro, largura, altura)
+    rosto = captura.detectar_rosto(quadro)
+    if rosto is None:
+        return casos
+    rosto_cinza = cv2.cvtColor(rosto, cv2.COLOR_BGR2GRAY)
+    casos["detectar_olhos"] = lambda: captura.detectar_olhos(rosto_cinza)
+    olho, olho_direito = captura.detectar_olhos(rosto_cinza)
+    if olho is None:
+        return casos
+    olhos = (olho, olho_direito)
+    casos["pupilas_componentes"] = lambda: pupila_cc.detectar_pupilas(olhos, (LIMIAR_PADRAO, LIMIAR_PADRAO), (1, 1))
+    casos["rastrear_blob"] = lambda: captura.rastrear_blob(olho, LIMIAR_PADRAO, 1)
+    keypoints = captura.rastrear_blob(olho, LIMIAR_PADRAO, 1)
+    if keypoints:
+        destino = numpy.empty(olho.shape + (3,), numpy.uint8)
+        casos["desenhar"] = lambda: captura.desenhar(olho, keypoints, destino)
+    return casos
+
+
+def medir(funcao: Callable[[], object], repeticoes: int, aquecimento: int = 3) -> numpy.ndarray:
+    """Tempos (s) de `repeticoes` chamadas, depois de algumas chamadas de aquecimento."""
+    for _ in range(aquecimento):
+        funcao()
+    tempos = numpy.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos[i] = time.perf_counter() - inicio
+    return tempos
+
+
+def resumir(tempos: numpy.ndarray) -> dict:
+    """Percentis em milissegundos e quadros/s pela mediana."""
+    p50, p95, p99 = numpy.percentile(tempos, (50, 95, 99)) * 1000.0
+    return {
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "media_ms": round(float(tempos.mean() * 1000.0), 4),
+        "fps": round(1000.0 / float(p50), 2) if p50 > 0 else None,
+        "amostras": int(len(tempos)),
+    }
+
+
+def executar(repeticoes: int = 50, resolucoes=tuple(RESOLUCOES), filtro: Optional[str] = None) -> dict:
+    """Roda todos os estágios sobre todas as entradas; resultado[estagio][entrada] = resumo."""
+    resultados: dict[str, dict] = {}
+    for nome_entrada, quadro in gerar_entradas(resolucoes).items():
+        pipeline = CapturaPipeline(HaarCascadeBlobCapture())
+        try:
+            for estagio, funcao in casos_estagio(quadro, pipeline).items():
+                if filtro and filtro not in estagio:
+                    continue
+                resultados.setdefault(estagio, {})[nome_entrada] = resumir(medir(funcao, repeticoes))
+        finally:
+            pipeline.fechar()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": numpy.__version__,
+            "plataforma": platform.platform(),
+            "processador": platform.processor(),
+            "threads_opencv": cv2.getNumThreads(),
+            "repeticoes": repeticoes,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: dict, base: dict, limite: float) -> list[str]:
+    """Regressões: pares estágio/entrada cujo p50 piorou mais que `limite` (fração) em relação à base."""
+    regressoes = []
+    for estagio, entradas in atual["resultados"].items():
+        for entrada, resumo in entradas.items():
+            anterior = base.get("resultados", {}).get(estagio, {}).get(entrada)
+            if anterior is None or not anterior["p50_ms"]:
+                continue
+            variacao = resumo["p50_ms"] / anterior["p50_ms"] - 1.0
+            if variacao > limite:
+                p50_antes, p50_agora = anterior["p50_ms"], resumo["p50_ms"]
+                regressoes.append(f"{estagio} [{entrada}]: p50 {p50_antes:.3f} -> {p50_agora:.3f} ms (+{variacao:.0%})")
+    return regressoes
+
+
+def imprimir(resultado: dict):
+    print(f"{'estágio':<20} {'entrada':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fps':>9}")
+    for estagio, entradas in resultado["resultados"].items():
+        for entrada, r in entradas.items():
+            tempos = f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}"
+            print(f"{estagio:<20} {entrada:<22} {tempos} {r['fps']:>9.1f}")
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmark por estágio do pipeline de captura.")
+    parser.add_argument("-n", "--repeticoes", dest="repeticoes", type=int, default=50, help="Medições por caso")
+    parser.add_argument(
+        "-r",
+        "--resolucoes",
+        dest="resolucoes",
+        nargs="+",
+        choices=list(RESOLUCOES),
+        default=list(RESOLUCOES),
+        help="Resoluções das variantes sintéticas",
+    )
+    parser.add_argument("-e", "--estagio", dest="filtro", default=None, help="Mede só estágios que contêm este texto")
+    parser.add_argument("-o", "--saida", dest="saida", type=Path, default=None, help="Salva o resultado em JSON")
+    parser.add_argument("-c", "--comparar", dest="base", type=Path, default=None, help="JSON de uma execução anterior")
+    parser.add_argument(
+        "-l", "--limite", dest="limite", type=float, default=0.10, help="Piora tolerada no p50 (fração, ex.: 0.10)"
+    )
+    parser.add_argument("--threads", dest="threads", type=int, default=None, help="cv2.setNumThreads antes de medir")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    resultado = executar(args.repeticoes, tuple(args.resolucoes), args.filtro)
+    imprimir(resultado)
+    if args.saida is not None:
+        args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if args.base is not None:
+        regressoes = comparar(resultado, json.loads(args.base.read_text()), args.limite)
+        for linha in regressoes:
+            print(f"REGRESSÃO: {linha}", file=sys.stderr)
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,87 @@
+"""
+Compara os motores de pupila (SimpleBlobDetector x componentes conexos) nas imagens do dump e variantes.
+Para cada entrada e threshold, roda os dois motores sobre os mesmos recortes de olho e relata:
+detecções de cada um, concordância de posição (px) quando ambos detectam e tempo por par de olhos.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import cv2
+import numpy
+from benchmarks.pipeline import RESOLUCOES, gerar_entradas, medir, resumir
+from capturers import pupila_cc
+from capturers.haar_blob import HaarCascadeBlobCapture
+
+# Distância (px) abaixo da qual as duas detecções são consideradas a mesma pupila
+TOLERANCIA_PX = 2.0
+
+
+def _recortes_olhos(captura: HaarCascadeBlobCapture, quadro: numpy.ndarray):
+    rosto = captura.detectar_rosto(quadro)
+    if rosto is None:
+        return None
+    olhos = captura.detectar_olhos(cv2.cvtColor(rosto, cv2.COLOR_BGR2GRAY))
+    return olhos if all(o is not None for o in olhos) else None
+
+
+def comparar_entrada(captura: HaarCascadeBlobCapture, olhos, limiares, repeticoes: int) -> dict:
+    deteccoes_blob = deteccoes_cc = concordantes = 0
+    distancias = []
+    for limiar in limiares:
+        blob = [captura.rastrear_blob(olho, limiar, 1) for olho in olhos]
+        componentes = pupila_cc.detectar_pupilas(olhos, (limiar, limiar), (1, 1))
+        for kp_blob, kp_cc in zip(blob, componentes):
+            deteccoes_blob += bool(kp_blob)
+            deteccoes_cc += bool(kp_cc)
+            if kp_blob and kp_cc:
+                distancia = float(numpy.hypot(*numpy.subtract(kp_blob[0].pt, kp_cc[0].pt)))
+                distancias.append(distancia)
+                concordantes += distancia <= TOLERANCIA_PX
+    limiar = limiares[len(limiares) // 2]
+    return {
+        "deteccoes_blob": deteccoes_blob,
+        "deteccoes_componentes": deteccoes_cc,
+        "concordantes": concordantes,
+        "distancia_media_px": round(float(numpy.mean(distancias)), 3) if distancias else None,
+        "tempo_blob": resumir(medir(lambda: [captura.rastrear_blob(o, limiar, 1) for o in olhos], repeticoes)),
+        "tempo_componentes": resumir(
+            medir(lambda: pupila_cc.detectar_pupilas(olhos, (limiar, limiar), (1, 1)), repeticoes)
+        ),
+    }
+
+
+def executar(repeticoes: int = 100, resolucoes=tuple(RESOLUCOES), limiares=tuple(range(10, 160, 2))) -> dict:
+    captura = HaarCascadeBlobCapture()
+    resultados = {}
+    for nome, quadro in gerar_entradas(resolucoes).items():
+        olhos = _recortes_olhos(captura, quadro)
+        if olhos is not None:
+            resultados[nome] = comparar_entrada(captura, olhos, limiares, repeticoes)
+    return resultados
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Compara os motores de detecção de pupila.")
+    parser.add_argument("-n", "--repeticoes", dest="repeticoes", type=int, default=100, help="Medições de tempo")
+    parser.add_argument(
+        "-r", "--resolucoes", dest="resolucoes", nargs="+", choices=list(RESOLUCOES), default=list(RESOLUCOES)
+    )
+    parser.add_argument("-o", "--saida", dest="saida", type=Path, default=None, help="Salva o resultado em JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    resultados = executar(args.repeticoes, tuple(args.resolucoes))
+    print(f"{'entrada':<22} {'det blob':>9} {'det cc':>9} {'iguais':>7} {'dist px':>8} {'blob ms':>8} {'cc ms':>8}")
+    for nome, r in resultados.items():
+        distancia = "-" if r["distancia_media_px"] is None else f"{r['distancia_media_px']:.2f}"
+        print(
+            f"{nome:<22} {r['deteccoes_blob']:>9} {r['deteccoes_componentes']:>9} {r['concordantes']:>7} "
+            f"{distancia:>8} {r['tempo_blob']['p50_ms']:>8.3f} {r['tempo_componentes']['p50_ms']:>8.3f}"
+        )
+    if args.saida is not None:
+        args.saida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
@@ -0,0 +1,48 @@
+"""
+Buffers reaproveitados entre quadros para as saídas intermediárias do OpenCV (dst=): cinza do quadro, redução
+da varredura, etapas do blob e olhos desenhados. Cada etapa pede o buffer pelo nome e recebe um array contíguo
+na forma pedida, apoiado numa área que só é realocada quando o pedido não cabe nela; como os olhos mudam de
+tamanho a cada quadro, o nome (e não a forma) é a chave, e em regime os quadros não alocam arrays.
+"""
+
+import math
+
+import numpy
+
+# Quanto a área cresce além do pedido quando precisa ser realocada (evita realocar a cada pixel a mais)
+FOLGA_CRESCIMENTO = 1.25
+
+
+class PoolBuffers:
+    """
+    obter(nome, forma) devolve um array sem inicializar. Com `voltas` > 1, cada nome alterna entre essa quantidade
+    de áreas, para que um buffer entregue continue válido pelas próximas `voltas` - 1 chamadas com o mesmo nome
+    (quadros em andamento no capturers.pipeline). Nomes diferentes podem ser usados em threads diferentes.
+    """
+
+    def __init__(self, voltas: int = 1):
+        if voltas < 1:
+            raise ValueError("A quantidade de voltas deve ser pelo menos 1")
+        self.voltas = voltas
+        self._areas: dict[str, list[numpy.ndarray]] = {}
+        self._proxima: dict[str, int] = {}
+        # Áreas criadas ou realocadas desde o início (em regime, para de crescer)
+        self.alocacoes = 0
+
+    def obter(self, nome: str, forma: tuple, dtype=numpy.uint8) -> numpy.ndarray:
+        dtype = numpy.dtype(dtype)
+        tamanho = math.prod(forma) * dtype.itemsize
+        areas = self._areas.setdefault(nome, [])
+        i = self._proxima.get(nome, 0) % self.voltas
+        self._proxima[nome] = i + 1
+        if i == len(areas):
+            areas.append(numpy.empty(int(tamanho * FOLGA_CRESCIMENTO), numpy.uint8))
+            self.alocacoes += 1
+        elif areas[i].size < tamanho:
+            areas[i] = numpy.empty(int(tamanho * FOLGA_CRESCIMENTO), numpy.uint8)
+            self.alocacoes += 1
+        return areas[i][:tamanho].view(dtype).reshape(forma)
+
+    @property
+    def bytes_reservados(self) -> int:
+        return sum(area.nbytes for areas in self._areas.values() for area in areas)
@@ -0,0 +1,69 @@
+"""
+Cache de resultado na frente de uma captura: se o quadro quase não mudou desde o último processamento completo,
+reaproveita o resultado (rosto, olhos, pupilas, atenção) em vez de rodar as cascatas e o blob de novo.
+A mudança é medida numa miniatura do quadro (diferença absoluta média), o que custa microssegundos.
+"""
+
+from typing import Optional
+
+import cv2
+import numpy
+
+# Miniatura usada para comparar quadros (largura, altura)
+TAMANHO_ASSINATURA = (32, 24)
+
+
+class CacheResultado:
+    """
+    Implementa o mesmo process(quadro, threshold_esq, threshold_dir) da captura envolvida.
+    O resultado é reaproveitado enquanto a diferença média da miniatura ficar abaixo de `limiar_mudanca`
+    (níveis de cinza, 0-255), os thresholds forem os mesmos e o resultado tiver menos de `idade_maxima` quadros;
+    assim o estado de atenção continua sendo recalculado periodicamente mesmo numa cena parada.
+    """
+
+    def __init__(self, captura, limiar_mudanca: float = 2.0, idade_maxima: int = 15):
+        self.captura = captura
+        self.limiar_mudanca = limiar_mudanca
+        self.idade_maxima = idade_maxima
+        self.ultima_mudanca: Optional[float] = None
+        self.reaproveitados = 0
+        self._assinatura_referencia: Optional[numpy.ndarray] = None
+        self._resultado: Optional[tuple] = None
+        self._limiares = None
+        self._idade = 0
+
+    def __getattr__(self, nome):
+        # Atributos da captura (ultimo_resultado, metricas, limiar_automatico...) continuam acessíveis
+        return getattr(self.captura, nome)
+
+    @staticmethod
+    def _assinatura(quadro: numpy.ndarray) -> numpy.ndarray:
+        return cv2.resize(quadro, TAMANHO_ASSINATURA, interpolation=cv2.INTER_AREA)
+
+    def mudanca(self, assinatura: numpy.ndarray) -> float:
+        """Diferença absoluta média entre a miniatura e a do último quadro processado por completo."""
+        return cv2.norm(assinatura, self._assinatura_referencia, cv2.NORM_L1) / assinatura.size
+
+    def process(self, frame: numpy.ndarray, threshold_esq, threshold_dir):
+        assinatura = self._assinatura(frame)
+        if (
+            self._resultado is not None
+            and self._idade < self.idade_maxima
+            and self._limiares == (threshold_esq, threshold_dir)
+            and assinatura.shape == self._assinatura_referencia.shape
+        ):
+            self.ultima_mudanca = self.mudanca(assinatura)
+            if self.ultima_mudanca < self.limiar_mudanca:
+                self._idade += 1
+                self.reaproveitados += 1
+                metricas = getattr(self.captura, "metricas", None)
+                if metricas is not None:
+                    metricas.incrementar("quadros_reaproveitados")
+                return (frame,) + self._resultado[1:]
+        self._resultado = None
+        resultado = self.captura.process(frame, threshold_esq, threshold_dir)
+        self._resultado = resultado
+        self._assinatura_referencia = assinatura
+        self._limiares = (threshold_esq, threshold_dir)
+        self._idade = 0
+        return resultado
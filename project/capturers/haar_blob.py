@@ -2,13 +2,23 @@
 Detecção de rosto e olhos com Haar Cascade e pupilas com blob.
 Usado para estimar se a pessoa está olhando para a câmera (atenção).
 """
+
+import json
 import logging
+import threading
 from collections import deque
+from dataclasses import asdict, dataclass, fields
+from functools import partial
+from pathlib import Path
 from typing import Optional, Tuple
 
 import numpy
 import cv2
+from capturers import pupila_cc
+from capturers.buffers import PoolBuffers
+from capturers.limiar import CalibradorLimiar, detectar_componentes
 from cv2.data import haarcascades
+from metricas import medir
 from settings import settings
 
 logger = logging.getLogger(__name__)
@@ -19,53 +29,335 @@ MARGEM_CENTRO = 0.45
 TAMANHO_HISTORICO_ATENCAO = 5
 # Mínimo de quadros “com atenção” no histórico para considerar atenção OK
 LIMIAR_ATENCAO = 4
+# Rastreamento do rosto: quanto a janela de busca cresce em torno da caixa anterior (fração do tamanho)
+EXPANSAO_JANELA_ROSTO = 0.5
+# Variação de tamanho aceita entre um quadro e o seguinte (minSize/maxSize a partir do rosto anterior)
+VARIACAO_TAMANHO_ROSTO = 0.25
+# Parâmetros do detectMultiScale do rosto (scaleFactor, minNeighbors); o governador de qualidade pode afrouxá-los
+FATOR_ESCALA_ROSTO = 1.2
+VIZINHOS_ROSTO = 6
+# Parâmetros do detectMultiScale dos olhos no recorte do rosto
+FATOR_ESCALA_OLHOS = 1.2
+VIZINHOS_OLHOS = 6
+# Olho com centro antes desta fração da largura do rosto é o esquerdo; depois desta, o direito
+DIVISAO_OLHO_ESQUERDO = 0.4
+DIVISAO_OLHO_DIREITO = 0.5
+# Olhos geométricos: a cada quantos quadros a cascata de olhos confirma as posições previstas
+INTERVALO_VERIFICACAO_OLHOS = 15
+# Motores de detecção de pupila: cadeia SimpleBlobDetector original ou componentes conexos (pupila_cc)
+MOTOR_BLOB = "blob"
+MOTOR_COMPONENTES = "componentes"
+COR_PUPILA = (0, 0, 255)
 
 
 class ErroCV2(Exception):
     pass
 
 
+class _Compartilhado:
+    """
+    Atributo de classe construído no primeiro acesso e compartilhado por todas as instâncias.
+    Carregar as cascatas no import custava caro a quem só importa o módulo (e a cada worker de lote).
+    """
+
+    def __init__(self, fabrica):
+        self.fabrica = fabrica
+        self.valor = None
+        self._trava = threading.Lock()
+
+    def __get__(self, instancia, dono):
+        if self.valor is None:
+            with self._trava:
+                if self.valor is None:
+                    self.valor = self.fabrica()
+        return self.valor
+
+
+class _PorThread:
+    """
+    Como _Compartilhado, mas uma instância por thread e por chave: o SimpleBlobDetector guarda estado do último
+    detect, e capturers.pipeline roda o blob dos dois olhos ao mesmo tempo. A chave são os parâmetros do detector
+    (capturas com configurações diferentes na mesma thread não compartilham o detector).
+    """
+
+    def __init__(self, fabrica):
+        self.fabrica = fabrica
+        self._local = threading.local()
+
+    def obter(self, chave):
+        valores = getattr(self._local, "valores", None)
+        if valores is None:
+            valores = self._local.valores = {}
+        valor = valores.get(chave)
+        if valor is None:
+            valor = valores[chave] = self.fabrica(chave)
+        return valor
+
+
+def _carregar_cascata(nome: str) -> cv2.CascadeClassifier:
+    cascata = cv2.CascadeClassifier(haarcascades + nome)
+    if cascata.empty():
+        raise ErroCV2(f"Não foi possível carregar a cascata {haarcascades + nome}")
+    return cascata
+
+
+def _criar_blob(parametros: pupila_cc.ParametrosPupila) -> cv2.SimpleBlobDetector:
+    params = cv2.SimpleBlobDetector_Params()
+    params.filterByArea = True
+    params.minArea = parametros.area_minima
+    params.maxArea = parametros.area_maxima
+    params.filterByCircularity = True
+    params.minCircularity = parametros.circularidade_minima
+    params.filterByConvexity = False
+    params.filterByInertia = True
+    params.minInertiaRatio = parametros.inercia_minima
+    return cv2.SimpleBlobDetector_create(params)
+
+
+@dataclass(frozen=True)
+class ConfiguracaoCaptura:
+    """
+    Parâmetros de detecção de uma captura; os padrões são as constantes do módulo.
+    Lida e gravada em JSON (avaliacao.py grava a melhor configuração de uma varredura; main.py e batch.py leem
+    com --configuracao).
+    """
+
+    margem_centro: float = MARGEM_CENTRO
+    tamanho_historico_atencao: int = TAMANHO_HISTORICO_ATENCAO
+    limiar_atencao: int = LIMIAR_ATENCAO
+    fator_escala_rosto: float = FATOR_ESCALA_ROSTO
+    vizinhos_rosto: int = VIZINHOS_ROSTO
+    fator_escala_olhos: float = FATOR_ESCALA_OLHOS
+    vizinhos_olhos: int = VIZINHOS_OLHOS
+    divisao_olho_esquerdo: float = DIVISAO_OLHO_ESQUERDO
+    divisao_olho_direito: float = DIVISAO_OLHO_DIREITO
+    # Filtros da pupila, nos dois motores (SimpleBlobDetector e componentes conexos)
+    pupila_area_minima: float = pupila_cc.PARAMETROS_PADRAO.area_minima
+    pupila_area_maxima: float = pupila_cc.PARAMETROS_PADRAO.area_maxima
+    pupila_circularidade_minima: float = pupila_cc.PARAMETROS_PADRAO.circularidade_minima
+    pupila_inercia_minima: float = pupila_cc.PARAMETROS_PADRAO.inercia_minima
+
+    def __post_init__(self):
+        if not 1 <= self.limiar_atencao <= self.tamanho_historico_atencao:
+            raise ValueError("limiar_atencao deve estar entre 1 e tamanho_historico_atencao")
+        if self.fator_escala_rosto <= 1 or self.fator_escala_olhos <= 1:
+            raise ValueError("Os fatores de escala das cascatas devem ser maiores que 1")
+        if self.vizinhos_rosto < 0 or self.vizinhos_olhos < 0:
+            raise ValueError("Os vizinhos mínimos das cascatas não podem ser negativos")
+        if not 0 < self.divisao_olho_esquerdo <= self.divisao_olho_direito < 1:
+            raise ValueError("As divisões dos olhos devem satisfazer 0 < esquerdo <= direito < 1")
+        if self.margem_centro <= 0:
+            raise ValueError("margem_centro deve ser positiva")
+        if not 0 <= self.pupila_area_minima < self.pupila_area_maxima:
+            raise ValueError("A área mínima da pupila deve ser menor que a máxima")
+
+    @property
+    def parametros_pupila(self) -> pupila_cc.ParametrosPupila:
+        return pupila_cc.ParametrosPupila(
+            self.pupila_area_minima,
+            self.pupila_area_maxima,
+            self.pupila_circularidade_minima,
+            self.pupila_inercia_minima,
+        )
+
+    @classmethod
+    def de_dict(cls, valores: dict) -> "ConfiguracaoCaptura":
+        """Configuração com os `valores` dados e os padrões no resto; ValueError para parâmetros desconhecidos."""
+        desconhecidos = set(valores) - {campo.name for campo in fields(cls)}
+        if desconhecidos:
+            raise ValueError(f"Parâmetros de configuração desconhecidos: {', '.join(sorted(desconhecidos))}")
+        return cls(**valores)
+
+    @classmethod
+    def ler(cls, caminho: Path) -> "ConfiguracaoCaptura":
+        return cls.de_dict(json.loads(Path(caminho).read_text(encoding="utf-8")))
+
+    def gravar(self, caminho: Path):
+        Path(caminho).write_text(json.dumps(asdict(self), indent=2) + "\n", encoding="utf-8")
+
+
+CONFIGURACAO_PADRAO = ConfiguracaoCaptura()
+
+
+@dataclass
+class ResultadoQuadro:
+    """Resumo de um quadro processado: caixa do rosto, presença dos olhos, pupilas (no recorte do olho) e atenção."""
+
+    rosto: Optional[Tuple[int, int, int, int]] = None
+    olho_esquerdo: bool = False
+    olho_direito: bool = False
+    pupila_esquerda: Optional[Tuple[float, float]] = None
+    pupila_direita: Optional[Tuple[float, float]] = None
+    atencao_quadro: bool = False
+    atencao_ok: bool = False
+    limiar_esquerdo: Optional[int] = None
+    limiar_direito: Optional[int] = None
+
+
 class HaarCascadeBlobCapture:
     """Detecta rosto e olhos com Haar Cascade e pupilas com blob."""
 
-    face_detector = cv2.CascadeClassifier(haarcascades + "haarcascade_frontalface_default.xml")
-    eye_detector = cv2.CascadeClassifier(haarcascades + "haarcascade_eye.xml")
-    blob_detector = None
+    face_detector = _Compartilhado(lambda: _carregar_cascata("haarcascade_frontalface_default.xml"))
+    eye_detector = _Compartilhado(lambda: _carregar_cascata("haarcascade_eye.xml"))
+    blob_detector = _PorThread(_criar_blob)
 
-    def __init__(self):
+    def __init__(
+        self,
+        rastrear_rosto: bool = False,
+        intervalo_varredura: int = 10,
+        escala_varredura: float = 1.0,
+        motor_pupila: str = MOTOR_BLOB,
+        limiar_automatico: bool = False,
+        olhos_geometricos: bool = False,
+        intervalo_verificacao_olhos: int = INTERVALO_VERIFICACAO_OLHOS,
+        equalizar: bool = False,
+        configuracao: ConfiguracaoCaptura = CONFIGURACAO_PADRAO,
+    ):
+        """
+        rastrear_rosto: procura o rosto só numa janela em torno da caixa anterior;
+        a cada `intervalo_varredura` quadros (ou quando o rosto se perde) varre o quadro inteiro,
+        reduzido por `escala_varredura` (1.0 = resolução original).
+        motor_pupila: MOTOR_BLOB (SimpleBlobDetector) ou MOTOR_COMPONENTES (componentes conexos, os dois olhos de uma vez).
+        limiar_automatico: calibra o threshold de cada olho pelo próprio ROI (os valores recebidos em process
+        viram só o padrão enquanto não há calibração).
+        olhos_geometricos: recorta os olhos pelas proporções das últimas caixas confirmadas na caixa do rosto;
+        a cascata de olhos só roda a cada `intervalo_verificacao_olhos` quadros ou quando uma pupila se perde.
+        equalizar: equaliza o histograma do quadro em cinza usado por todas as etapas (cascatas e pupilas).
+        configuracao: parâmetros de detecção (margem da pupila, suavização da atenção, cascatas, filtros da pupila).
+        """
+        if motor_pupila not in (MOTOR_BLOB, MOTOR_COMPONENTES):
+            raise ValueError(f"Motor de pupila desconhecido: {motor_pupila}")
+        self.motor_pupila = motor_pupila
+        self.limiar_automatico = limiar_automatico
+        self.rastrear_rosto = rastrear_rosto
+        self.intervalo_varredura = intervalo_varredura
+        self.escala_varredura = self._escala_configurada = escala_varredura
+        self.configuracao = configuracao
+        self._parametros_pupila = configuracao.parametros_pupila
+        # O threshold automático é escolhido com o mesmo motor que vai usá-lo
+        if motor_pupila == MOTOR_BLOB:
+            detectar_esq = partial(self._pupila_por_limiar, nome="calibracao_esquerda")
+            detectar_dir = partial(self._pupila_por_limiar, nome="calibracao_direita")
+        else:
+            detectar_esq = detectar_dir = partial(detectar_componentes, parametros=self._parametros_pupila)
+        self.calibrador_esquerdo = CalibradorLimiar(detectar=detectar_esq)
+        self.calibrador_direito = CalibradorLimiar(detectar=detectar_dir)
+        self.fator_escala = configuracao.fator_escala_rosto
+        self.vizinhos_minimos = configuracao.vizinhos_rosto
+        self.caixa_rosto_anterior: Optional[Tuple[int, int, int, int]] = None
+        self._quadros_desde_varredura = 0
         self.area_blob_esquerdo_anterior = 1
         self.area_blob_direito_anterior = 1
         self.keypoints_esquerdo_anterior = None
         self.keypoints_direito_anterior = None
-        self._historico_atencao: deque[bool] = deque(maxlen=TAMANHO_HISTORICO_ATENCAO)
-
-    def _inicializar_blob(self):
-        params = cv2.SimpleBlobDetector_Params()
-        params.filterByArea = True
-        params.minArea = 30
-        params.maxArea = 1200
-        params.filterByCircularity = True
-        params.minCircularity = 0.5
-        params.filterByConvexity = False
-        params.filterByInertia = True
-        params.minInertiaRatio = 0.4
-        self.blob_detector = cv2.SimpleBlobDetector_create(params)
+        self.olhos_geometricos = olhos_geometricos
+        self.intervalo_verificacao_olhos = intervalo_verificacao_olhos
+        # Caixas dos dois olhos na última verificação, em fração da caixa do rosto (x, y, w, h)
+        self._olhos_relativos: Optional[tuple] = None
+        self._quadros_desde_verificacao = 0
+        self._verificar_olhos = False
+        self._pupilas_achadas = (False, False)
+        self.caixas_olhos: tuple = (None, None)
+        self.equalizar = equalizar
+        # Saídas intermediárias do OpenCV reaproveitadas entre quadros (capturers.pipeline aumenta as voltas)
+        self.buffers = PoolBuffers()
+        self._historico_atencao: deque[bool] = deque(maxlen=configuracao.tamanho_historico_atencao)
+        self.ultimo_resultado = ResultadoQuadro()
+        # metricas.Metricas opcional; None desliga a coleta (custo desprezível)
+        self.metricas = None
+
+    def ajustar_qualidade(
+        self, reducao: float, fator_escala: Optional[float] = None, vizinhos_minimos: Optional[int] = None
+    ):
+        """
+        Ajustes do governador de qualidade (governador.py): varredura do rosto em `reducao` x a escala configurada
+        e scaleFactor/minNeighbors da cascata de rosto (None volta ao valor da configuração).
+        """
+        self.escala_varredura = self._escala_configurada * reducao
+        self.fator_escala = self.configuracao.fator_escala_rosto if fator_escala is None else fator_escala
+        self.vizinhos_minimos = self.configuracao.vizinhos_rosto if vizinhos_minimos is None else vizinhos_minimos
+
+    @staticmethod
+    def _maior_caixa(coords) -> Optional[Tuple[int, int, int, int]]:
+        """Caixa (x, y, w, h) mais alta entre as detectadas, ou None."""
+        if coords is None or len(coords) == 0:
+            return None
+        maior = max(coords, key=lambda c: c[3])
+        return tuple(int(v) for v in maior)
+
+    def quadro_cinza(self, frame: numpy.ndarray) -> numpy.ndarray:
+        """
+        Quadro BGR em cinza (equalizado, se configurado) num buffer reaproveitado; quadro já em cinza volta como está.
+        Calculado uma vez por quadro e usado pelas cascatas de rosto e olhos e pelo blob.
+        """
+        if frame.ndim == 2:
+            return frame
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.buffers.obter("cinza", frame.shape[:2]))
+        if self.equalizar:
+            cv2.equalizeHist(cinza, dst=cinza)
+        return cinza
+
+    def varrer_rostos(self, img: numpy.ndarray) -> list[Tuple[int, int, int, int]]:
+        """Todos os rostos do quadro inteiro, opcionalmente reduzido por escala_varredura."""
+        img = self.quadro_cinza(img)
+        escala = self.escala_varredura
+        if escala >= 1.0:
+            return [
+                tuple(int(v) for v in c)
+                for c in self.face_detector.detectMultiScale(img, self.fator_escala, self.vizinhos_minimos)
+            ]
+        altura, largura = img.shape
+        forma = (max(int(round(altura * escala)), 1), max(int(round(largura * escala)), 1))
+        reduzida = cv2.resize(
+            img, forma[::-1], dst=self.buffers.obter("varredura", forma), interpolation=cv2.INTER_AREA
+        )
+        return [
+            tuple(int(round(v / escala)) for v in c)
+            for c in self.face_detector.detectMultiScale(reduzida, self.fator_escala, self.vizinhos_minimos)
+        ]
+
+    def _varrer_quadro(self, img: numpy.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """Procura o maior rosto no quadro inteiro."""
+        return self._maior_caixa(self.varrer_rostos(img))
+
+    def buscar_na_janela(self, img: numpy.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """Procura o rosto só em volta da caixa anterior, com minSize/maxSize do tamanho anterior."""
+        img = self.quadro_cinza(img)
+        x, y, w, h = self.caixa_rosto_anterior
+        altura, largura = img.shape[:2]
+        margem_x, margem_y = int(w * EXPANSAO_JANELA_ROSTO), int(h * EXPANSAO_JANELA_ROSTO)
+        x0, y0 = max(x - margem_x, 0), max(y - margem_y, 0)
+        x1, y1 = min(x + w + margem_x, largura), min(y + h + margem_y, altura)
+        tamanho_min = (int(w * (1 - VARIACAO_TAMANHO_ROSTO)), int(h * (1 - VARIACAO_TAMANHO_ROSTO)))
+        tamanho_max = (int(w * (1 + VARIACAO_TAMANHO_ROSTO)), int(h * (1 + VARIACAO_TAMANHO_ROSTO)))
+        coords = self.face_detector.detectMultiScale(
+            img[y0:y1, x0:x1], self.fator_escala, self.vizinhos_minimos, minSize=tamanho_min, maxSize=tamanho_max
+        )
+        caixa = self._maior_caixa(coords)
+        if caixa is None:
+            return None
+        cx, cy, cw, ch = caixa
+        return cx + x0, cy + y0, cw, ch
 
     def detectar_rosto(self, img: numpy.ndarray) -> Optional[numpy.ndarray]:
-        """Retorna o maior rosto encontrado no quadro (recorte da imagem)."""
-        coords = self.face_detector.detectMultiScale(img, 1.2, 6)
-        if len(coords) > 1:
-            maior = (0, 0, 0, 0)
-            for i in coords:
-                if i[3] > maior[3]:
-                    maior = i
-            maior = numpy.array([maior], numpy.int32)
-        elif len(coords) == 1:
-            maior = coords
-        else:
+        """Retorna o maior rosto encontrado no quadro (recorte da própria imagem; a cascata roda no cinza)."""
+        cinza = self.quadro_cinza(img)
+        caixa = None
+        if (
+            self.rastrear_rosto
+            and self.caixa_rosto_anterior is not None
+            and self._quadros_desde_varredura < self.intervalo_varredura
+        ):
+            caixa = self.buscar_na_janela(cinza)
+            self._quadros_desde_varredura += 1
+        if caixa is None:
+            caixa = self._varrer_quadro(cinza)
+            self._quadros_desde_varredura = 0
+        self.caixa_rosto_anterior = caixa
+        if caixa is None:
             return None
-        for (x, y, w, h) in maior:
-            return img[y : y + h, x : x + w]
+        x, y, w, h = caixa
+        return img[y : y + h, x : x + w]
 
     @staticmethod
     def _cortar_sobrancelhas(img):
@@ -75,46 +367,99 @@ class HaarCascadeBlobCapture:
         altura, largura = img.shape[:2]
         return img[15:altura, 0:largura]
 
-    def detectar_olhos(
-        self, face_img: numpy.ndarray, cortar_sobrancelhas: bool = True
-    ) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
-        """Detecta olho esquerdo e direito no rosto; opcionalmente corta sobrancelhas."""
-        coords = self.eye_detector.detectMultiScale(face_img, 1.2, 6)
-        olho_esquerdo = olho_direito = None
+    def _caixas_olhos(self, face_img: numpy.ndarray):
+        """Caixas (x, y, w, h) do olho esquerdo e do direito achadas pela cascata no rosto (None se faltar)."""
+        configuracao = self.configuracao
+        coords = self.eye_detector.detectMultiScale(
+            face_img, configuracao.fator_escala_olhos, configuracao.vizinhos_olhos
+        )
+        caixa_esquerda = caixa_direita = None
         largura_img = face_img.shape[1]
         if coords is None or len(coords) == 0:
-            return olho_esquerdo, olho_direito
-        for (x, y, w, h) in coords:
+            return caixa_esquerda, caixa_direita
+        for x, y, w, h in coords:
             centro_x = int(float(x) + (float(w) / 2.0))
-            if centro_x < largura_img * 0.4:
-                olho_esquerdo = face_img[y : y + h, x : x + w]
-            elif centro_x > largura_img * 0.5:
-                olho_direito = face_img[y : y + h, x : x + w]
+            if centro_x < largura_img * configuracao.divisao_olho_esquerdo:
+                caixa_esquerda = (int(x), int(y), int(w), int(h))
+            elif centro_x > largura_img * configuracao.divisao_olho_direito:
+                caixa_direita = (int(x), int(y), int(w), int(h))
+        return caixa_esquerda, caixa_direita
+
+    def _recortar_olhos(self, face_img: numpy.ndarray, caixas, cortar_sobrancelhas: bool = True):
+        olho_esquerdo, olho_direito = (
+            None if c is None else face_img[c[1] : c[1] + c[3], c[0] : c[0] + c[2]] for c in caixas
+        )
         if cortar_sobrancelhas and (olho_esquerdo is not None or olho_direito is not None):
             return self._cortar_sobrancelhas(olho_esquerdo), self._cortar_sobrancelhas(olho_direito)
         return olho_esquerdo, olho_direito
 
+    def detectar_olhos(
+        self, face_img: numpy.ndarray, cortar_sobrancelhas: bool = True
+    ) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """Detecta olho esquerdo e direito no rosto; opcionalmente corta sobrancelhas."""
+        return self._recortar_olhos(face_img, self._caixas_olhos(face_img), cortar_sobrancelhas)
+
+    def localizar_olhos(self, face_img: numpy.ndarray) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """
+        Olhos do rosto; as caixas usadas (no rosto, antes do corte das sobrancelhas) ficam em self.caixas_olhos.
+        No modo geométrico, a cascata só roda para verificar (periodicamente, depois de uma pupila perdida ou
+        enquanto os dois olhos não forem confirmados); nos outros quadros as caixas saem das proporções confirmadas
+        aplicadas à caixa do rosto atual.
+        """
+        altura, largura = face_img.shape[:2]
+        if not self.olhos_geometricos:
+            caixas = self._caixas_olhos(face_img)
+        elif (
+            self._olhos_relativos is None
+            or self._verificar_olhos
+            or self._quadros_desde_verificacao >= self.intervalo_verificacao_olhos
+        ):
+            caixas = self._caixas_olhos(face_img)
+            self._quadros_desde_verificacao = 0
+            self._verificar_olhos = False
+            self._contar("verificacoes_olhos")
+            # Só prevê com os dois olhos confirmados; com um só, a cascata continua rodando a cada quadro
+            self._olhos_relativos = None
+            if caixas[0] is not None and caixas[1] is not None:
+                self._olhos_relativos = tuple(
+                    (x / largura, y / altura, w / largura, h / altura) for x, y, w, h in caixas
+                )
+        else:
+            self._quadros_desde_verificacao += 1
+            caixas = []
+            for rx, ry, rw, rh in self._olhos_relativos:
+                x, y = min(int(rx * largura), largura - 1), min(int(ry * altura), altura - 1)
+                caixas.append((x, y, max(int(rw * largura), 1), max(int(rh * altura), 1)))
+            caixas = tuple(caixas)
+        self.caixas_olhos = caixas
+        return self._recortar_olhos(face_img, caixas)
+
     def _pupila_centralizada(self, roi_olho: numpy.ndarray, keypoints) -> bool:
         """True se pelo menos um keypoint (pupila) está na região central do ROI do olho."""
         if not keypoints or len(keypoints) == 0:
             return False
         h, w = roi_olho.shape[:2]
         cx, cy = w / 2.0, h / 2.0
-        margem = min(w, h) * MARGEM_CENTRO
+        margem = min(w, h) * self.configuracao.margem_centro
         for kp in keypoints:
             x, y = kp.pt
             if abs(x - cx) <= margem and abs(y - cy) <= margem:
                 return True
         return False
 
-    def rastrear_blob(self, img, threshold, area_anterior):
-        """Detecta blob (pupila) na imagem do olho com threshold dado."""
-        img = cv2.GaussianBlur(img, (3, 3), 0)
-        _, img = cv2.threshold(img, threshold, 255, cv2.THRESH_BINARY)
-        img = cv2.erode(img, None, iterations=2)
-        img = cv2.dilate(img, None, iterations=4)
-        img = cv2.medianBlur(img, 5)
-        keypoints = self.blob_detector.detect(img)
+    def rastrear_blob(self, img, threshold, area_anterior, nome: str = "blob"):
+        """
+        Detecta blob (pupila) na imagem do olho com threshold dado.
+        As etapas alternam entre dois buffers de `nome` (um nome por olho quando os dois rodam em paralelo).
+        """
+        a = self.buffers.obter(nome + "_a", img.shape)
+        b = self.buffers.obter(nome + "_b", img.shape)
+        cv2.GaussianBlur(img, (3, 3), 0, dst=a)
+        cv2.threshold(a, threshold, 255, cv2.THRESH_BINARY, dst=b)
+        cv2.erode(b, None, dst=a, iterations=2)
+        cv2.dilate(a, None, dst=b, iterations=4)
+        cv2.medianBlur(b, 5, dst=a)
+        keypoints = self.blob_detector.obter(self._parametros_pupila).detect(a)
         if keypoints and len(keypoints) > 1:
             melhor = 1000
             escolhido = keypoints[0]
@@ -126,12 +471,22 @@ class HaarCascadeBlobCapture:
         return keypoints
 
     def desenhar(self, origem, keypoints, dest=None):
-        """Desenha os keypoints (pupilas) na imagem."""
+        """
+        Desenha os keypoints (pupilas) sobre uma cópia colorida do olho em cinza.
+        Com `dest` (BGR do tamanho do olho), a cópia é feita nele, sem alocar.
+        """
         try:
             if dest is None:
-                dest = origem
+                return cv2.drawKeypoints(
+                    origem, keypoints, None, COR_PUPILA, cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS
+                )
+            dest = cv2.cvtColor(origem, cv2.COLOR_GRAY2BGR, dst=dest)
             return cv2.drawKeypoints(
-                origem, keypoints, dest, (0, 0, 255), cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS
+                dest,
+                keypoints,
+                dest,
+                COR_PUPILA,
+                cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS | cv2.DRAW_MATCHES_FLAGS_DRAW_OVER_OUTIMG,
             )
         except cv2.error as e:
             raise ErroCV2(str(e))
@@ -140,56 +495,161 @@ class HaarCascadeBlobCapture:
         """Salva o quadro em pasta de debug (quando DEBUG_DUMP ativo)."""
         cv2.imwrite(str(settings.DEBUG_DUMP_LOCATION / f"{id(quadro)}.png"), quadro)
 
+    @staticmethod
+    def _posicao_pupila(keypoints) -> Optional[Tuple[float, float]]:
+        if not keypoints:
+            return None
+        x, y = keypoints[0].pt
+        return float(x), float(y)
+
+    def _contar(self, contador: str):
+        if self.metricas is not None:
+            self.metricas.incrementar(contador)
+
+    def _pupila_por_limiar(self, roi: numpy.ndarray, limiares, nome: str) -> list[bool]:
+        """Calibração com o motor blob: se a cadeia de rastrear_blob acha pupila no ROI com cada threshold."""
+        return [bool(self.rastrear_blob(roi, t, 1, nome)) for t in limiares]
+
+    def _ramo_olho(self, olho, calibrador: CalibradorLimiar, threshold, area_anterior, estagio: str):
+        """
+        Threshold (calibrado, se automático) e keypoints de um olho pelo blob. Cada olho só mexe no próprio
+        calibrador, então os dois ramos podem rodar em paralelo.
+        """
+        if olho is None:
+            return threshold, None
+        if self.limiar_automatico:
+            with medir(self.metricas, "limiar"):
+                threshold = calibrador.obter(olho, threshold)
+        keypoints = None
+        if self.motor_pupila == MOTOR_BLOB:
+            with medir(self.metricas, estagio):
+                keypoints = self.rastrear_blob(olho, threshold, area_anterior, estagio)
+        return threshold, keypoints
+
+    def _rastrear_pupilas(self, olho_esquerdo, olho_direito, threshold_esq, threshold_dir, executor=None):
+        """
+        Thresholds e keypoints de cada olho pelo motor configurado; sem pupila neste quadro, reaproveita os anteriores.
+        Com `executor` (concurrent.futures), o ramo do olho direito roda em paralelo ao do esquerdo.
+        """
+        ramo_esq = (olho_esquerdo, self.calibrador_esquerdo, threshold_esq, self.area_blob_esquerdo_anterior)
+        ramo_dir = (olho_direito, self.calibrador_direito, threshold_dir, self.area_blob_direito_anterior)
+        if executor is not None and olho_esquerdo is not None and olho_direito is not None:
+            futuro_dir = executor.submit(self._ramo_olho, *ramo_dir, "pupila_direita")
+            threshold_esq, kp_esq = self._ramo_olho(*ramo_esq, "pupila_esquerda")
+            threshold_dir, kp_dir = futuro_dir.result()
+        else:
+            threshold_esq, kp_esq = self._ramo_olho(*ramo_esq, "pupila_esquerda")
+            threshold_dir, kp_dir = self._ramo_olho(*ramo_dir, "pupila_direita")
+        if self.motor_pupila == MOTOR_COMPONENTES:
+            with medir(self.metricas, "pupilas"):
+                kp_esq, kp_dir = pupila_cc.detectar_pupilas(
+                    (olho_esquerdo, olho_direito),
+                    (threshold_esq, threshold_dir),
+                    (self.area_blob_esquerdo_anterior, self.area_blob_direito_anterior),
+                    self._parametros_pupila,
+                )
+
+        achadas = (bool(kp_esq), bool(kp_dir))
+        if any(antes and not agora for antes, agora in zip(self._pupilas_achadas, achadas)):
+            # Olhos geométricos: pupila que se perde pode ser recorte fora do olho; a cascata confirma no próximo quadro
+            self._verificar_olhos = True
+        self._pupilas_achadas = achadas
+        if olho_esquerdo is not None:
+            if not kp_esq:
+                self._contar("quadros_sem_pupila")
+            kp_esq = kp_esq or self.keypoints_esquerdo_anterior
+            self.keypoints_esquerdo_anterior = kp_esq
+        if olho_direito is not None:
+            if not kp_dir:
+                self._contar("quadros_sem_pupila")
+            kp_dir = kp_dir or self.keypoints_direito_anterior
+            self.keypoints_direito_anterior = kp_dir
+        return threshold_esq, threshold_dir, kp_esq, kp_dir
+
     def process(self, frame: numpy.ndarray, threshold_esq, threshold_dir):
         """
         Processa um quadro: detecta rosto, olhos, pupilas e se a pessoa está olhando para a câmera.
-        Retorna (quadro, olho_esq, olho_dir, atencao_ok).
+        Retorna (quadro, olho_esq, olho_dir, atencao_ok); o detalhe fica em self.ultimo_resultado.
         """
-        if not self.blob_detector:
-            self._inicializar_blob()
+        with medir(self.metricas, "process"):
+            try:
+                rosto, caixa = self.localizar_rosto(frame)
+                return self.processar_rosto(frame, rosto, caixa, threshold_esq, threshold_dir)
+            except (cv2.error, ErroCV2) as e:
+                self.registrar_falha(frame, e, threshold_esq, threshold_dir)
+                raise
 
-        try:
-            rosto = self.detectar_rosto(frame)
-            if rosto is None:
-                self._historico_atencao.append(False)
-                return (
-                    frame,
-                    None,
-                    None,
-                    sum(self._historico_atencao) >= LIMIAR_ATENCAO,
-                )
-            rosto_cinza = cv2.cvtColor(rosto, cv2.COLOR_RGB2GRAY)
-            olho_esquerdo, olho_direito = self.detectar_olhos(rosto_cinza)
+    # As três etapas abaixo compõem process; capturers.pipeline as chama em threads separadas.
+    # localizar_rosto só mexe no estado do rastreamento do rosto; processar_rosto e registrar_falha, no resto.
 
-            kp_esq = kp_dir = None
-            if olho_esquerdo is not None:
-                kp_esq = self.rastrear_blob(
-                    olho_esquerdo, threshold_esq, self.area_blob_esquerdo_anterior
-                ) or self.keypoints_esquerdo_anterior
-                self.keypoints_esquerdo_anterior = kp_esq
-            if olho_direito is not None:
-                kp_dir = self.rastrear_blob(
-                    olho_direito, threshold_dir, self.area_blob_direito_anterior
-                ) or self.keypoints_direito_anterior
-                self.keypoints_direito_anterior = kp_dir
+    def localizar_rosto(self, frame: numpy.ndarray):
+        """Etapa 1: (recorte do rosto no quadro em cinza, caixa) ou (None, None)."""
+        with medir(self.metricas, "rosto"):
+            rosto = self.detectar_rosto(self.quadro_cinza(frame))
+        return rosto, self.caixa_rosto_anterior
+
+    def processar_rosto(self, frame: numpy.ndarray, rosto, caixa, threshold_esq, threshold_dir, executor=None):
+        """
+        Etapa 2: olhos, pupilas (olhos em paralelo com `executor`), desenho e suavização da atenção.
+        `rosto` é o recorte em cinza de localizar_rosto (um recorte BGR é convertido aqui). Os olhos desenhados
+        devolvidos ficam em buffers reaproveitados: valem até o próximo quadro.
+        """
+        if rosto is None:
+            self._contar("quadros_sem_rosto")
+            self._historico_atencao.append(False)
+            atencao_ok = sum(self._historico_atencao) >= self.configuracao.limiar_atencao
+            self.ultimo_resultado = ResultadoQuadro(atencao_ok=atencao_ok)
+            return frame, None, None, atencao_ok
+        with medir(self.metricas, "olhos"):
+            rosto_cinza = rosto
+            if rosto.ndim == 3:
+                rosto_cinza = cv2.cvtColor(rosto, cv2.COLOR_BGR2GRAY, dst=self.buffers.obter("rosto", rosto.shape[:2]))
+            olho_esquerdo, olho_direito = self.localizar_olhos(rosto_cinza)
+        if olho_esquerdo is None or olho_direito is None:
+            self._contar("quadros_sem_olho")
+
+        threshold_esq, threshold_dir, kp_esq, kp_dir = self._rastrear_pupilas(
+            olho_esquerdo, olho_direito, threshold_esq, threshold_dir, executor
+        )
 
-            esq_ok = olho_esquerdo is not None and self._pupila_centralizada(olho_esquerdo, kp_esq)
-            dir_ok = olho_direito is not None and self._pupila_centralizada(olho_direito, kp_dir)
+        esq_ok = olho_esquerdo is not None and self._pupila_centralizada(olho_esquerdo, kp_esq)
+        dir_ok = olho_direito is not None and self._pupila_centralizada(olho_direito, kp_dir)
 
+        resultado = ResultadoQuadro(
+            rosto=caixa,
+            olho_esquerdo=olho_esquerdo is not None,
+            olho_direito=olho_direito is not None,
+            pupila_esquerda=self._posicao_pupila(kp_esq),
+            pupila_direita=self._posicao_pupila(kp_dir),
+            limiar_esquerdo=threshold_esq,
+            limiar_direito=threshold_dir,
+        )
+
+        with medir(self.metricas, "desenho"):
             if olho_esquerdo is not None:
-                olho_esquerdo = self.desenhar(olho_esquerdo, kp_esq, frame)
+                destino = self.buffers.obter("desenho_esquerdo", olho_esquerdo.shape + (3,))
+                olho_esquerdo = self.desenhar(olho_esquerdo, kp_esq, destino)
             if olho_direito is not None:
-                olho_direito = self.desenhar(olho_direito, kp_dir, frame)
-
-            atencao_quadro = esq_ok and dir_ok
-            self._historico_atencao.append(atencao_quadro)
-            atencao_ok = sum(self._historico_atencao) >= LIMIAR_ATENCAO
-
-            return frame, olho_esquerdo, olho_direito, atencao_ok
-        except (cv2.error, ErroCV2) as e:
-            logger.error("Erro ao processar: %s", str(e))
-            logger.error("Thresholds: esquerdo=%s, direito=%s", threshold_esq, threshold_dir)
-            if settings.DEBUG_DUMP:
-                self.debug_salvar(frame)
-            self._historico_atencao.append(False)
-            raise
+                destino = self.buffers.obter("desenho_direito", olho_direito.shape + (3,))
+                olho_direito = self.desenhar(olho_direito, kp_dir, destino)
+
+        atencao_quadro = esq_ok and dir_ok
+        self._historico_atencao.append(atencao_quadro)
+        atencao_ok = sum(self._historico_atencao) >= self.configuracao.limiar_atencao
+        resultado.atencao_quadro = atencao_quadro
+        resultado.atencao_ok = atencao_ok
+        self.ultimo_resultado = resultado
+
+        return frame, olho_esquerdo, olho_direito, atencao_ok
+
+    def registrar_falha(self, frame: numpy.ndarray, erro: Exception, threshold_esq, threshold_dir) -> bool:
+        """Registra um erro do OpenCV no quadro: log, contador, dump opcional e quadro sem atenção."""
+        logger.error("Erro ao processar: %s", str(erro))
+        logger.error("Thresholds: esquerdo=%s, direito=%s", threshold_esq, threshold_dir)
+        self._contar("erros")
+        if settings.DEBUG_DUMP:
+            self.debug_salvar(frame)
+        self._historico_atencao.append(False)
+        atencao_ok = sum(self._historico_atencao) >= self.configuracao.limiar_atencao
+        self.ultimo_resultado = ResultadoQuadro(atencao_ok=atencao_ok)
+        return atencao_ok
@@ -0,0 +1,95 @@
+"""
+Threshold automático da pupila, por olho.
+O histograma do ROI descarta os thresholds candidatos que deixam escura uma fração implausível do olho, e os
+restantes são testados com o mesmo motor de pupila da captura: com componentes conexos, todos de uma vez num
+único mosaico (pupila_cc); com o blob, a cadeia de rastrear_blob em cada um (quem chama passa `detectar`).
+O threshold escolhido é o centro da maior faixa contínua de candidatos que encontram pupila.
+O resultado fica em cache e só é recalculado quando o brilho do ROI muda.
+"""
+
+from typing import Callable, Optional, Sequence
+
+import cv2
+import numpy
+from capturers import pupila_cc
+
+CANDIDATOS_PADRAO = tuple(range(10, 200, 2))
+# Fração do ROI do olho que pode ficar escura com um threshold plausível
+FRACAO_ESCURA_MINIMA = 0.005
+FRACAO_ESCURA_MAXIMA = 0.4
+
+
+def detectar_componentes(
+    roi: numpy.ndarray, limiares: Sequence[int], parametros: pupila_cc.ParametrosPupila = pupila_cc.PARAMETROS_PADRAO
+) -> list[bool]:
+    """Se os componentes conexos acham pupila no ROI com cada threshold (todos numa única passada)."""
+    deteccoes = pupila_cc.detectar_pupilas([roi] * len(limiares), list(limiares), [1] * len(limiares), parametros)
+    return [bool(d) for d in deteccoes]
+
+
+# detectar(roi, limiares) -> uma flag "achou pupila" por threshold
+Detector = Callable[[numpy.ndarray, Sequence[int]], Sequence[bool]]
+
+
+def estimar_limiar(
+    roi: numpy.ndarray, candidatos: Sequence[int] = CANDIDATOS_PADRAO, detectar: Detector = detectar_componentes
+) -> Optional[int]:
+    """Threshold mais estável para o ROI do olho (cinza), ou None se nenhum candidato encontra a pupila."""
+    candidatos = numpy.asarray(candidatos)
+    fracao_escura = numpy.cumsum(numpy.bincount(roi.ravel(), minlength=256)) / roi.size
+    plausiveis = candidatos[
+        (fracao_escura[candidatos] >= FRACAO_ESCURA_MINIMA) & (fracao_escura[candidatos] <= FRACAO_ESCURA_MAXIMA)
+    ]
+    if len(plausiveis) == 0:
+        return None
+    encontrou = numpy.fromiter(detectar(roi, plausiveis.tolist()), bool, len(plausiveis))
+    if not encontrou.any():
+        return None
+    # Maior faixa contínua de candidatos com pupila: limites pelas transições de encontrou
+    bordas = numpy.diff(numpy.concatenate(([0], encontrou.astype(numpy.int8), [0])))
+    inicios, fins = numpy.flatnonzero(bordas == 1), numpy.flatnonzero(bordas == -1)
+    maior = numpy.argmax(fins - inicios)
+    return int(plausiveis[(inicios[maior] + fins[maior] - 1) // 2])
+
+
+class CalibradorLimiar:
+    """
+    Mantém o threshold de um olho em cache; recalibra quando média ou desvio do brilho do ROI mudam.
+    detectar: motor usado para testar os candidatos (o mesmo da captura).
+    """
+
+    def __init__(
+        self,
+        deriva_media: float = 10.0,
+        deriva_desvio: float = 0.25,
+        espera_nova_tentativa: int = 15,
+        detectar: Detector = detectar_componentes,
+    ):
+        self.detectar = detectar
+        self.deriva_media = deriva_media
+        self.deriva_desvio = deriva_desvio
+        self.espera_nova_tentativa = espera_nova_tentativa
+        self.limiar: Optional[int] = None
+        self.calibracoes = 0
+        self._media = self._desvio = None
+        self._quadros_desde_tentativa = 0
+
+    def _derivou(self, media: float, desvio: float) -> bool:
+        if self._media is None:
+            return True
+        return abs(media - self._media) > self.deriva_media or abs(desvio - self._desvio) > self.deriva_desvio * max(
+            self._desvio, 1.0
+        )
+
+    def obter(self, roi: numpy.ndarray, padrao: int) -> int:
+        """Threshold para este ROI; `padrao` (ex.: valor do slider) enquanto não houver calibração válida."""
+        media, desvio = cv2.meanStdDev(roi)
+        media, desvio = float(media[0, 0]), float(desvio[0, 0])
+        self._quadros_desde_tentativa += 1
+        sem_calibracao = self.limiar is None and self._quadros_desde_tentativa >= self.espera_nova_tentativa
+        if self._derivou(media, desvio) or sem_calibracao:
+            self._media, self._desvio = media, desvio
+            self._quadros_desde_tentativa = 0
+            self.calibracoes += 1
+            self.limiar = estimar_limiar(roi, detectar=self.detectar)
+        return padrao if self.limiar is None else self.limiar
@@ -0,0 +1,229 @@
+"""
+Modo com várias pessoas: cada rosto vira uma trilha com id estável e estado próprio (calibração, pupilas
+anteriores, histórico de atenção), guardado numa HaarCascadeBlobCapture por trilha.
+A cada `intervalo_varredura` quadros (ou quando alguma trilha se perde) o quadro inteiro é varrido e os rostos
+são associados às trilhas por IoU, com a distância dos centros como desempate; nos demais quadros cada trilha
+procura o rosto só numa janela em volta da própria caixa, então o custo cresce com a área das janelas,
+não com o número de varreduras completas.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy
+from capturers.haar_blob import ErroCV2, HaarCascadeBlobCapture, ResultadoQuadro
+from metricas import medir
+
+Caixa = Tuple[int, int, int, int]
+
+# IoU mínimo para um rosto da varredura continuar uma trilha
+LIMIAR_IOU = 0.3
+# Sem IoU suficiente, distância máxima entre centros (fração do lado da caixa anterior)
+DISTANCIA_CENTRO = 0.5
+# Quadros seguidos sem rosto antes de a trilha ser descartada
+MAXIMO_PERDIDOS = 5
+# IoU a partir do qual duas trilhas estão no mesmo rosto (a mais nova é a que perde)
+LIMIAR_DUPLICADA = 0.5
+COR_TRILHA = (0, 255, 0)
+
+
+def iou(a: Caixa, b: Caixa) -> float:
+    """Interseção sobre união de duas caixas (x, y, w, h)."""
+    largura = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    altura = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if largura <= 0 or altura <= 0:
+        return 0.0
+    intersecao = largura * altura
+    return intersecao / float(a[2] * a[3] + b[2] * b[3] - intersecao)
+
+
+def _distancia_centros(a: Caixa, b: Caixa) -> float:
+    return float(numpy.hypot(a[0] + a[2] / 2 - b[0] - b[2] / 2, a[1] + a[3] / 2 - b[1] - b[3] / 2))
+
+
+def associar(caixas_trilhas: dict[int, Caixa], caixas: list[Caixa]) -> dict[int, int]:
+    """
+    Associa trilhas (id -> caixa anterior) aos rostos detectados: id -> índice em `caixas`.
+    Guloso pelo maior IoU; quem sobra tenta o centro mais próximo dentro de DISTANCIA_CENTRO.
+    """
+    pares = sorted(
+        (
+            (iou(caixa, nova), id_trilha, i)
+            for id_trilha, caixa in caixas_trilhas.items()
+            for i, nova in enumerate(caixas)
+        ),
+        reverse=True,
+    )
+    associacao: dict[int, int] = {}
+    usadas: set[int] = set()
+    for valor, id_trilha, i in pares:
+        if valor < LIMIAR_IOU:
+            break
+        if id_trilha not in associacao and i not in usadas:
+            associacao[id_trilha] = i
+            usadas.add(i)
+    for id_trilha, caixa in caixas_trilhas.items():
+        if id_trilha in associacao:
+            continue
+        livres = [(_distancia_centros(caixa, caixas[i]), i) for i in range(len(caixas)) if i not in usadas]
+        if livres:
+            distancia, i = min(livres)
+            if distancia <= DISTANCIA_CENTRO * max(caixa[2], caixa[3]):
+                associacao[id_trilha] = i
+                usadas.add(i)
+    return associacao
+
+
+@dataclass
+class Trilha:
+    """Uma pessoa acompanhada: id, estado da captura e caixa do último quadro em que foi vista."""
+
+    id: int
+    captura: HaarCascadeBlobCapture
+    caixa: Caixa
+    perdidos: int = 0
+    # Caixa no quadro atual (None se não foi achada nele)
+    caixa_atual: Optional[Caixa] = None
+
+
+class CapturaMultiRosto:
+    """
+    process(quadro, threshold_esq, threshold_dir) -> (quadro, olho_esq, olho_dir, atencao_ok, pessoas).
+    Os quatro primeiros itens são os da pessoa principal (maior rosto), como na captura de uma pessoa;
+    `pessoas` é {id da trilha: ResultadoQuadro}. ultimo_resultado é o da pessoa principal.
+    """
+
+    def __init__(
+        self,
+        intervalo_varredura: int = 10,
+        maximo_perdidos: int = MAXIMO_PERDIDOS,
+        desenhar_trilhas: bool = True,
+        **opcoes,
+    ):
+        """opcoes: repassadas à HaarCascadeBlobCapture de cada trilha (escala_varredura, motor_pupila...)."""
+        self.intervalo_varredura = intervalo_varredura
+        self.maximo_perdidos = maximo_perdidos
+        self.desenhar_trilhas = desenhar_trilhas
+        self._opcoes = opcoes
+        self._qualidade: Optional[tuple] = None
+        self._varredor = HaarCascadeBlobCapture(**opcoes)
+        self.limiar_automatico = self._varredor.limiar_automatico
+        self.trilhas: dict[int, Trilha] = {}
+        self._proximo_id = 0
+        self._quadros_desde_varredura = 0
+        self._varrer = True
+        self.ultimo_resultado = ResultadoQuadro()
+        self.ultimos_resultados: dict[int, ResultadoQuadro] = {}
+        self.metricas = None
+
+    def ajustar_qualidade(
+        self, reducao: float, fator_escala: Optional[float] = None, vizinhos_minimos: Optional[int] = None
+    ):
+        """Aplica o ajuste do governador de qualidade à varredura e a todas as trilhas (atuais e novas)."""
+        self._qualidade = (reducao, fator_escala, vizinhos_minimos)
+        for captura in [self._varredor] + [trilha.captura for trilha in self.trilhas.values()]:
+            captura.ajustar_qualidade(*self._qualidade)
+
+    def _nova_trilha(self, caixa: Caixa) -> Trilha:
+        trilha = Trilha(self._proximo_id, HaarCascadeBlobCapture(**self._opcoes), caixa)
+        if self._qualidade is not None:
+            trilha.captura.ajustar_qualidade(*self._qualidade)
+        self.trilhas[trilha.id] = trilha
+        self._proximo_id += 1
+        return trilha
+
+    def _localizar_varrendo(self, frame: numpy.ndarray):
+        caixas = self._varredor.varrer_rostos(frame)
+        associacao = associar({t.id: t.caixa for t in self.trilhas.values()}, caixas)
+        for trilha in list(self.trilhas.values()):
+            i = associacao.get(trilha.id)
+            trilha.caixa_atual = caixas[i] if i is not None else None
+        for i in set(range(len(caixas))) - set(associacao.values()):
+            self._nova_trilha(caixas[i]).caixa_atual = caixas[i]
+
+    def _localizar_nas_janelas(self, frame: numpy.ndarray):
+        # Trilhas mais antigas primeiro: se duas janelas acharem o mesmo rosto, a mais nova perde
+        encontradas: list[Caixa] = []
+        for trilha in sorted(self.trilhas.values(), key=lambda t: t.id):
+            trilha.captura.caixa_rosto_anterior = trilha.caixa
+            caixa = trilha.captura.buscar_na_janela(frame)
+            if caixa is not None and any(iou(caixa, outra) >= LIMIAR_DUPLICADA for outra in encontradas):
+                caixa = None
+            trilha.caixa_atual = caixa
+            if caixa is None:
+                # Alguém saiu da janela: a próxima varredura completa reassocia
+                self._varrer = True
+            else:
+                encontradas.append(caixa)
+
+    def localizar_rostos(self, frame: numpy.ndarray):
+        """Atualiza caixa_atual de cada trilha (None se não achada), cria e descarta trilhas."""
+        if self._varrer or not self.trilhas or self._quadros_desde_varredura >= self.intervalo_varredura:
+            self._localizar_varrendo(frame)
+            self._quadros_desde_varredura = 0
+            self._varrer = False
+        else:
+            self._localizar_nas_janelas(frame)
+            self._quadros_desde_varredura += 1
+        for trilha in list(self.trilhas.values()):
+            if trilha.caixa_atual is None:
+                trilha.perdidos += 1
+                if trilha.perdidos > self.maximo_perdidos:
+                    del self.trilhas[trilha.id]
+            else:
+                trilha.caixa, trilha.perdidos = trilha.caixa_atual, 0
+
+    def _processar_trilha(
+        self, frame: numpy.ndarray, cinza: numpy.ndarray, trilha: Trilha, threshold_esq, threshold_dir
+    ):
+        captura = trilha.captura
+        captura.metricas = self.metricas
+        caixa = trilha.caixa_atual
+        rosto = None
+        if caixa is not None:
+            x, y, w, h = caixa
+            rosto = cinza[y : y + h, x : x + w]
+        try:
+            return captura.processar_rosto(frame, rosto, caixa, threshold_esq, threshold_dir)
+        except (cv2.error, ErroCV2) as e:
+            # O erro de uma pessoa não derruba o resultado das outras
+            return frame, None, None, captura.registrar_falha(frame, e, threshold_esq, threshold_dir)
+
+    def _desenhar_trilhas(self, frame: numpy.ndarray) -> numpy.ndarray:
+        """
+        Caixas e ids das trilhas visíveis numa cópia do quadro (buffer reaproveitado, vale até o próximo quadro):
+        o quadro recebido pode ser compartilhado com a fonte (imagem fixa, cache da pasta, barramento).
+        """
+        visiveis = [t for t in self.trilhas.values() if t.caixa_atual is not None]
+        if not self.desenhar_trilhas or not visiveis:
+            return frame
+        saida = self._varredor.buffers.obter("desenho_trilhas", frame.shape)
+        numpy.copyto(saida, frame)
+        for trilha in visiveis:
+            x, y, w, h = trilha.caixa_atual
+            cv2.rectangle(saida, (x, y), (x + w, y + h), COR_TRILHA, 2)
+            cv2.putText(saida, str(trilha.id), (x, y - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.8, COR_TRILHA, 2)
+        return saida
+
+    def process(self, frame: numpy.ndarray, threshold_esq, threshold_dir):
+        with medir(self.metricas, "process"):
+            # Um cinza por quadro, para a varredura, as janelas e os olhos de todas as trilhas
+            cinza = self._varredor.quadro_cinza(frame)
+            with medir(self.metricas, "rosto"):
+                self.localizar_rostos(cinza)
+            saidas = {
+                trilha.id: self._processar_trilha(frame, cinza, trilha, threshold_esq, threshold_dir)
+                for trilha in self.trilhas.values()
+            }
+            self.ultimos_resultados = {id_trilha: t.captura.ultimo_resultado for id_trilha, t in self.trilhas.items()}
+            frame = self._desenhar_trilhas(frame)
+            if not self.trilhas:
+                self.ultimo_resultado = ResultadoQuadro()
+                return frame, None, None, False, {}
+            # Pessoa principal: o maior rosto visível neste quadro; trilhas perdidas só contam se ninguém estiver visível
+            visiveis = [t for t in self.trilhas.values() if t.caixa_atual is not None] or list(self.trilhas.values())
+            principal = max(visiveis, key=lambda t: t.caixa[2] * t.caixa[3])
+            self.ultimo_resultado = self.ultimos_resultados[principal.id]
+            _, olho_esquerdo, olho_direito, atencao_ok = saidas[principal.id]
+            return frame, olho_esquerdo, olho_direito, atencao_ok, self.ultimos_resultados
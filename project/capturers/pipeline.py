@@ -0,0 +1,88 @@
+"""
+Execução em pipeline das etapas da captura Haar + blob, sobrepondo quadros consecutivos:
+- uma thread procura o rosto do quadro N+1 enquanto outra processa olhos e pupilas do quadro N;
+- dentro do quadro, o blob do olho direito roda em paralelo ao do esquerdo.
+Cada etapa tem uma única thread, então o estado dela (rastreamento do rosto, calibradores, histórico de atenção)
+continua sendo atualizado na ordem dos quadros e os resultados saem na mesma ordem e iguais aos do process
+sequencial. O custo é latência: process devolve o resultado de `profundidade` quadros atrás (None até encher).
+O OpenCV libera o GIL nas cascatas e no blob, então as threads rodam de fato em paralelo nos núcleos livres.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy
+from capturers.haar_blob import ErroCV2, HaarCascadeBlobCapture, ResultadoQuadro
+
+
+class CapturaPipeline:
+    """
+    Mesmo process(quadro, threshold_esq, threshold_dir) da captura, com as etapas sobrepostas.
+    Os quadros ficam com o pipeline até o resultado sair: a fonte não pode reaproveitar o buffer entregue.
+    Erros do OpenCV num quadro viram um resultado sem olhos e sem atenção, sem interromper os seguintes.
+    """
+
+    def __init__(self, captura: HaarCascadeBlobCapture, profundidade: int = 1, paralelo_olhos: bool = True):
+        if profundidade < 0:
+            raise ValueError("A profundidade não pode ser negativa")
+        self.captura = captura
+        self.profundidade = profundidade
+        # Até profundidade + 1 quadros em andamento, mais os olhos desenhados do resultado já entregue:
+        # cada buffer reaproveitado da captura precisa sobreviver a esse tanto de quadros
+        captura.buffers.voltas = max(captura.buffers.voltas, profundidade + 2)
+        self._rosto = ThreadPoolExecutor(1, thread_name_prefix="pipeline-rosto")
+        self._olhos = ThreadPoolExecutor(1, thread_name_prefix="pipeline-olhos")
+        self._ramos = ThreadPoolExecutor(1, thread_name_prefix="pipeline-olho-direito") if paralelo_olhos else None
+        self._pendentes: deque[Future] = deque()
+        self.ultimo_resultado = ResultadoQuadro()
+
+    def __getattr__(self, nome):
+        # Atributos da captura (metricas, limiar_automatico...) continuam acessíveis
+        return getattr(self.captura, nome)
+
+    @property
+    def em_andamento(self) -> int:
+        return len(self._pendentes)
+
+    def _etapa_olhos(self, frame: numpy.ndarray, futuro_rosto: Future, threshold_esq, threshold_dir, inicio: float):
+        captura = self.captura
+        try:
+            rosto, caixa = futuro_rosto.result()
+            saida = captura.processar_rosto(frame, rosto, caixa, threshold_esq, threshold_dir, self._ramos)
+        except (cv2.error, ErroCV2) as e:
+            saida = (frame, None, None, captura.registrar_falha(frame, e, threshold_esq, threshold_dir))
+        if captura.metricas is not None:
+            # Latência do quadro no pipeline, da entrada até sair da última etapa
+            captura.metricas.registrar("process", time.perf_counter() - inicio)
+        return saida, captura.ultimo_resultado
+
+    def enviar(self, frame: numpy.ndarray, threshold_esq, threshold_dir) -> Future:
+        """Coloca o quadro no pipeline; o Future resolve para ((quadro, olho_esq, olho_dir, atencao_ok), resultado)."""
+        inicio = time.perf_counter()
+        futuro_rosto = self._rosto.submit(self.captura.localizar_rosto, frame)
+        return self._olhos.submit(self._etapa_olhos, frame, futuro_rosto, threshold_esq, threshold_dir, inicio)
+
+    def _entregar(self, futuro: Future):
+        saida, self.ultimo_resultado = futuro.result()
+        return saida
+
+    def process(self, frame: numpy.ndarray, threshold_esq, threshold_dir):
+        """Resultado do quadro mais antigo em andamento, ou None enquanto houver até `profundidade` quadros nele."""
+        self._pendentes.append(self.enviar(frame, threshold_esq, threshold_dir))
+        if len(self._pendentes) <= self.profundidade:
+            return None
+        return self._entregar(self._pendentes.popleft())
+
+    def esvaziar(self):
+        """Gera os resultados dos quadros ainda em andamento, em ordem."""
+        while self._pendentes:
+            yield self._entregar(self._pendentes.popleft())
+
+    def fechar(self):
+        for _ in self.esvaziar():
+            pass
+        for executor in (self._rosto, self._olhos, self._ramos):
+            if executor is not None:
+                executor.shutdown()
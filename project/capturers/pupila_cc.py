@@ -0,0 +1,130 @@
+"""
+Detecção de pupila por componentes conexos (cv2.connectedComponentsWithStats).
+Alternativa mais rápida à cadeia SimpleBlobDetector: os dois olhos são montados lado a lado numa única imagem,
+pré-processados e rotulados de uma vez, e os componentes são filtrados por área, circularidade e inércia
+com operações vetorizadas do NumPy. Retorna keypoints no mesmo formato de rastrear_blob.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import cv2
+import numpy
+
+# Borda replicada em volta de cada olho no mosaico: cobre o alcance de blur + dilatação + erosão + mediana,
+# para que um olho não interfira no outro e a borda se comporte como no processamento individual
+BORDA = 8
+
+
+@dataclass(frozen=True)
+class ParametrosPupila:
+    """Filtros equivalentes aos de haar_blob._criar_blob (campos pupila_* de haar_blob.ConfiguracaoCaptura)."""
+
+    area_minima: float = 30
+    area_maxima: float = 1200
+    circularidade_minima: float = 0.5
+    inercia_minima: float = 0.4
+
+
+PARAMETROS_PADRAO = ParametrosPupila()
+
+
+def _montar_mosaico(olhos: Sequence[numpy.ndarray]) -> tuple[numpy.ndarray, list[tuple[int, int]]]:
+    """Coloca os olhos lado a lado, cada um com BORDA replicada; retorna o mosaico e o (x, y) de cada olho nele."""
+    altura = max(o.shape[0] for o in olhos) + 2 * BORDA
+    largura = sum(o.shape[1] + 2 * BORDA for o in olhos)
+    mosaico = numpy.empty((altura, largura), numpy.uint8)
+    origens = []
+    x = 0
+    for olho in olhos:
+        h, w = olho.shape[:2]
+        mosaico[:, x : x + w + 2 * BORDA] = cv2.copyMakeBorder(
+            olho, BORDA, altura - h - BORDA, BORDA, BORDA, cv2.BORDER_REPLICATE
+        )
+        origens.append((x + BORDA, BORDA))
+        x += w + 2 * BORDA
+    return mosaico, origens
+
+
+def _estatisticas(rotulos: numpy.ndarray, quantidade: int):
+    """Área (em pixels), centróide e semi-eixos da elipse equivalente de todos os componentes de uma vez."""
+    ys, xs = numpy.nonzero(rotulos)
+    ids = rotulos[ys, xs]
+    xs = xs.astype(numpy.float64)
+    ys = ys.astype(numpy.float64)
+    area = numpy.bincount(ids, minlength=quantidade)[1:].astype(numpy.float64)
+    area_segura = numpy.maximum(area, 1.0)
+    cx = numpy.bincount(ids, xs, quantidade)[1:] / area_segura
+    cy = numpy.bincount(ids, ys, quantidade)[1:] / area_segura
+    # Cada pixel é um quadrado unitário: soma 1/12 à variância em cada eixo
+    mu20 = numpy.bincount(ids, xs * xs, quantidade)[1:] / area_segura - cx * cx + 1.0 / 12.0
+    mu02 = numpy.bincount(ids, ys * ys, quantidade)[1:] / area_segura - cy * cy + 1.0 / 12.0
+    mu11 = numpy.bincount(ids, xs * ys, quantidade)[1:] / area_segura - cx * cy
+    meia_soma = (mu20 + mu02) / 2.0
+    raio = numpy.sqrt(((mu20 - mu02) / 2.0) ** 2 + mu11**2)
+    semi_eixo_maior = 2.0 * numpy.sqrt(numpy.maximum(meia_soma + raio, 0.0))
+    semi_eixo_menor = 2.0 * numpy.sqrt(numpy.maximum(meia_soma - raio, 0.0))
+    return area, cx, cy, semi_eixo_maior, semi_eixo_menor
+
+
+def detectar_pupilas(
+    olhos: Sequence[Optional[numpy.ndarray]],
+    limiares: Sequence[int],
+    tamanhos_anteriores: Sequence[float],
+    parametros: ParametrosPupila = PARAMETROS_PADRAO,
+) -> list[tuple]:
+    """
+    Detecta a pupila de cada recorte de olho (em cinza) numa única passada.
+    Para cada olho retorna () ou uma tupla com um cv2.KeyPoint (coordenadas do recorte); havendo mais de um
+    candidato, fica o de tamanho mais próximo do anterior, como em rastrear_blob.
+    """
+    validos = [i for i, olho in enumerate(olhos) if olho is not None and olho.size]
+    resultado: list[tuple] = [()] * len(olhos)
+    if not validos:
+        return resultado
+    mosaico, origens = _montar_mosaico([olhos[i] for i in validos])
+    cv2.GaussianBlur(mosaico, (3, 3), 0, dst=mosaico)
+    for i, (x, y) in zip(validos, origens):
+        bloco = mosaico[:, x - BORDA : x + olhos[i].shape[1] + BORDA]
+        # Invertido: pupila (escura) vira primeiro plano; dilatar/erodir aqui equivale a erodir/dilatar no original
+        cv2.threshold(bloco, limiares[i], 255, cv2.THRESH_BINARY_INV, dst=bloco)
+    mosaico = cv2.dilate(mosaico, None, iterations=2)
+    mosaico = cv2.erode(mosaico, None, iterations=4)
+    mosaico = cv2.medianBlur(mosaico, 5)
+
+    # Só o interior de cada olho conta; a borda replicada serviu apenas ao pré-processamento
+    mascara = numpy.zeros_like(mosaico)
+    for i, (x, y) in zip(validos, origens):
+        h, w = olhos[i].shape[:2]
+        mascara[y : y + h, x : x + w] = 255
+    cv2.bitwise_and(mosaico, mascara, dst=mosaico)
+
+    quantidade, rotulos, stats, _ = cv2.connectedComponentsWithStats(mosaico, connectivity=8)
+    if quantidade <= 1:
+        return resultado
+    area, cx, cy, eixo_maior, eixo_menor = _estatisticas(rotulos, quantidade)
+    largura_caixa = stats[1:, cv2.CC_STAT_WIDTH].astype(numpy.float64)
+    altura_caixa = stats[1:, cv2.CC_STAT_HEIGHT].astype(numpy.float64)
+    # O SimpleBlobDetector mede a pupila pelo contorno do "buraco" escuro, que passa pelo centro dos pixels
+    # claros vizinhos: meio pixel além da borda. As medidas abaixo aplicam essa mesma expansão.
+    area_contorno = area + numpy.pi * (largura_caixa + altura_caixa) / 4.0 + 1.0
+    # Circularidade aproximada: ocupação da elipse inscrita na caixa (1 para círculo/elipse, menor se irregular)
+    circularidade = area_contorno / (numpy.pi / 4.0 * (largura_caixa + 1.0) * (altura_caixa + 1.0))
+    inercia = ((eixo_menor + 0.5) / (eixo_maior + 0.5)) ** 2
+    aceitos = (
+        (area_contorno >= parametros.area_minima)
+        & (area_contorno <= parametros.area_maxima)
+        & (circularidade >= parametros.circularidade_minima)
+        & (inercia >= parametros.inercia_minima)
+    )
+    tamanho = 2.0 * numpy.sqrt(area / numpy.pi) + 1.0
+
+    for i, (x, y) in zip(validos, origens):
+        h, w = olhos[i].shape[:2]
+        do_olho = aceitos & (cx >= x) & (cx < x + w) & (cy >= y) & (cy < y + h)
+        candidatos = numpy.flatnonzero(do_olho)
+        if len(candidatos) == 0:
+            continue
+        escolhido = candidatos[numpy.argmin(numpy.abs(tamanho[candidatos] - tamanhos_anteriores[i]))]
+        resultado[i] = (cv2.KeyPoint(float(cx[escolhido] - x), float(cy[escolhido] - y), float(tamanho[escolhido])),)
+    return resultado
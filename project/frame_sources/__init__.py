@@ -1,12 +1,21 @@
 """
-Fontes de quadro: câmera, arquivo, pasta de imagens ou vídeo.
+Fontes de quadro: câmera, arquivo, pasta de imagens, vídeo, sessão gravada ou barramento em memória compartilhada.
+ThreadedFrameSource envolve qualquer uma delas para ler quadros em segundo plano; PublicadorBarramento publica
+qualquer uma delas para vários processos lerem com BarramentoFrameSource.
 Protocolo que toda fonte deve implementar: start(), next_frame(), stop().
 """
 from typing import Protocol
 
+from .barramento import FrameSource as BarramentoFrameSource
+from .barramento import PublicadorBarramento
 from .camera import FrameSource as CameraFrameSource
 from .file import FrameSource as FileFrameSource
 from .folder import FrameSource as FolderFrameSource
+from .sessao import FrameSource as SessaoFrameSource
+from .sessao import GravadorSessao
+from .threaded import FrameSource as ThreadedFrameSource
+from .threaded import QuadroCapturado
+from .video import FimDoVideo
 from .video import FrameSource as VideoFrameSource
 
 
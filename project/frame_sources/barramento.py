@@ -0,0 +1,371 @@
+"""
+Barramento de quadros em memória compartilhada: um processo abre a câmera (ou vídeo) e publica cada quadro
+num anel de `slots` posições em multiprocessing.shared_memory; qualquer número de processos (interface,
+gravador, análise sem interface) lê do anel sem decodificar de novo nem abrir o dispositivo.
+
+Layout do segmento: cabeçalho | tabela de slots (sequência e instante de cada slot) | slots de quadros.
+O publicador zera a sequência do slot, copia o quadro e só então grava a sequência nova no slot e no
+cabeçalho; o leitor confere a sequência do slot antes (e, ao copiar, depois) de usar o quadro.
+next_frame() entrega uma vista somente leitura do próprio slot (sem cópia), válida até o publicador dar a
+volta no anel (`slots` - 1 quadros depois); consumidores que desenham no quadro usam copiar=True.
+
+Publicador em linha de comando: python publicador.py 0 --nome eyetracker
+"""
+
+import logging
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy
+
+from .threaded import QuadroCapturado
+from .video import FimDoVideo
+
+logger = logging.getLogger(__name__)
+
+NOME_PADRAO = "eyetracker"
+SLOTS_PADRAO = 8
+MAGICA = b"EYEBUS01"
+CABECALHO_DTYPE = numpy.dtype(
+    [
+        ("magica", "S8"),
+        ("altura", "<u4"),
+        ("largura", "<u4"),
+        ("canais", "<u4"),
+        ("slots", "<u4"),
+        # Último quadro publicado (0 = nenhum ainda)
+        ("sequencia", "<u8"),
+        ("pid", "<u4"),
+        # 0 quando o publicador terminou
+        ("ativo", "<u4"),
+    ],
+    align=True,
+)
+SLOT_DTYPE = numpy.dtype([("sequencia", "<u8"), ("tempo", "<f8")])
+# Início da tabela de slots e alinhamento dos quadros
+ALINHAMENTO = 64
+# Intervalo (s) entre consultas do leitor enquanto espera um quadro novo
+INTERVALO_CONSULTA = 0.002
+# Sem quadro novo por este tempo (s), o leitor confere se o processo publicador ainda existe (morto por
+# SIGKILL, falta de memória etc. não chega a marcar `ativo` = 0)
+ESPERA_VERIFICAR_PUBLICADOR = 1.0
+
+
+def _alinhar(tamanho: int) -> int:
+    return (tamanho + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def _tamanho_quadro(altura: int, largura: int, canais: int) -> int:
+    return _alinhar(altura * largura * canais)
+
+
+def _deslocamento_quadros(slots: int) -> int:
+    return _alinhar(ALINHAMENTO + slots * SLOT_DTYPE.itemsize)
+
+
+def _processo_vivo(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # No Windows o sinal 0 não é uma consulta; sem como verificar, considera vivo
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, mas pertence a outro usuário
+        return True
+    return True
+
+
+def _publicador_vivo(cabecalho) -> bool:
+    return bool(cabecalho["ativo"]) and _processo_vivo(int(cabecalho["pid"]))
+
+
+class _Segmento:
+    """Vistas numpy do cabeçalho, da tabela de slots e dos quadros de um segmento de memória compartilhada."""
+
+    def __init__(self, memoria: shared_memory.SharedMemory):
+        self.memoria = memoria
+        self.cabecalho = numpy.ndarray((), CABECALHO_DTYPE, memoria.buf, 0)
+        if self.cabecalho["magica"].item() != MAGICA:
+            raise ValueError(f"Memória compartilhada {memoria.name!r} não é um barramento de quadros")
+        altura, largura, canais, slots = (int(self.cabecalho[c]) for c in ("altura", "largura", "canais", "slots"))
+        self.formato = (altura, largura, canais) if canais > 1 else (altura, largura)
+        self.slots = slots
+        tabela = numpy.ndarray((slots,), SLOT_DTYPE, memoria.buf, ALINHAMENTO)
+        self.sequencias, self.tempos = tabela["sequencia"], tabela["tempo"]
+        passo = _tamanho_quadro(altura, largura, canais)
+        inicio = _deslocamento_quadros(slots)
+        self.quadros = [numpy.ndarray(self.formato, numpy.uint8, memoria.buf, inicio + i * passo) for i in range(slots)]
+
+    def fechar(self):
+        self.cabecalho = self.sequencias = self.tempos = None
+        self.quadros = []
+        try:
+            self.memoria.close()
+        except BufferError:
+            # Algum consumidor ainda guarda uma vista de quadro; o mapeamento some com o processo
+            logger.debug("Barramento %s fechado com vistas de quadro ainda em uso", self.memoria.name)
+
+
+def quadro_ainda_valido(fonte) -> bool:
+    """
+    Para quem processa a vista do slot sem cópia: False se o publicador reescreveu o slot do último quadro
+    entregue enquanto ele era usado (o resultado deve ser descartado). Outras fontes são sempre válidas.
+    """
+    verificar = getattr(fonte, "entregue_valido", None)
+    return verificar is None or verificar()
+
+
+def _criar_segmento(nome: str, formato: tuple, slots: int) -> _Segmento:
+    altura, largura = formato[:2]
+    canais = formato[2] if len(formato) > 2 else 1
+    tamanho = _deslocamento_quadros(slots) + slots * _tamanho_quadro(altura, largura, canais)
+    try:
+        memoria = shared_memory.SharedMemory(nome, create=True, size=tamanho)
+    except FileExistsError:
+        _remover_segmento_abandonado(nome)
+        memoria = shared_memory.SharedMemory(nome, create=True, size=tamanho)
+    cabecalho = numpy.ndarray((), CABECALHO_DTYPE, memoria.buf, 0)
+    cabecalho[()] = (MAGICA, altura, largura, canais, slots, 0, os.getpid(), 1)
+    numpy.ndarray((slots,), SLOT_DTYPE, memoria.buf, ALINHAMENTO)[:] = 0
+    del cabecalho
+    return _Segmento(memoria)
+
+
+def _remover_segmento_abandonado(nome: str):
+    """
+    Remove o segmento `nome` se for a sobra de um publicador que morreu sem limpar; se outro publicador ainda
+    estiver nele (ou o segmento não for um barramento), levanta FileExistsError sem mexer no segmento.
+    """
+    antiga = shared_memory.SharedMemory(nome)
+    cabecalho = numpy.ndarray((), CABECALHO_DTYPE, antiga.buf, 0)
+    barramento = cabecalho["magica"].item() == MAGICA
+    vivo = barramento and _publicador_vivo(cabecalho)
+    pid = int(cabecalho["pid"])
+    del cabecalho
+    antiga.close()
+    if barramento and not vivo:
+        antiga.unlink()
+        return
+    # O segmento continua de quem o criou: o resource_tracker deste processo não deve apagá-lo na saída
+    resource_tracker.unregister(antiga._name, "shared_memory")
+    if barramento:
+        raise FileExistsError(f"Barramento {nome!r} já está sendo publicado pelo processo {pid}; use outro --nome")
+    raise FileExistsError(f"Memória compartilhada {nome!r} já existe e não é um barramento de quadros")
+
+
+def _anexar_segmento(nome: str) -> _Segmento:
+    try:
+        memoria = shared_memory.SharedMemory(nome, track=False)
+    except TypeError:
+        # Python < 3.13: sem track, o resource_tracker deste processo apagaria o segmento ao sair
+        memoria = shared_memory.SharedMemory(nome)
+        resource_tracker.unregister(memoria._name, "shared_memory")
+    return _Segmento(memoria)
+
+
+class PublicadorBarramento:
+    """
+    Lê uma fonte de quadros numa thread e publica cada quadro no anel. O formato do anel vem do primeiro
+    quadro; quadros de outro tamanho são recusados.
+    """
+
+    def __init__(self, fonte, nome: str = NOME_PADRAO, slots: int = SLOTS_PADRAO, fps_maximo: Optional[float] = None):
+        if slots < 2:
+            raise ValueError("O barramento precisa de pelo menos 2 slots")
+        self.fonte = fonte
+        self.nome = nome
+        self.slots = slots
+        self.intervalo_minimo = 1.0 / fps_maximo if fps_maximo else 0.0
+        self.sequencia = 0
+        self._segmento: Optional[_Segmento] = None
+        self._thread: Optional[threading.Thread] = None
+        self._rodando = False
+        self.erro: Optional[BaseException] = None
+
+    def start(self):
+        if self._rodando:
+            return
+        self.fonte.start()
+        if not self.intervalo_minimo and getattr(self.fonte, "fps", 0):
+            # Vídeo decodifica mais rápido que o tempo real; sem limite explícito, publica no ritmo do arquivo
+            self.intervalo_minimo = 1.0 / self.fonte.fps
+        quadro = self.fonte.next_frame()
+        try:
+            self._segmento = _criar_segmento(self.nome, quadro.shape, self.slots)
+        except FileExistsError:
+            self.fonte.stop()
+            raise
+        self.publicar(quadro)
+        self._rodando = True
+        self._thread = threading.Thread(target=self._publicar_continuamente, name="barramento", daemon=True)
+        self._thread.start()
+        logger.info("Barramento %s: %s, %d slots", self.nome, "x".join(map(str, quadro.shape)), self.slots)
+
+    def publicar(self, quadro: numpy.ndarray):
+        """Copia o quadro para o próximo slot do anel (a única cópia, feita uma vez para todos os leitores)."""
+        segmento = self._segmento
+        if quadro.shape != segmento.formato:
+            raise ValueError(f"Quadro {quadro.shape} diferente do formato do barramento {segmento.formato}")
+        sequencia = self.sequencia + 1
+        slot = sequencia % segmento.slots
+        segmento.sequencias[slot] = 0
+        numpy.copyto(segmento.quadros[slot], quadro)
+        segmento.tempos[slot] = time.monotonic()
+        segmento.sequencias[slot] = sequencia
+        segmento.cabecalho["sequencia"] = sequencia
+        self.sequencia = sequencia
+
+    def _publicar_continuamente(self):
+        proxima_leitura = time.monotonic()
+        while self._rodando:
+            if self.intervalo_minimo:
+                atraso = proxima_leitura - time.monotonic()
+                if atraso > 0:
+                    time.sleep(atraso)
+                proxima_leitura = max(proxima_leitura + self.intervalo_minimo, time.monotonic())
+            try:
+                quadro = self.fonte.next_frame()
+                if quadro is not None:
+                    self.publicar(quadro)
+            except Exception as e:
+                # Fim do vídeo ou falha da câmera: os leitores recebem FimDoVideo
+                self.erro = e
+                self._rodando = False
+                self._segmento.cabecalho["ativo"] = 0
+                logger.info("Barramento %s encerrado: %s", self.nome, e)
+                return
+
+    @property
+    def rodando(self) -> bool:
+        return self._rodando
+
+    def stop(self):
+        if self._segmento is None:
+            return
+        self._rodando = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.fonte.stop()
+        self._segmento.cabecalho["ativo"] = 0
+        memoria = self._segmento.memoria
+        self._segmento.fechar()
+        self._segmento = None
+        memoria.unlink()
+
+
+class FrameSource:
+    """
+    Lê quadros de um barramento publicado por PublicadorBarramento (em outro processo).
+    next_frame() entrega sempre o quadro mais novo, ou None se nenhum chegou em `espera_novo_quadro`;
+    quadros que o leitor nunca viu contam como descartados. Com o publicador encerrado (ou o processo dele
+    morto), levanta FimDoVideo.
+    """
+
+    def __init__(
+        self,
+        nome: str = NOME_PADRAO,
+        copiar: bool = False,
+        espera_novo_quadro: Optional[float] = 0.05,
+        espera_publicador: float = 5.0,
+    ):
+        """
+        copiar: entrega uma cópia própria em vez da vista somente leitura do slot (para quem desenha no quadro).
+        espera_publicador: segundos aguardando o barramento aparecer em start().
+        """
+        self.nome = nome
+        self.copiar = copiar
+        self.espera_novo_quadro = espera_novo_quadro
+        self.espera_publicador = espera_publicador
+        self._segmento: Optional[_Segmento] = None
+        self._ultima_entregue = 0
+        self._ultima_chegada = 0.0
+        self.quadros_descartados = 0
+
+    def start(self):
+        if self._segmento is not None:
+            return
+        limite = time.monotonic() + self.espera_publicador
+        while True:
+            try:
+                self._segmento = _anexar_segmento(self.nome)
+                break
+            except FileNotFoundError:
+                if time.monotonic() >= limite:
+                    raise SystemError(
+                        f"Barramento {self.nome!r} não encontrado. Inicie o publicador: "
+                        f"python publicador.py 0 --nome {self.nome}"
+                    )
+                time.sleep(0.1)
+        # Começa do quadro atual: o que foi publicado antes não conta como descartado
+        self._ultima_entregue = max(int(self._segmento.cabecalho["sequencia"]) - 1, 0)
+        self._ultima_chegada = time.monotonic()
+
+    def ultimo(self, timeout: Optional[float] = None) -> Optional[QuadroCapturado]:
+        """Quadro mais novo ainda não entregue, aguardando até `timeout` segundos; None se nada novo chegou."""
+        assert self._segmento is not None, "Conecte ao barramento com start() antes de next_frame()"
+        segmento = self._segmento
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequencia = int(segmento.cabecalho["sequencia"])
+            if sequencia > self._ultima_entregue:
+                item = self._ler_slot(sequencia)
+                if item is not None:
+                    self.quadros_descartados += sequencia - self._ultima_entregue - 1
+                    self._ultima_entregue = sequencia
+                    self._ultima_chegada = time.monotonic()
+                    return item
+                # O publicador passou por cima do slot enquanto líamos: tenta o mais novo
+                continue
+            if not segmento.cabecalho["ativo"]:
+                raise FimDoVideo(f"Publicador do barramento {self.nome!r} encerrado")
+            agora = time.monotonic()
+            if agora - self._ultima_chegada >= ESPERA_VERIFICAR_PUBLICADOR:
+                if not _processo_vivo(int(segmento.cabecalho["pid"])):
+                    raise FimDoVideo(f"Processo publicador do barramento {self.nome!r} não existe mais")
+                # Vivo, só sem quadros (câmera lenta, pausa): confere de novo depois de outra espera
+                self._ultima_chegada = agora
+            if limite is not None and agora >= limite:
+                return None
+            time.sleep(INTERVALO_CONSULTA)
+
+    def _ler_slot(self, sequencia: int) -> Optional[QuadroCapturado]:
+        segmento = self._segmento
+        slot = sequencia % segmento.slots
+        if segmento.sequencias[slot] != sequencia:
+            return None
+        tempo = float(segmento.tempos[slot])
+        quadro = segmento.quadros[slot]
+        if self.copiar:
+            quadro = quadro.copy()
+            if segmento.sequencias[slot] != sequencia:
+                return None
+        else:
+            quadro = quadro.view()
+            quadro.flags.writeable = False
+        return QuadroCapturado(quadro, tempo, sequencia)
+
+    def valido(self, sequencia: int) -> bool:
+        """True enquanto o slot do quadro `sequencia` não foi reescrito (vale para as vistas sem cópia)."""
+        segmento = self._segmento
+        return segmento is not None and segmento.sequencias[sequencia % segmento.slots] == sequencia
+
+    def entregue_valido(self) -> bool:
+        """True se o último quadro entregue ainda não foi reescrito pelo publicador (sempre, com copiar)."""
+        return self.copiar or self.valido(self._ultima_entregue)
+
+    def next_frame(self):
+        item = self.ultimo(timeout=self.espera_novo_quadro)
+        return None if item is None else item.quadro
+
+    def stop(self):
+        if self._segmento is not None:
+            self._segmento.fechar()
+            self._segmento = None
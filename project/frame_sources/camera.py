@@ -1,8 +1,12 @@
 """
 Fonte de quadros a partir de câmera (USB, integrada, DroidCam, etc.).
+Sem índice informado, o dispositivo é escolhido por frame_sources.descoberta (cache + sondagem em paralelo).
 """
+
 import cv2
 
+from .descoberta import DispositivoCamera, descobrir
+
 
 class FrameSource:
     """Captura quadros de uma câmera (dispositivo de vídeo)."""
@@ -11,6 +15,7 @@ class FrameSource:
         self.camera_rodando = False
         self.id_camera = cam_id  # índice do dispositivo (0, 1, 2...)
         self.capture = None
+        self.dispositivo: DispositivoCamera = None
 
     def _camera_ok(self):
         return self.capture is not None and self.capture.read()[0]
@@ -25,16 +30,14 @@ class FrameSource:
                     raise SystemError(f"Câmera id={self.id_camera} não disponível.")
                 self.camera_rodando = True
                 return
-            for indice in range(0, 5000, 100):
-                self.capture = cv2.VideoCapture(indice)
-                if self._camera_ok():
-                    self.camera_rodando = True
-                    return
-                self.capture.release()
-                self.capture = None
-            raise SystemError(
-                "Nenhuma câmera encontrada. Use -fs arquivo ou -fs pasta para testar com imagem ou pasta."
-            )
+            encontrado = descobrir()
+            if encontrado is None:
+                raise SystemError(
+                    "Nenhuma câmera encontrada. Use -fs arquivo ou -fs pasta para testar com imagem ou pasta."
+                )
+            self.dispositivo, self.capture = encontrado
+            self.id_camera = self.dispositivo.dispositivo
+            self.camera_rodando = True
 
     def stop(self):
         if self.camera_rodando:
@@ -44,6 +47,10 @@ class FrameSource:
     def next_frame(self):
         assert self.camera_rodando, "Inicie a câmera com start() antes de next_frame()"
         sucesso, quadro = self.capture.read()
+        if not sucesso and isinstance(self.id_camera, str):
+            # Câmera falsa (arquivo de vídeo): recomeça do início, como um dispositivo que não acaba
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            sucesso, quadro = self.capture.read()
         if not sucesso:
             raise SystemError("Falha ao capturar quadro")
         return quadro
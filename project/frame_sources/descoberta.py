@@ -0,0 +1,166 @@
+"""
+Descoberta de câmera sem índice informado.
+Os candidatos prováveis são listados primeiro (/dev/video* no Linux; poucos índices nos demais sistemas) e
+sondados em paralelo, cada um com tempo limite. O último dispositivo que funcionou, com a resolução e o FPS
+negociados, fica num pequeno arquivo JSON e é tentado antes de tudo na próxima execução.
+Com CAMERA_FALSA apontando para um arquivo de vídeo, ele entra como dispositivo (testes sem hardware).
+"""
+
+import json
+import logging
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import monotonic
+from typing import Optional, Union
+
+import cv2
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Índices tentados quando o sistema não lista os dispositivos
+INDICES_PADRAO = tuple(range(0, 8))
+TEMPO_LIMITE_SONDA = 3.0
+MAXIMO_SONDAS_PARALELAS = 8
+
+
+@dataclass(frozen=True)
+class DispositivoCamera:
+    """Dispositivo que entregou um quadro: índice (ou caminho, no caso da câmera falsa) e modo negociado."""
+
+    dispositivo: Union[int, str]
+    largura: int
+    altura: int
+    fps: float
+
+
+def listar_candidatos() -> list[Union[int, str]]:
+    """Dispositivos prováveis, em ordem de preferência."""
+    candidatos: list[Union[int, str]] = []
+    if settings.CAMERA_FALSA:
+        candidatos.append(str(settings.CAMERA_FALSA))
+    if sys.platform.startswith("linux"):
+        indices = []
+        for caminho in Path("/dev").glob("video*"):
+            encontrado = re.fullmatch(r"video(\d+)", caminho.name)
+            if encontrado:
+                indices.append(int(encontrado.group(1)))
+        candidatos.extend(sorted(indices))
+    else:
+        candidatos.extend(INDICES_PADRAO)
+    return candidatos
+
+
+def _abrir(dispositivo: Union[int, str], modo: Optional[DispositivoCamera] = None) -> Optional[cv2.VideoCapture]:
+    """Abre o dispositivo (pedindo o modo em cache, se houver) e confirma que entrega um quadro."""
+    captura = cv2.VideoCapture(dispositivo)
+    if captura.isOpened() and modo is not None and not isinstance(dispositivo, str):
+        captura.set(cv2.CAP_PROP_FRAME_WIDTH, modo.largura)
+        captura.set(cv2.CAP_PROP_FRAME_HEIGHT, modo.altura)
+        if modo.fps > 0:
+            captura.set(cv2.CAP_PROP_FPS, modo.fps)
+    if captura.isOpened():
+        sucesso, quadro = captura.read()
+        if sucesso and quadro is not None and quadro.size:
+            return captura
+    captura.release()
+    return None
+
+
+def _descrever(dispositivo: Union[int, str], captura: cv2.VideoCapture) -> DispositivoCamera:
+    return DispositivoCamera(
+        dispositivo=dispositivo,
+        largura=int(captura.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        altura=int(captura.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        fps=float(captura.get(cv2.CAP_PROP_FPS)),
+    )
+
+
+def ler_cache(caminho: Path) -> Optional[DispositivoCamera]:
+    try:
+        return DispositivoCamera(**json.loads(caminho.read_text()))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def gravar_cache(caminho: Path, dispositivo: DispositivoCamera):
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_text(json.dumps(asdict(dispositivo)))
+    except OSError as erro:
+        logger.warning("Não foi possível gravar o cache de câmera %s: %s", caminho, erro)
+
+
+def _liberar_quando_pronto(futuro):
+    # Sonda que terminou depois do tempo limite ou que perdeu para outra: solta o dispositivo
+    if not futuro.cancelled() and futuro.exception() is None and futuro.result() is not None:
+        futuro.result().release()
+
+
+def sondar(
+    candidatos: list[Union[int, str]],
+    tempo_limite: float = TEMPO_LIMITE_SONDA,
+    modos: Optional[dict] = None,
+) -> Optional[tuple[DispositivoCamera, cv2.VideoCapture]]:
+    """
+    Sonda os candidatos em paralelo e retorna o primeiro da lista (ordem de preferência) que entregou um quadro,
+    já aberto. Não espera os de menor preferência se um melhor já respondeu; sondas travadas são abandonadas.
+    modos: modo a pedir a cada dispositivo (DispositivoCamera em cache), por dispositivo.
+    """
+    if not candidatos:
+        return None
+    executor = ThreadPoolExecutor(max_workers=min(len(candidatos), MAXIMO_SONDAS_PARALELAS), thread_name_prefix="sonda")
+    modos = modos or {}
+    futuros = [executor.submit(_abrir, candidato, modos.get(candidato)) for candidato in candidatos]
+    prazo = monotonic() + tempo_limite
+    escolhido = None
+    try:
+        pendentes = set(futuros)
+        while pendentes:
+            _, pendentes = wait(pendentes, timeout=max(prazo - monotonic(), 0), return_when=FIRST_COMPLETED)
+            vencido = monotonic() >= prazo
+            # O mais preferido que já respondeu vence assim que nenhum anterior a ele estiver pendente;
+            # esgotado o prazo, as sondas travadas são ignoradas e vence o mais preferido entre as que responderam
+            for indice, futuro in enumerate(futuros):
+                if futuro in pendentes:
+                    if vencido:
+                        continue
+                    break
+                if futuro.exception() is None and futuro.result() is not None:
+                    escolhido = indice
+                    break
+            if escolhido is not None or vencido:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    for indice, futuro in enumerate(futuros):
+        if indice != escolhido:
+            futuro.add_done_callback(_liberar_quando_pronto)
+    if escolhido is None:
+        return None
+    captura = futuros[escolhido].result()
+    return _descrever(candidatos[escolhido], captura), captura
+
+
+def descobrir(
+    caminho_cache: Optional[Path] = None, tempo_limite: float = TEMPO_LIMITE_SONDA
+) -> Optional[tuple[DispositivoCamera, cv2.VideoCapture]]:
+    """Tenta o dispositivo em cache; se não responder, sonda os candidatos e atualiza o cache."""
+    caminho_cache = settings.CAMERA_CACHE if caminho_cache is None else caminho_cache
+    em_cache = ler_cache(caminho_cache)
+    if em_cache is not None and isinstance(em_cache.dispositivo, str) and em_cache.dispositivo != settings.CAMERA_FALSA:
+        em_cache = None  # câmera falsa de outra execução
+    if em_cache is not None:
+        # Com o mesmo tempo limite das outras sondas: um dispositivo travado não segura a inicialização
+        encontrado = sondar([em_cache.dispositivo], tempo_limite, {em_cache.dispositivo: em_cache})
+        if encontrado is not None:
+            return encontrado
+        logger.info("Câmera em cache (%s) não respondeu; procurando de novo.", em_cache.dispositivo)
+    candidatos = [c for c in listar_candidatos() if em_cache is None or c != em_cache.dispositivo]
+    encontrado = sondar(candidatos, tempo_limite)
+    if encontrado is not None:
+        gravar_cache(caminho_cache, encontrado[0])
+    return encontrado
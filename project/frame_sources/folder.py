@@ -1,31 +1,112 @@
 """
-Fonte de quadros a partir de uma pasta de imagens (.png).
+Fonte de quadros a partir de uma pasta de imagens (.png, .jpg, .bmp).
+Os arquivos são percorridos em ordem natural (quadro2 antes de quadro10), decodificados com antecedência
+por um pequeno pool de threads (cv2.imread libera o GIL) e mantidos num cache LRU limitado por memória,
+para que repetir a pasta em loop não decodifique tudo de novo.
 """
+
+import re
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 import cv2
+import numpy
 from settings import settings
 
+EXTENSOES = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def chave_natural(caminho: Path):
+    """Chave de ordenação que compara trechos numéricos do nome como números."""
+    return [int(parte) if parte.isdigit() else parte.lower() for parte in re.split(r"(\d+)", caminho.name)]
+
+
+def listar_imagens(pasta: Path) -> list[Path]:
+    """Imagens suportadas da pasta, em ordem natural."""
+    return sorted((p for p in pasta.iterdir() if p.suffix.lower() in EXTENSOES and p.is_file()), key=chave_natural)
+
 
 class FrameSource:
-    """Percorre arquivos .png de uma pasta, quadro a quadro, como um vídeo."""
+    """Percorre as imagens de uma pasta, quadro a quadro, como um vídeo (volta ao início no fim)."""
 
-    def __init__(self, local: Path = settings.DEBUG_DUMP_LOCATION):
+    def __init__(
+        self,
+        local: Path = settings.DEBUG_DUMP_LOCATION,
+        arquivos: Optional[list[Path]] = None,
+        antecipacao: int = 4,
+        trabalhadores: int = 2,
+        memoria_max_mb: float = 256,
+    ):
+        """
+        arquivos: lista explícita de imagens (ex.: um trecho da pasta); por padrão, todas as imagens de `local`.
+        antecipacao: quantos quadros à frente ficam sendo decodificados.
+        memoria_max_mb: limite do cache de quadros decodificados (os menos usados saem primeiro).
+        Os quadros do cache são compartilhados entre voltas: quem consome não deve alterá-los no lugar.
+        """
         self.local = local
+        self.arquivos = arquivos
+        self.antecipacao = antecipacao
+        self.trabalhadores = trabalhadores
+        self.memoria_max = int(memoria_max_mb * 1024 * 1024)
         self.lista_arquivos = None
         self.indice = 0
+        self._cache: OrderedDict[int, numpy.ndarray] = OrderedDict()
+        self._bytes_cache = 0
+        self._pendentes: dict[int, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
 
     def start(self):
-        self.lista_arquivos = list(self.local.glob("*.png"))
+        self.lista_arquivos = list(self.arquivos) if self.arquivos is not None else listar_imagens(self.local)
         if not self.lista_arquivos:
-            raise FileNotFoundError(f"Pasta vazia ou sem .png: {self.local}")
+            raise FileNotFoundError(f"Pasta vazia ou sem imagens ({', '.join(EXTENSOES)}): {self.local}")
+        if self.antecipacao > 0 and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix="leitura-pasta")
+
+    def _decodificar(self, indice: int) -> Optional[numpy.ndarray]:
+        return cv2.imread(str(self.lista_arquivos[indice]))
+
+    def _guardar(self, indice: int, img: Optional[numpy.ndarray]):
+        if img is None or img.nbytes > self.memoria_max:
+            return
+        self._cache[indice] = img
+        self._bytes_cache += img.nbytes
+        while self._bytes_cache > self.memoria_max:
+            _, antiga = self._cache.popitem(last=False)
+            self._bytes_cache -= antiga.nbytes
+
+    def _obter(self, indice: int) -> Optional[numpy.ndarray]:
+        img = self._cache.get(indice)
+        if img is not None:
+            self._cache.move_to_end(indice)
+            return img
+        pendente = self._pendentes.pop(indice, None)
+        img = pendente.result() if pendente is not None else self._decodificar(indice)
+        self._guardar(indice, img)
+        return img
+
+    def _antecipar(self, indice: int):
+        if self._executor is None:
+            return
+        total = len(self.lista_arquivos)
+        for passo in range(1, min(self.antecipacao, total - 1) + 1):
+            proximo = (indice + passo) % total
+            if proximo not in self._cache and proximo not in self._pendentes:
+                self._pendentes[proximo] = self._executor.submit(self._decodificar, proximo)
 
     def next_frame(self):
         if self.indice >= len(self.lista_arquivos):
             self.indice = 0
-        img = cv2.imread(str(self.lista_arquivos[self.indice]))
+        img = self._obter(self.indice)
+        self._antecipar(self.indice)
         self.indice += 1
         return img
 
     def stop(self):
-        ...
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._pendentes.clear()
+        self._cache.clear()
+        self._bytes_cache = 0
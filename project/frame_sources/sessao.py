@@ -0,0 +1,239 @@
+"""
+Gravação e reprodução de sessões (quadros brutos em arquivos mapeados em memória).
+Uma sessão é uma pasta com:
+- sessao.json: metadados (versão, início, tamanho dos pedaços);
+- quadros_NNNNN.bin: pedaços com os bytes dos quadros, um após o outro, escritos via mmap;
+- indice.bin: um registro INDICE_DTYPE por quadro (tempo, forma, pedaço, deslocamento, thresholds),
+  acrescentado a cada quadro, legível mesmo se a gravação for interrompida;
+- resultados.jsonl (opcional): o ResultadoQuadro de cada quadro processado.
+A reprodução entrega os quadros direto do mmap, sem cópia, no ritmo original ou o mais rápido possível.
+"""
+
+import json
+import mmap
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+import numpy
+from .video import FimDoVideo
+
+ARQUIVO_META = "sessao.json"
+ARQUIVO_INDICE = "indice.bin"
+ARQUIVO_RESULTADOS = "resultados.jsonl"
+VERSAO = 1
+TAMANHO_PEDACO_MB = 256
+SEM_LIMIAR = -1
+
+INDICE_DTYPE = numpy.dtype(
+    [
+        ("tempo", "<f8"),  # segundos desde o início da gravação
+        ("pedaco", "<u4"),
+        ("deslocamento", "<u8"),
+        ("altura", "<u4"),
+        ("largura", "<u4"),
+        ("canais", "<u2"),
+        ("limiar_esq", "<i2"),
+        ("limiar_dir", "<i2"),
+    ]
+)
+
+
+def _nome_pedaco(numero: int) -> str:
+    return f"quadros_{numero:05d}.bin"
+
+
+def eh_sessao(local: Path) -> bool:
+    return (Path(local) / ARQUIVO_META).is_file()
+
+
+def ler_indice(local: Path) -> numpy.ndarray:
+    """Registros de todos os quadros gravados (um registro incompleto no fim é ignorado)."""
+    dados = (Path(local) / ARQUIVO_INDICE).read_bytes()
+    return numpy.frombuffer(dados[: len(dados) - len(dados) % INDICE_DTYPE.itemsize], INDICE_DTYPE)
+
+
+def ler_resultados(local: Path) -> dict[int, dict]:
+    """Resultados gravados, por número do quadro."""
+    caminho = Path(local) / ARQUIVO_RESULTADOS
+    if not caminho.exists():
+        return {}
+    with open(caminho, encoding="utf-8") as arquivo:
+        return {linha["quadro"]: linha for linha in map(json.loads, arquivo) if linha}
+
+
+class GravadorSessao:
+    """Acrescenta quadros (e, opcionalmente, resultados e thresholds) a uma sessão em disco."""
+
+    def __init__(self, local: Path, tamanho_pedaco_mb: float = TAMANHO_PEDACO_MB):
+        self.local = Path(local)
+        self.tamanho_pedaco = int(tamanho_pedaco_mb * 1024 * 1024)
+        self.quadros = 0
+        self._numero_pedaco = -1
+        self._arquivo_pedaco = None
+        self._mapa: Optional[mmap.mmap] = None
+        self._usado = 0
+        self._inicio: Optional[float] = None
+        self._indice = None
+        self._resultados = None
+
+    def start(self):
+        self.local.mkdir(parents=True, exist_ok=True)
+        if eh_sessao(self.local):
+            raise FileExistsError(f"Já existe uma sessão gravada em {self.local}")
+        (self.local / ARQUIVO_META).write_text(
+            json.dumps({"versao": VERSAO, "inicio": time.time(), "tamanho_pedaco": self.tamanho_pedaco})
+        )
+        # Sem buffer no índice (e por linha nos resultados): cada registro chega ao arquivo na hora, e uma gravação
+        # interrompida perde no máximo o quadro em andamento
+        self._indice = open(self.local / ARQUIVO_INDICE, "ab", buffering=0)
+        self._resultados = open(self.local / ARQUIVO_RESULTADOS, "a", buffering=1, encoding="utf-8")
+        self._inicio = time.monotonic()
+
+    def _fechar_pedaco(self):
+        if self._mapa is None:
+            return
+        self._mapa.close()
+        # O pedaço foi criado com o tamanho máximo; fica só com o que foi usado
+        self._arquivo_pedaco.truncate(self._usado)
+        self._arquivo_pedaco.close()
+        self._mapa = self._arquivo_pedaco = None
+
+    def _novo_pedaco(self, minimo: int):
+        self._fechar_pedaco()
+        self._numero_pedaco += 1
+        tamanho = max(self.tamanho_pedaco, minimo)
+        self._arquivo_pedaco = open(self.local / _nome_pedaco(self._numero_pedaco), "w+b")
+        self._arquivo_pedaco.truncate(tamanho)
+        self._mapa = mmap.mmap(self._arquivo_pedaco.fileno(), tamanho)
+        self._usado = 0
+
+    def gravar_quadro(self, quadro: numpy.ndarray, limiar_esq: Optional[int] = None, limiar_dir: Optional[int] = None):
+        """Grava o quadro (antes de ser anotado pelo process) e retorna o número dele na sessão."""
+        if self._mapa is None or self._usado + quadro.nbytes > len(self._mapa):
+            self._novo_pedaco(quadro.nbytes)
+        destino = numpy.frombuffer(self._mapa, numpy.uint8, quadro.nbytes, self._usado).reshape(quadro.shape)
+        numpy.copyto(destino, quadro)
+        registro = numpy.zeros(1, INDICE_DTYPE)
+        registro["tempo"] = time.monotonic() - self._inicio
+        registro["pedaco"] = self._numero_pedaco
+        registro["deslocamento"] = self._usado
+        registro["altura"], registro["largura"] = quadro.shape[:2]
+        registro["canais"] = 1 if quadro.ndim == 2 else quadro.shape[2]
+        registro["limiar_esq"] = SEM_LIMIAR if limiar_esq is None else limiar_esq
+        registro["limiar_dir"] = SEM_LIMIAR if limiar_dir is None else limiar_dir
+        self._indice.write(registro.tobytes())
+        self._usado += quadro.nbytes
+        self.quadros += 1
+        return self.quadros - 1
+
+    def gravar_resultado(self, numero: int, resultado):
+        """Guarda o ResultadoQuadro do quadro `numero` (dataclass) em resultados.jsonl."""
+        linha = {"quadro": numero, **asdict(resultado)}
+        # default: escalares do NumPy (ex.: thresholds calibrados) viram números do Python
+        self._resultados.write(json.dumps(linha, ensure_ascii=False, default=lambda valor: valor.item()) + "\n")
+
+    def stop(self):
+        self._fechar_pedaco()
+        for arquivo in (self._indice, self._resultados):
+            if arquivo is not None:
+                arquivo.close()
+        self._indice = self._resultados = None
+
+
+class FrameSource:
+    """
+    Reproduz uma sessão gravada. Os quadros são vistas do mmap em ACCESS_COPY: o consumidor pode desenhar sobre
+    eles (só as páginas alteradas são copiadas) sem mudar o arquivo; a cada volta o mmap é refeito, limpo.
+    tempo_real=True respeita os intervalos gravados; False entrega o mais rápido possível. No fim, volta ao início
+    se `repetir`, senão levanta FimDoVideo como a fonte de vídeo.
+    """
+
+    def __init__(
+        self,
+        local: Path,
+        tempo_real: bool = True,
+        repetir: bool = False,
+        inicio: int = 0,
+        fim: Optional[int] = None,
+    ):
+        self.local = Path(local)
+        self.tempo_real = tempo_real
+        self.repetir = repetir
+        self.inicio = inicio
+        self.fim = fim
+        self.indice: Optional[numpy.ndarray] = None
+        self.posicao = inicio
+        self.registro_atual = None
+        self._mapas: list[mmap.mmap] = []
+        self._arquivos = []
+        self._relogio_base: Optional[float] = None
+
+    def start(self):
+        if not eh_sessao(self.local):
+            raise FileNotFoundError(f"Sessão não encontrada: {self.local}")
+        self.indice = ler_indice(self.local)
+        if self.fim is None or self.fim > len(self.indice):
+            self.fim = len(self.indice)
+        if self.inicio >= self.fim:
+            raise FileNotFoundError(f"Sessão sem quadros no intervalo pedido: {self.local}")
+        pedacos = int(self.indice["pedaco"].max()) + 1
+        self._arquivos = [open(self.local / _nome_pedaco(numero), "rb") for numero in range(pedacos)]
+        self._mapear()
+        self.posicao = self.inicio
+        self._relogio_base = None
+
+    def _mapear(self):
+        self._fechar_mapas()
+        self._mapas = [mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_COPY) for arquivo in self._arquivos]
+
+    def _fechar_mapas(self):
+        # Vistas ainda vivas impedem fechar o mmap; nesse caso ele é liberado junto com elas
+        for mapa in self._mapas:
+            try:
+                mapa.close()
+            except BufferError:
+                pass
+        self._mapas = []
+
+    def quadro(self, numero: int) -> numpy.ndarray:
+        """Quadro `numero` da sessão, como vista do mmap."""
+        registro = self.indice[numero]
+        forma = (int(registro["altura"]), int(registro["largura"]))
+        if registro["canais"] != 1:
+            forma += (int(registro["canais"]),)
+        quantidade = int(numpy.prod(forma))
+        mapa = self._mapas[int(registro["pedaco"])]
+        return numpy.frombuffer(mapa, numpy.uint8, quantidade, int(registro["deslocamento"])).reshape(forma)
+
+    def limiares(self, numero: Optional[int] = None) -> tuple[Optional[int], Optional[int]]:
+        """Thresholds gravados com o quadro (o último entregue, por padrão); None se não foram gravados."""
+        registro = self.registro_atual if numero is None else self.indice[numero]
+        return tuple(None if int(v) == SEM_LIMIAR else int(v) for v in (registro["limiar_esq"], registro["limiar_dir"]))
+
+    def next_frame(self):
+        if self.posicao >= self.fim:
+            if not self.repetir:
+                raise FimDoVideo("Fim da sessão gravada")
+            self.posicao = self.inicio
+            self._relogio_base = None
+            # Mapeamento novo: os desenhos feitos sobre os quadros da volta anterior não reaparecem
+            self._mapear()
+        self.registro_atual = self.indice[self.posicao]
+        if self.tempo_real:
+            agora = time.monotonic()
+            if self._relogio_base is None:
+                self._relogio_base = agora - float(self.registro_atual["tempo"])
+            espera = self._relogio_base + float(self.registro_atual["tempo"]) - agora
+            if espera > 0:
+                time.sleep(espera)
+        quadro = self.quadro(self.posicao)
+        self.posicao += 1
+        return quadro
+
+    def stop(self):
+        self._fechar_mapas()
+        for arquivo in self._arquivos:
+            arquivo.close()
+        self._arquivos = []
@@ -0,0 +1,151 @@
+"""
+Fonte de quadros em thread: lê qualquer FrameSource em segundo plano e mantém os quadros mais recentes.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuadroCapturado:
+    """Quadro lido pela thread de captura, com instante (time.monotonic) e número de sequência."""
+
+    quadro: numpy.ndarray
+    timestamp: float
+    sequencia: int
+
+
+class FrameSource:
+    """
+    Envolve outra fonte e a lê continuamente numa thread, guardando os últimos `capacidade` quadros.
+    next_frame() entrega sempre o quadro mais novo; quadros que nunca chegaram ao consumidor contam como descartados.
+    """
+
+    def __init__(
+        self,
+        fonte,
+        capacidade: int = 4,
+        espera_novo_quadro: Optional[float] = 0.05,
+        fps_maximo: Optional[float] = None,
+    ):
+        if capacidade < 1:
+            raise ValueError("A capacidade do buffer deve ser pelo menos 1")
+        self.fonte = fonte
+        # Fontes que não bloqueiam (arquivo, pasta) girariam sem parar; fps_maximo limita a leitura
+        self.intervalo_minimo = 1.0 / fps_maximo if fps_maximo else 0.0
+        self.espera_novo_quadro = espera_novo_quadro
+        self._buffer: deque[QuadroCapturado] = deque(maxlen=capacidade)
+        self._condicao = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._rodando = False
+        # A thread ainda está dentro do laço (talvez presa num next_frame da fonte)
+        self._lendo = False
+        # stop() não esperou a thread: ela mesma para a fonte ao sair
+        self._parar_fonte_ao_sair = False
+        self._erro: Optional[BaseException] = None
+        self._sequencia = 0
+        self._ultima_entregue = 0
+        self.quadros_descartados = 0
+
+    def start(self):
+        if self._rodando:
+            return
+        if self._lendo:
+            raise RuntimeError("A leitura anterior ainda não terminou; a fonte não pode ser reaberta")
+        self.fonte.start()
+        self._erro = None
+        self._rodando = True
+        self._lendo = True
+        self._parar_fonte_ao_sair = False
+        self._thread = threading.Thread(target=self._capturar, name="captura-quadros", daemon=True)
+        self._thread.start()
+
+    def _capturar(self):
+        try:
+            self._ler()
+        finally:
+            with self._condicao:
+                self._lendo = False
+                parar_fonte = self._parar_fonte_ao_sair
+            if parar_fonte:
+                self.fonte.stop()
+
+    def _ler(self):
+        proxima_leitura = time.monotonic()
+        while self._rodando:
+            if self.intervalo_minimo:
+                atraso = proxima_leitura - time.monotonic()
+                if atraso > 0:
+                    time.sleep(atraso)
+                proxima_leitura = max(proxima_leitura + self.intervalo_minimo, time.monotonic())
+            try:
+                quadro = self.fonte.next_frame()
+            except Exception as e:
+                with self._condicao:
+                    self._erro = e
+                    self._rodando = False
+                    self._condicao.notify_all()
+                return
+            if quadro is None:
+                continue
+            with self._condicao:
+                self._sequencia += 1
+                self._buffer.append(QuadroCapturado(quadro, time.monotonic(), self._sequencia))
+                self._condicao.notify_all()
+
+    def ultimo(self, timeout: Optional[float] = None) -> Optional[QuadroCapturado]:
+        """
+        Retorna o quadro mais recente ainda não entregue, aguardando até `timeout` segundos por ele.
+        Retorna None se nada novo chegou; relança o erro da fonte quando ela para e o buffer já foi consumido.
+        """
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: self._sequencia > self._ultima_entregue or not self._rodando, timeout=timeout
+            )
+            # Buffer vazio com sequência adiantada: a fonte foi parada (stop limpa o buffer)
+            if self._sequencia <= self._ultima_entregue or not self._buffer:
+                if self._erro is not None:
+                    raise self._erro
+                return None
+            item = self._buffer[-1]
+            self.quadros_descartados += item.sequencia - self._ultima_entregue - 1
+            self._ultima_entregue = item.sequencia
+            return item
+
+    def recentes(self) -> list[QuadroCapturado]:
+        """Cópia do buffer circular, do quadro mais antigo para o mais novo."""
+        with self._condicao:
+            return list(self._buffer)
+
+    def next_frame(self):
+        """Quadro mais novo, ou None se nenhum quadro novo chegou dentro de espera_novo_quadro."""
+        item = self.ultimo(timeout=self.espera_novo_quadro)
+        return None if item is None else item.quadro
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._condicao:
+            self._rodando = False
+            self._condicao.notify_all()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        with self._condicao:
+            # Parar a fonte com a thread ainda lendo dela pode derrubar o backend (ex.: VideoCapture.release)
+            parar_fonte = not self._lendo
+            self._parar_fonte_ao_sair = not parar_fonte
+        if parar_fonte:
+            self.fonte.stop()
+        else:
+            logger.warning("A thread de captura não terminou em 2 s; a fonte será parada quando a leitura voltar")
+        with self._condicao:
+            self._buffer.clear()
+            self._ultima_entregue = self._sequencia
@@ -1,29 +1,134 @@
 """
 Fonte de quadros a partir de um arquivo de vídeo.
+Permite analisar só um a cada `passo` quadros (os pulados passam por grab(), sem decodificar a imagem),
+começar e terminar num quadro ou instante, repetir em loop e reduzir o quadro logo após a decodificação.
+A posição e o fps do arquivo ficam disponíveis para mapear cada resultado ao seu instante no vídeo.
 """
+
 from pathlib import Path
+from typing import Optional
 
 import cv2
+import numpy
 from settings import settings
 
 
+class FimDoVideo(SystemError):
+    """Fim do arquivo (ou do trecho pedido). Subclasse de SystemError, que a fonte levantava antes."""
+
+
 class FrameSource:
-    """Lê um vídeo quadro a quadro. Caminho padrão ou variável STATIC_VIDEO_PATH."""
+    """Lê um vídeo quadro a quadro. Caminho padrão: variável STATIC_VIDEO_PATH."""
 
-    def __init__(self, local: Path = settings.STATIC_FILE_PATH):
-        self.local = local
+    def __init__(
+        self,
+        local: Optional[Path] = None,
+        passo: int = 1,
+        inicio_quadro: Optional[int] = None,
+        inicio_s: Optional[float] = None,
+        fim_quadro: Optional[int] = None,
+        fim_s: Optional[float] = None,
+        repetir: bool = False,
+        escala: float = 1.0,
+    ):
+        """
+        passo: entrega um a cada `passo` quadros.
+        inicio_*/fim_*: trecho [inicio, fim) em número de quadro ou segundos (o número de quadro prevalece).
+        escala: fator de redução aplicado logo após a decodificação (1.0 = original).
+        """
+        if passo < 1:
+            raise ValueError("O passo deve ser pelo menos 1")
+        self.local = local if local is not None else settings.STATIC_VIDEO_PATH
+        self.passo = passo
+        self.repetir = repetir
+        self.escala = escala
+        self._inicio_quadro, self._inicio_s = inicio_quadro, inicio_s
+        self._fim_quadro, self._fim_s = fim_quadro, fim_s
         self.capture = None
+        self.fps = 0.0
+        self.total_quadros = 0
+        self.inicio = 0
+        self.fim: Optional[int] = None
+        # Índice do próximo quadro a ser lido e do último entregue
+        self.posicao = 0
+        self.quadro_atual: Optional[int] = None
+        self._pular = 0
+
+    def _para_quadro(self, quadro: Optional[int], segundos: Optional[float]) -> Optional[int]:
+        if quadro is not None:
+            return quadro
+        if segundos is not None and self.fps > 0:
+            return int(round(segundos * self.fps))
+        return None
 
     def start(self):
+        if self.local is None:
+            raise FileNotFoundError("Nenhum vídeo informado (defina STATIC_VIDEO_PATH).")
         self.capture = cv2.VideoCapture(str(self.local))
-        if self.capture is None or not self.capture.read()[0]:
+        if not self.capture.isOpened():
             raise FileNotFoundError(f"Não foi possível abrir o vídeo: {self.local}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.total_quadros = max(int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        self.inicio = self._para_quadro(self._inicio_quadro, self._inicio_s) or 0
+        self.fim = self._para_quadro(self._fim_quadro, self._fim_s)
+        self.posicao, self.quadro_atual = 0, None
+        self.buscar_quadro(self.inicio)
 
-    def next_frame(self):
-        sucesso, quadro = self.capture.read()
+    def buscar_quadro(self, indice: int):
+        """Posiciona a leitura no quadro `indice` (o próximo next_frame o entrega)."""
+        # Logo após abrir, o vídeo já está no quadro 0: evita um seek à toa
+        if indice != self.posicao or self.quadro_atual is not None:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, indice)
+        self.posicao = indice
+        self._pular = 0
+
+    def buscar_tempo(self, segundos: float):
+        """Posiciona a leitura no instante `segundos` do vídeo."""
+        if self.fps <= 0:
+            raise ValueError("O vídeo não informa o fps; use buscar_quadro")
+        self.buscar_quadro(int(round(segundos * self.fps)))
+
+    @property
+    def tempo_atual_ms(self) -> Optional[float]:
+        """Instante (ms) do último quadro entregue, pelo fps do arquivo."""
+        if self.quadro_atual is None or self.fps <= 0:
+            return None
+        return self.quadro_atual * 1000.0 / self.fps
+
+    def _chegou_ao_fim(self) -> bool:
+        return self.fim is not None and self.posicao >= self.fim
+
+    def _avancar(self) -> Optional[numpy.ndarray]:
+        """Pula os quadros do passo com grab() e decodifica o seguinte; None no fim do trecho."""
+        for _ in range(self._pular):
+            if self._chegou_ao_fim() or not self.capture.grab():
+                return None
+            self.posicao += 1
+        if self._chegou_ao_fim() or not self.capture.grab():
+            return None
+        sucesso, quadro = self.capture.retrieve()
         if not sucesso:
-            raise SystemError("Falha ao ler quadro do vídeo")
+            return None
+        self.quadro_atual = self.posicao
+        self.posicao += 1
+        self._pular = self.passo - 1
+        return quadro
+
+    def next_frame(self):
+        quadro = self._avancar()
+        if quadro is None:
+            if not self.repetir:
+                raise FimDoVideo("Fim do vídeo")
+            self.buscar_quadro(self.inicio)
+            quadro = self._avancar()
+            if quadro is None:
+                raise FimDoVideo("Vídeo sem quadros no trecho pedido")
+        if self.escala < 1.0:
+            # O backend FFmpeg do OpenCV não reduz dentro do decodificador: reduz antes de o quadro sair da fonte
+            tamanho = (max(1, int(quadro.shape[1] * self.escala)), max(1, int(quadro.shape[0] * self.escala)))
+            quadro = cv2.resize(quadro, tamanho, interpolation=cv2.INTER_AREA)
         return quadro
 
     def stop(self):
-        self.capture.release()
+        if self.capture is not None:
+            self.capture.release()
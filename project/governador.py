@@ -0,0 +1,156 @@
+"""
+Governador de qualidade: mantém o tempo de processamento por quadro dentro de um orçamento.
+Mede cada process (média móvel exponencial) e desce um nível de qualidade quando a média passa do orçamento
+por alguns quadros seguidos; só sobe de novo depois de muitos quadros bem abaixo dele (histerese), para não
+oscilar. Cada nível define a resolução da varredura do rosto, scaleFactor/minNeighbors da cascata, quantos
+quadros pular e o intervalo do timer. Com a cena parada (miniatura do quadro sem mudança), o ritmo cai para o
+intervalo ocioso até algo mudar.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy
+from capturers.cache import TAMANHO_ASSINATURA
+
+logger = logging.getLogger(__name__)
+
+ORCAMENTO_MS = 50.0
+# Peso da amostra nova na média móvel
+ALFA = 0.2
+# Quadros seguidos com a média acima do orçamento para descer um nível
+QUADROS_PARA_REDUZIR = 5
+# Quadros seguidos com a média abaixo de MARGEM_AUMENTAR * orçamento para subir um nível
+QUADROS_PARA_AUMENTAR = 60
+MARGEM_AUMENTAR = 0.6
+# Cena parada: diferença média da miniatura (0-255) abaixo deste limiar por QUADROS_PARADOS quadros
+LIMIAR_PARADO = 1.0
+QUADROS_PARADOS = 15
+INTERVALO_OCIOSO_MS = 250
+
+
+@dataclass(frozen=True)
+class NivelQualidade:
+    """
+    Ajustes de um nível. fator_escala/vizinhos_minimos None usam os da configuração da captura;
+    intervalo_ms None usa o intervalo padrão do governador.
+    """
+
+    nome: str
+    # Fração da escala_varredura configurada usada na varredura do rosto
+    reducao: float
+    fator_escala: Optional[float]
+    vizinhos_minimos: Optional[int]
+    # Processa um a cada `passo` quadros lidos
+    passo: int = 1
+    intervalo_ms: Optional[int] = None
+
+
+# Do melhor para o pior; o nível 0 é o comportamento sem governador
+NIVEIS = (
+    NivelQualidade("maxima", 1.0, None, None),
+    NivelQualidade("alta", 0.75, None, None),
+    NivelQualidade("media", 0.5, 1.3, 5),
+    NivelQualidade("baixa", 0.5, 1.4, 4, passo=2, intervalo_ms=33),
+    NivelQualidade("minima", 0.35, 1.5, 4, passo=3, intervalo_ms=66),
+)
+
+
+class GovernadorQualidade:
+    """
+    Uso por quadro: observar(quadro) -> deve_processar() -> registrar(segundos do process).
+    registrar e observar retornam True quando o nível ou o ritmo mudou (hora de aplicar e reler intervalo_ms).
+    """
+
+    def __init__(self, orcamento_ms: float = ORCAMENTO_MS, niveis=NIVEIS, intervalo_padrao_ms: int = 2):
+        self.orcamento_ms = orcamento_ms
+        self.niveis = niveis
+        self.intervalo_padrao_ms = intervalo_padrao_ms
+        self.nivel = 0
+        self.media_ms: Optional[float] = None
+        self.ocioso = False
+        self.mudancas = 0
+        self._acima = 0
+        self._abaixo = 0
+        self._contador_passo = 0
+        self._parados = 0
+        self._assinatura: Optional[numpy.ndarray] = None
+
+    @property
+    def nivel_atual(self) -> NivelQualidade:
+        return self.niveis[self.nivel]
+
+    @property
+    def degradado(self) -> bool:
+        return self.nivel > 0
+
+    def aplicar(self, captura):
+        """Passa os ajustes do nível atual à captura (ou a quem a envolve e repassa ajustar_qualidade)."""
+        nivel = self.nivel_atual
+        captura.ajustar_qualidade(nivel.reducao, nivel.fator_escala, nivel.vizinhos_minimos)
+
+    def intervalo_ms(self) -> int:
+        if self.ocioso:
+            return INTERVALO_OCIOSO_MS
+        intervalo = self.nivel_atual.intervalo_ms
+        return self.intervalo_padrao_ms if intervalo is None else intervalo
+
+    def observar(self, quadro: numpy.ndarray) -> bool:
+        """Compara a miniatura do quadro com a anterior; True quando entra ou sai do ritmo ocioso."""
+        assinatura = cv2.resize(quadro, TAMANHO_ASSINATURA, interpolation=cv2.INTER_AREA)
+        parado = (
+            self._assinatura is not None
+            and assinatura.shape == self._assinatura.shape
+            and cv2.norm(assinatura, self._assinatura, cv2.NORM_L1) / assinatura.size < LIMIAR_PARADO
+        )
+        self._assinatura = assinatura
+        self._parados = self._parados + 1 if parado else 0
+        ocioso = self._parados >= QUADROS_PARADOS
+        if ocioso == self.ocioso:
+            return False
+        self.ocioso = ocioso
+        return True
+
+    def deve_processar(self) -> bool:
+        """False nos quadros pulados pelo passo do nível atual."""
+        self._contador_passo = (self._contador_passo + 1) % self.nivel_atual.passo
+        return self._contador_passo == 0
+
+    def registrar(self, segundos: float) -> bool:
+        """Tempo de processamento de um quadro; True se o nível mudou."""
+        ms = segundos * 1000.0
+        self.media_ms = ms if self.media_ms is None else ALFA * ms + (1 - ALFA) * self.media_ms
+        if self.media_ms > self.orcamento_ms:
+            self._acima, self._abaixo = self._acima + 1, 0
+        elif self.media_ms < self.orcamento_ms * MARGEM_AUMENTAR:
+            self._acima, self._abaixo = 0, self._abaixo + 1
+        else:
+            self._acima = self._abaixo = 0
+        if self._acima >= QUADROS_PARA_REDUZIR and self.nivel < len(self.niveis) - 1:
+            return self._mudar(self.nivel + 1)
+        if self._abaixo >= QUADROS_PARA_AUMENTAR and self.nivel > 0:
+            return self._mudar(self.nivel - 1)
+        return False
+
+    def _mudar(self, nivel: int) -> bool:
+        anterior = self.nivel_atual.nome
+        self.nivel = nivel
+        self.mudancas += 1
+        # A média do nível anterior não diz nada sobre o novo: recomeça da próxima amostra
+        self.media_ms = None
+        self._acima = self._abaixo = 0
+        self._contador_passo = 0
+        registrar_log = logger.warning if nivel > 0 else logger.info
+        registrar_log("Qualidade: %s -> %s (orçamento %.0f ms)", anterior, self.nivel_atual.nome, self.orcamento_ms)
+        return True
+
+    def descricao(self) -> str:
+        """Texto curto para o operador, vazio quando está em qualidade máxima e ativo."""
+        partes = []
+        if self.degradado:
+            partes.append(f"Qualidade reduzida: {self.nivel_atual.nome}")
+        if self.ocioso:
+            partes.append("cena parada, ritmo reduzido")
+        return " | ".join(partes)
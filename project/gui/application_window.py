@@ -1,11 +1,11 @@
 """
 Janela principal do Eye Tracker: exibe câmera, olhos e alerta de atenção (som + texto vermelho).
 """
-import array
-import subprocess
-import sys
-import tempfile
-import wave
+
+import time
+from collections import deque
+from typing import Optional
+
 import numpy
 from capturers import Capture
 from PyQt6.QtCore import Qt, QTimer
@@ -13,44 +13,21 @@ from PyQt6.QtGui import QFont, QImage, QPixmap
 from PyQt6.QtWidgets import QLabel, QMainWindow, QPushButton, QSlider
 from PyQt6.uic import loadUi
 
-from frame_sources import FrameSource
+from frame_sources import FimDoVideo, FrameSource, GravadorSessao
+from frame_sources.barramento import quadro_ainda_valido
+from governador import GovernadorQualidade
+from gui.exibicao import ExibidorRotulo
+from gui.som_alerta import SomAlerta
+from metricas import Metricas, medir
 from settings import settings
+from telemetria import Telemetria
 
 # Intervalo em ms para repetir o som de alerta enquanto a atenção estiver ausente
 INTERVALO_ALERTA_SOM_MS = 2000
-
-
-def _tocar_som_alerta():
-    try:
-        sample_rate = 8000
-        duration_s = 0.2
-        freq = 440
-        n = int(sample_rate * duration_s)
-        samples = array.array("h")
-        for i in range(n):
-            t = i / sample_rate
-            samples.append(int(32000 * 0.3 * (1 if (int(t * freq * 2) % 2 == 0) else -1)))
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            with wave.open(f, "wb") as w:
-                w.setnchannels(1)
-                w.setsampwidth(2)
-                w.setframerate(sample_rate)
-                w.writeframes(samples.tobytes())
-            path = f.name
-        if sys.platform == "win32":
-            import winsound
-            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_NOSTOP)
-        else:
-            r = subprocess.run(["aplay", "-q", path], timeout=1, capture_output=True)
-            if r.returncode != 0:
-                subprocess.run(["paplay", path], timeout=1, capture_output=True)
-        try:
-            import os
-            os.unlink(path)
-        except OSError:
-            pass
-    except Exception:
-        pass
+# Intervalo em ms entre atualizações do texto de métricas sobreposto ao vídeo
+INTERVALO_SOBREPOSICAO_MS = 500
+# Intervalo mínimo em ms entre repinturas do vídeo; quadros que chegam antes disso são processados mas não exibidos
+INTERVALO_MINIMO_EXIBICAO_MS = 33
 
 
 class Window(QMainWindow):
@@ -60,7 +37,15 @@ class Window(QMainWindow):
     leftEyeThreshold: QSlider
     rightEyeThreshold: QSlider
 
-    def __init__(self, video_source: FrameSource, capture: Capture):
+    def __init__(
+        self,
+        video_source: FrameSource,
+        capture: Capture,
+        metricas: Optional[Metricas] = None,
+        gravador: Optional[GravadorSessao] = None,
+        telemetria: Optional[Telemetria] = None,
+        governador: Optional[GovernadorQualidade] = None,
+    ):
         super(Window, self).__init__()
         loadUi(settings.GUI_FILE_PATH, self)
         with open(settings.STYLE_FILE_PATH, "r") as css:
@@ -70,9 +55,16 @@ class Window(QMainWindow):
         self.stopButton.clicked.connect(self.stop)
         self.timer = None
         self.fonte_video = video_source
+        # Grava quadros brutos, thresholds e resultados para reprodução (frame_sources.sessao)
+        self.gravador = gravador
+        self._gravados_pendentes: deque[int] = deque()
+        # Registro por quadro para relatórios de atenção (telemetria.py)
+        self.telemetria = telemetria
         self.capture = capture
         self._alerta_visivel = False
-        self._timer_som_alerta = None
+        self.som_alerta = SomAlerta(INTERVALO_ALERTA_SOM_MS / 1000.0)
+        self._exibidores: dict[str, ExibidorRotulo] = {}
+        self._proxima_exibicao = 0.0
 
         self.rotulo_alerta = QLabel(self.centralwidget)
         self.rotulo_alerta.setGeometry(40, 60, 640, 56)
@@ -85,50 +77,153 @@ class Window(QMainWindow):
         self.rotulo_alerta.setText("PRESTE ATENÇÃO! Olhe para a câmera.")
         self.rotulo_alerta.hide()
 
+        # Ajusta qualidade e ritmo ao orçamento de tempo por quadro (governador.py)
+        self.governador = governador
+        self.rotulo_qualidade = QLabel(self.centralwidget)
+        self.rotulo_qualidade.setGeometry(40, 496, 640, 20)
+        self.rotulo_qualidade.setStyleSheet("background-color: rgba(0, 0, 0, 0.6); color: #FFBF00;")
+        self.rotulo_qualidade.hide()
+
+        self.metricas = metricas
+        self.rotulo_metricas = None
+        self._timer_metricas = None
+        if metricas is not None:
+            self.rotulo_metricas = QLabel(self.centralwidget)
+            self.rotulo_metricas.setGeometry(40, 520, 640, 20)
+            self.rotulo_metricas.setStyleSheet("background-color: rgba(0, 0, 0, 0.6); color: #7CFC00;")
+            self.rotulo_metricas.raise_()
+            self._timer_metricas = QTimer(self)
+            self._timer_metricas.timeout.connect(self._atualizar_sobreposicao)
+            self._timer_metricas.start(INTERVALO_SOBREPOSICAO_MS)
+
     def start(self):
         self.fonte_video.start()
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_frame)
-        self.timer.start(settings.REFRESH_PERIOD)
+        self.timer.start(settings.REFRESH_PERIOD if self.governador is None else self.governador.intervalo_ms())
 
     def stop(self):
         self.timer.stop()
-        if self._timer_som_alerta is not None:
-            self._timer_som_alerta.stop()
-            self._timer_som_alerta = None
+        self.som_alerta.desativar()
         self.fonte_video.stop()
+        self._esvaziar_captura()
+
+    def _esvaziar_captura(self):
+        """Com a captura em pipeline, conclui os quadros em andamento (e grava os resultados deles)."""
+        esvaziar = getattr(self.capture, "esvaziar", None)
+        if esvaziar is not None:
+            for _ in esvaziar():
+                if self._gravados_pendentes:
+                    self.gravador.gravar_resultado(self._gravados_pendentes.popleft(), self.capture.ultimo_resultado)
+        self._gravados_pendentes.clear()
+
+    def _aplicar_governador(self, nivel_mudou: bool):
+        """Leva à captura, ao timer e ao rótulo o nível e o ritmo atuais do governador."""
+        if nivel_mudou:
+            self.governador.aplicar(self.capture)
+            if self.metricas is not None:
+                self.metricas.definir("nivel_qualidade", self.governador.nivel)
+        if self.timer is not None:
+            self.timer.setInterval(self.governador.intervalo_ms())
+        descricao = self.governador.descricao()
+        self.rotulo_qualidade.setText(descricao)
+        self.rotulo_qualidade.setVisible(bool(descricao))
+        if descricao:
+            self.rotulo_qualidade.raise_()
 
     def _disparar_som_alerta(self):
-        _tocar_som_alerta()
-        if self._timer_som_alerta is None:
-            self._timer_som_alerta = QTimer(self)
-            self._timer_som_alerta.timeout.connect(_tocar_som_alerta)
-        self._timer_som_alerta.start(INTERVALO_ALERTA_SOM_MS)
+        # Toca e repete numa thread própria: o loop de quadros não espera o áudio
+        self.som_alerta.ativar()
 
     def _parar_som_alerta(self):
-        if self._timer_som_alerta is not None:
-            self._timer_som_alerta.stop()
-            self._timer_som_alerta = None
+        self.som_alerta.desativar()
+
+    def closeEvent(self, evento):
+        self.som_alerta.fechar()
+        super().closeEvent(evento)
+
+    def _atualizar_sobreposicao(self):
+        self.rotulo_metricas.setText(self.metricas.resumo())
 
     def update_frame(self):
-        frame = self.fonte_video.next_frame()
-        result = self.capture.process(
-            frame, self.leftEyeThreshold.value(), self.rightEyeThreshold.value()
-        )
-        if len(result) == 4:
-            face, l_eye, r_eye, attention_ok = result
+        with medir(self.metricas, "update_frame"):
+            self._atualizar_quadro()
+
+    def _atualizar_quadro(self):
+        with medir(self.metricas, "leitura"):
+            try:
+                frame = self.fonte_video.next_frame()
+            except FimDoVideo:
+                self.stop()
+                return
+        if self.metricas is not None:
+            descartados = getattr(self.fonte_video, "quadros_descartados", None)
+            if descartados is not None:
+                self.metricas.definir("quadros_descartados", descartados)
+        if frame is None:
+            # Fonte em thread ainda sem quadro novo: não reprocessa o anterior
+            return
+        if self.governador is not None:
+            if self.governador.observar(frame):
+                self._aplicar_governador(nivel_mudou=False)
+            if not self.governador.deve_processar():
+                if self.metricas is not None:
+                    self.metricas.incrementar("quadros_pulados")
+                return
+        if self.metricas is not None:
+            self.metricas.marcar_quadro()
+        limiar_esq, limiar_dir = self.leftEyeThreshold.value(), self.rightEyeThreshold.value()
+        if self.gravador is not None:
+            # Antes do process: o quadro devolvido para exibição pode ter anotações
+            numero_gravado = self.gravador.gravar_quadro(frame, limiar_esq, limiar_dir)
+            self._gravados_pendentes.append(numero_gravado)
+        inicio = time.perf_counter()
+        result = self.capture.process(frame, limiar_esq, limiar_dir)
+        if self.governador is not None and self.governador.registrar(time.perf_counter() - inicio):
+            self._aplicar_governador(nivel_mudou=True)
+        if result is None:
+            # Captura em pipeline (capturers.pipeline) ainda enchendo: o resultado deste quadro sai depois
+            return
+        if self._gravados_pendentes:
+            # O resultado entregue é sempre o do quadro gravado mais antigo ainda sem resultado
+            numero_gravado = self._gravados_pendentes.popleft()
+            if hasattr(self.capture, "ultimo_resultado"):
+                self.gravador.gravar_resultado(numero_gravado, self.capture.ultimo_resultado)
+        if not quadro_ainda_valido(self.fonte_video):
+            # Vista do barramento reescrita pelo publicador durante o process: não exibe o quadro misturado
+            if self.metricas is not None:
+                self.metricas.incrementar("quadros_invalidos")
+            return
+        if len(result) >= 4:
+            # Itens além do quarto (ex.: resultados por pessoa de capturers.multi_rosto) não são usados aqui
+            face, l_eye, r_eye, attention_ok = result[:4]
         else:
             face, l_eye, r_eye = result
             attention_ok = True
 
-        if face is not None:
-            self.display_image(self.opencv_to_qt(frame))
+        if getattr(self.capture, "limiar_automatico", False):
+            # Com threshold automático, os sliders mostram o valor calibrado em uso
+            resultado = self.capture.ultimo_resultado
+            if resultado.limiar_esquerdo is not None:
+                self.leftEyeThreshold.setValue(resultado.limiar_esquerdo)
+            if resultado.limiar_direito is not None:
+                self.rightEyeThreshold.setValue(resultado.limiar_direito)
+
+        agora = time.monotonic()
+        if agora >= self._proxima_exibicao:
+            with medir(self.metricas, "exibicao"):
+                if face is not None:
+                    self.exibir_quadro(face)
 
-        if l_eye is not None:
-            self.display_image(self.opencv_to_qt(l_eye), window="leftEyeBox")
+                if l_eye is not None:
+                    self.exibir_quadro(l_eye, window="leftEyeBox")
 
-        if r_eye is not None:
-            self.display_image(self.opencv_to_qt(r_eye), window="rightEyeBox")
+                if r_eye is not None:
+                    self.exibir_quadro(r_eye, window="rightEyeBox")
+            # Se a exibição ficou mais lenta que o intervalo, espera o mesmo tanto antes da próxima
+            self._proxima_exibicao = agora + max(INTERVALO_MINIMO_EXIBICAO_MS / 1000.0, time.monotonic() - agora)
+        elif self.metricas is not None:
+            self.metricas.incrementar("exibicoes_puladas")
 
         if not attention_ok:
             if not self._alerta_visivel:
@@ -136,15 +231,27 @@ class Window(QMainWindow):
                 self.rotulo_alerta.show()
                 self.rotulo_alerta.raise_()
                 self._disparar_som_alerta()
+                if self.metricas is not None:
+                    self.metricas.incrementar("alertas")
         else:
             if self._alerta_visivel:
                 self._alerta_visivel = False
                 self.rotulo_alerta.hide()
                 self._parar_som_alerta()
 
+        if self.telemetria is not None and hasattr(self.capture, "ultimo_resultado"):
+            self.telemetria.registrar(self.capture.ultimo_resultado, alerta=self._alerta_visivel)
+            if self.metricas is not None:
+                razao = self.telemetria.razao_atencao()
+                if razao is not None:
+                    self.metricas.definir("razao_atencao", razao)
+
     @staticmethod
     def opencv_to_qt(img) -> QImage:
-        """Converte imagem OpenCV (BGR) para QImage (RGB/RGBA)."""
+        """
+        Converte imagem OpenCV (BGR) para QImage (RGB/RGBA) na resolução original.
+        A janela usa exibir_quadro; esta conversão fica para quem precisa do QImage completo.
+        """
         qformat = QImage.Format.Format_Indexed8
         if len(img.shape) == 3:
             if img.shape[2] == 4:  # RGBA
@@ -167,3 +274,13 @@ class Window(QMainWindow):
 
         display_label.setPixmap(QPixmap.fromImage(img))
         display_label.setScaledContents(True)
+
+    def exibir_quadro(self, img: numpy.ndarray, window="baseImage"):
+        """Exibe o quadro OpenCV no widget indicado, convertido direto no tamanho do widget (buffers reaproveitados)."""
+        exibidor = self._exibidores.get(window)
+        if exibidor is None:
+            display_label: QLabel = getattr(self, window, None)
+            if display_label is None:
+                raise ValueError(f"No such display window in GUI: {window}")
+            exibidor = self._exibidores[window] = ExibidorRotulo(display_label)
+        exibidor.exibir(img)
@@ -0,0 +1,65 @@
+"""
+Caminho de exibição dos quadros na janela.
+Cada rótulo tem buffers RGB pré-alocados no tamanho em que é mostrado: o quadro é reduzido direto para esse
+tamanho (cv2.resize com dst) e convertido de BGR/cinza para RGB com cv2.cvtColor no mesmo buffer, que um QImage
+fixo envolve sem cópia. O custo passa a depender do tamanho do rótulo, não da resolução da câmera.
+"""
+
+from typing import Optional
+
+import cv2
+import numpy
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QLabel
+
+_CONVERSOES = {1: cv2.COLOR_GRAY2RGB, 3: cv2.COLOR_BGR2RGB, 4: cv2.COLOR_BGRA2RGB}
+
+
+class ConversorExibicao:
+    """Converte quadros OpenCV em QImage RGB de tamanho fixo, reaproveitando os mesmos buffers."""
+
+    def __init__(self):
+        self._tamanho: Optional[tuple[int, int]] = None
+        self._reduzido: dict[tuple, numpy.ndarray] = {}
+        self._rgb: Optional[numpy.ndarray] = None
+        self._imagem: Optional[QImage] = None
+
+    def _alocar(self, largura: int, altura: int):
+        self._tamanho = (largura, altura)
+        self._reduzido.clear()
+        self._rgb = numpy.empty((altura, largura, 3), numpy.uint8)
+        # O QImage aponta para self._rgb: os dois vivem juntos enquanto o tamanho não muda
+        self._imagem = QImage(self._rgb.data, largura, altura, self._rgb.strides[0], QImage.Format.Format_RGB888)
+
+    def converter(self, img: numpy.ndarray, largura: int, altura: int) -> QImage:
+        """QImage (largura x altura) com o conteúdo de `img`; válido até a próxima chamada."""
+        if self._tamanho != (largura, altura):
+            self._alocar(largura, altura)
+        canais = 1 if img.ndim == 2 else img.shape[2]
+        if img.shape[1] != largura or img.shape[0] != altura:
+            forma = (altura, largura) if canais == 1 else (altura, largura, canais)
+            reduzido = self._reduzido.get(forma)
+            if reduzido is None:
+                reduzido = self._reduzido[forma] = numpy.empty(forma, numpy.uint8)
+            # INTER_LINEAR: ~7x mais rápido que INTER_AREA ao reduzir 1080p, qualidade próxima à do QLabel escalado
+            img = cv2.resize(img, (largura, altura), dst=reduzido, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(img, _CONVERSOES[canais], dst=self._rgb)
+        return self._imagem
+
+
+class ExibidorRotulo:
+    """Mostra quadros num QLabel no tamanho atual do rótulo (sem setScaledContents)."""
+
+    def __init__(self, rotulo: QLabel):
+        self.rotulo = rotulo
+        self.conversor = ConversorExibicao()
+        rotulo.setScaledContents(False)
+
+    def exibir(self, img: numpy.ndarray):
+        if not self.rotulo.isVisible():
+            return
+        tamanho = self.rotulo.contentsRect().size()
+        if tamanho.width() <= 0 or tamanho.height() <= 0:
+            return
+        imagem = self.conversor.converter(img, tamanho.width(), tamanho.height())
+        self.rotulo.setPixmap(QPixmap.fromImage(imagem))
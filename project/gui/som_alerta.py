@@ -0,0 +1,159 @@
+"""
+Som de alerta de atenção, tocado fora da thread do Qt.
+A onda quadrada é gerada uma vez com NumPy e gravada num único WAV em cache; uma thread de trabalho toca o som
+e o repete enquanto o alerta estiver ativo. Pedidos sobrepostos são agrupados num só e o som não se repete antes
+do intervalo mínimo, mesmo que o alerta pisque. Quem chama (o loop de quadros) nunca espera o áudio.
+"""
+
+import io
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy
+
+logger = logging.getLogger(__name__)
+
+TAXA_AMOSTRAGEM = 8000
+DURACAO_S = 0.2
+FREQUENCIA_HZ = 440
+VOLUME = 0.3
+# Tocadores tentados fora do Windows, em ordem
+TOCADORES = (["aplay", "-q"], ["paplay"])
+# Tempo máximo que a thread espera um tocador terminar antes de desistir dele
+TEMPO_LIMITE_TOCADOR_S = 2.0
+
+
+def gerar_onda(
+    taxa: int = TAXA_AMOSTRAGEM, duracao_s: float = DURACAO_S, frequencia: float = FREQUENCIA_HZ, volume: float = VOLUME
+) -> numpy.ndarray:
+    """Onda quadrada em int16 (mono)."""
+    t = numpy.arange(int(taxa * duracao_s)) / taxa
+    sinal = numpy.where((t * frequencia * 2).astype(numpy.int64) % 2 == 0, 1, -1)
+    return (sinal * int(32000 * volume)).astype(numpy.int16)
+
+
+def bytes_wav(amostras: numpy.ndarray, taxa: int = TAXA_AMOSTRAGEM) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(taxa)
+        w.writeframes(amostras.tobytes())
+    return buffer.getvalue()
+
+
+def arquivo_wav(conteudo: bytes) -> Path:
+    """WAV em cache no diretório temporário; só é regravado se o conteúdo mudar."""
+    caminho = Path(tempfile.gettempdir()) / f"eye_tracker_alerta_{len(conteudo)}_{zlib.crc32(conteudo):08x}.wav"
+    if not caminho.exists() or caminho.stat().st_size != len(conteudo):
+        caminho.write_bytes(conteudo)
+    return caminho
+
+
+class SomAlerta:
+    """
+    ativar() começa a tocar (e repetir a cada `intervalo_s`) numa thread própria; desativar() para a repetição.
+    Chamadas repetidas a ativar() não geram sons extras, e dois toques nunca ficam a menos de `intervalo_s`,
+    mesmo que o alerta seja desativado e reativado nesse meio tempo.
+    """
+
+    def __init__(self, intervalo_s: float = 2.0):
+        self.intervalo_s = intervalo_s
+        self.conteudo = bytes_wav(gerar_onda())
+        self.tocados = 0
+        self._caminho: Optional[Path] = None
+        self._tocador: Optional[list[str]] = None
+        self._sem_tocador = False
+        self._ativo = False
+        # Sinal de parada da thread atual: cada thread tem o seu, para que uma que demore a sair (tocador
+        # travado) não seja reaproveitada nem impeça a próxima
+        self._encerrar: Optional[threading.Event] = None
+        self._ultimo_toque = float("-inf")
+        self._condicao = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def ativar(self):
+        with self._condicao:
+            if self._ativo:
+                return
+            self._ativo = True
+            if self._thread is None:
+                self._encerrar = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._executar, args=(self._encerrar,), name="som-alerta", daemon=True
+                )
+                self._thread.start()
+            self._condicao.notify()
+
+    def desativar(self):
+        with self._condicao:
+            self._ativo = False
+            self._condicao.notify()
+
+    def fechar(self):
+        with self._condicao:
+            self._ativo = False
+            thread, self._thread = self._thread, None
+            if self._encerrar is not None:
+                self._encerrar.set()
+                self._encerrar = None
+            self._condicao.notify_all()
+        if thread is not None:
+            thread.join(timeout=TEMPO_LIMITE_TOCADOR_S)
+
+    def _executar(self, encerrar: threading.Event):
+        while True:
+            with self._condicao:
+                while not encerrar.is_set():
+                    espera = self._ultimo_toque + self.intervalo_s - time.monotonic()
+                    if self._ativo and espera <= 0:
+                        break
+                    # Inativo: dorme até ativar(); ativo mas cedo demais: espera completar o intervalo
+                    self._condicao.wait(timeout=espera if self._ativo else None)
+                if encerrar.is_set():
+                    return
+                self._ultimo_toque = time.monotonic()
+            self._tocar()
+
+    def _tocar(self):
+        try:
+            if sys.platform == "win32":
+                import winsound
+
+                winsound.PlaySound(self.conteudo, winsound.SND_MEMORY)
+            else:
+                self._tocar_externo()
+            self.tocados += 1
+        except Exception:
+            logger.debug("Falha ao tocar o som de alerta", exc_info=True)
+
+    def _tocar_externo(self):
+        if self._sem_tocador:
+            return
+        if self._caminho is None:
+            self._caminho = arquivo_wav(self.conteudo)
+        candidatos = [self._tocador] if self._tocador is not None else TOCADORES
+        for comando in candidatos:
+            try:
+                retorno = subprocess.run(
+                    comando + [str(self._caminho)], timeout=TEMPO_LIMITE_TOCADOR_S, capture_output=True
+                ).returncode
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            if retorno == 0:
+                self._tocador = comando
+                return
+        if self._tocador is None:
+            # Nenhum tocador disponível: não tenta de novo a cada alerta
+            self._sem_tocador = True
+            logger.warning(
+                "Nenhum tocador de áudio disponível (%s); alerta só visual.", ", ".join(c[0] for c in TOCADORES)
+            )
@@ -2,20 +2,38 @@
 Ponto de entrada do Eye Tracker.
 Rastreamento de olhar com alerta de atenção (sistema de segurança).
 """
+
 import argparse
 import sys
+from pathlib import Path
 
-from capturers.haar_blob import HaarCascadeBlobCapture
+from capturers.cache import CacheResultado
+from capturers.haar_blob import (
+    CONFIGURACAO_PADRAO,
+    MOTOR_BLOB,
+    MOTOR_COMPONENTES,
+    ConfiguracaoCaptura,
+    HaarCascadeBlobCapture,
+)
+from capturers.multi_rosto import CapturaMultiRosto
+from capturers.pipeline import CapturaPipeline
 from frame_sources import (
+    BarramentoFrameSource,
     CameraFrameSource,
     FileFrameSource,
     FolderFrameSource,
+    GravadorSessao,
+    SessaoFrameSource,
+    ThreadedFrameSource,
     VideoFrameSource,
 )
-from gui.application_window import Window
-from PyQt6.QtWidgets import QApplication
+from frame_sources.barramento import NOME_PADRAO as NOME_BARRAMENTO
+from governador import GovernadorQualidade
+from metricas import Metricas, ServidorMetricas
+from settings import settings
+from telemetria import Telemetria
 
-# Fonte de quadros: camera, pasta de imagens, arquivo único ou vídeo (chaves em PT-BR e EN)
+# Fonte de quadros: camera, pasta de imagens, arquivo único, vídeo, sessão ou barramento (chaves em PT-BR e EN)
 FONTES_QUADRO = {
     "camera": CameraFrameSource,
     "pasta": FolderFrameSource,
@@ -23,6 +41,8 @@ FONTES_QUADRO = {
     "arquivo": FileFrameSource,
     "file": FileFrameSource,
     "video": VideoFrameSource,
+    "sessao": SessaoFrameSource,
+    "barramento": BarramentoFrameSource,
 }
 
 
@@ -36,9 +56,12 @@ def obter_argumentos():
         "--fonte",
         action="store",
         dest="fonte",
-        choices=["camera", "pasta", "arquivo", "video"],
+        choices=["camera", "pasta", "arquivo", "video", "sessao", "barramento"],
         default="camera",
-        help="Fonte dos quadros: camera, pasta, arquivo ou video",
+        help=(
+            "Fonte dos quadros: camera, pasta, arquivo, video, sessao (gravada com --gravar-sessao) "
+            "ou barramento (câmera compartilhada por publicador.py)"
+        ),
     )
     parser.add_argument(
         "-cam",
@@ -49,7 +72,231 @@ def obter_argumentos():
         default=None,
         help="Índice do dispositivo de câmera (0, 1, 2...). Use apenas com -fs camera.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--passo",
+        action="store",
+        dest="passo",
+        type=int,
+        default=1,
+        help="Com -fs video, mostra um a cada N quadros (os pulados não são decodificados).",
+    )
+    parser.add_argument(
+        "--inicio",
+        action="store",
+        dest="inicio_s",
+        type=float,
+        default=None,
+        help="Com -fs video, começa neste instante (segundos).",
+    )
+    parser.add_argument(
+        "--fim",
+        action="store",
+        dest="fim_s",
+        type=float,
+        default=None,
+        help="Com -fs video, termina neste instante (segundos).",
+    )
+    parser.add_argument(
+        "--repetir",
+        action="store_true",
+        dest="repetir",
+        help="Com -fs video, volta ao início (ou a --inicio) ao chegar ao fim.",
+    )
+    parser.add_argument(
+        "--reduzir",
+        action="store",
+        dest="escala_video",
+        type=float,
+        default=1.0,
+        help="Com -fs video, reduz cada quadro logo após decodificar (ex.: 0.5).",
+    )
+    parser.add_argument(
+        "--thread",
+        action="store_true",
+        dest="em_thread",
+        help="Lê os quadros numa thread separada e processa sempre o mais recente (descarta os atrasados).",
+    )
+    parser.add_argument(
+        "--buffer",
+        action="store",
+        dest="tamanho_buffer",
+        type=int,
+        default=4,
+        help="Quantos quadros recentes a thread de captura mantém (usar com --thread).",
+    )
+    parser.add_argument(
+        "--rastrear-rosto",
+        action="store_true",
+        dest="rastrear_rosto",
+        help="Procura o rosto só em volta da posição anterior; varre o quadro inteiro periodicamente.",
+    )
+    parser.add_argument(
+        "--olhos-geometricos",
+        action="store_true",
+        dest="olhos_geometricos",
+        help="Prevê os olhos pelas proporções da caixa do rosto; a cascata de olhos só verifica periodicamente.",
+    )
+    parser.add_argument(
+        "--intervalo-verificacao-olhos",
+        action="store",
+        dest="intervalo_verificacao_olhos",
+        type=int,
+        default=15,
+        help="Com --olhos-geometricos, a cada quantos quadros a cascata de olhos confirma as posições.",
+    )
+    parser.add_argument(
+        "--equalizar",
+        action="store_true",
+        dest="equalizar",
+        help="Equaliza o histograma do quadro em cinza (cenas escuras ou com pouco contraste).",
+    )
+    parser.add_argument(
+        "--configuracao",
+        action="store",
+        dest="configuracao",
+        type=Path,
+        default=None,
+        help="JSON com parâmetros de detecção (por exemplo, o --melhor de avaliacao.py).",
+    )
+    parser.add_argument(
+        "--multi-rosto",
+        action="store_true",
+        dest="multi_rosto",
+        help="Acompanha várias pessoas, cada uma com id e estado de atenção próprios (o alerta segue a principal).",
+    )
+    parser.add_argument(
+        "--intervalo-varredura",
+        action="store",
+        dest="intervalo_varredura",
+        type=int,
+        default=10,
+        help="A cada quantos quadros o rastreamento do rosto refaz a varredura completa.",
+    )
+    parser.add_argument(
+        "--escala-varredura",
+        action="store",
+        dest="escala_varredura",
+        type=float,
+        default=1.0,
+        help="Fator de redução do quadro na varredura completa do rosto (ex.: 0.5).",
+    )
+    parser.add_argument(
+        "--motor-pupila",
+        action="store",
+        dest="motor_pupila",
+        choices=[MOTOR_BLOB, MOTOR_COMPONENTES],
+        default=MOTOR_BLOB,
+        help="Detecção de pupila: blob (SimpleBlobDetector) ou componentes (componentes conexos, mais rápido).",
+    )
+    parser.add_argument(
+        "--limiar-automatico",
+        action="store_true",
+        dest="limiar_automatico",
+        help="Calibra o threshold de cada olho automaticamente (os sliders passam a mostrar o valor usado).",
+    )
+    parser.add_argument(
+        "--cache-quadros",
+        action="store_true",
+        dest="cache_quadros",
+        help="Reaproveita o resultado anterior quando o quadro quase não mudou (menos CPU em cenas paradas).",
+    )
+    parser.add_argument(
+        "--limiar-mudanca",
+        action="store",
+        dest="limiar_mudanca",
+        type=float,
+        default=2.0,
+        help="Diferença média (0-255) da miniatura abaixo da qual o quadro conta como inalterado.",
+    )
+    parser.add_argument(
+        "--metricas",
+        action="store_true",
+        dest="metricas",
+        default=settings.METRICAS,
+        help="Coleta latência por estágio e FPS e mostra o resumo sobre o vídeo (ou METRICAS=true).",
+    )
+    parser.add_argument(
+        "--metricas-porta",
+        action="store",
+        dest="metricas_porta",
+        type=int,
+        default=settings.METRICAS_PORTA,
+        help="Porta local do endpoint /metrics no formato Prometheus (0 = desligado). Implica --metricas.",
+    )
+    parser.add_argument(
+        "--gravar-sessao",
+        action="store",
+        dest="gravar_sessao",
+        type=Path,
+        default=None,
+        help="Grava os quadros brutos, thresholds e resultados nesta pasta (reproduzir com -fs sessao).",
+    )
+    parser.add_argument(
+        "--sessao",
+        action="store",
+        dest="sessao",
+        type=Path,
+        default=None,
+        help="Pasta da sessão gravada (usar com -fs sessao).",
+    )
+    parser.add_argument(
+        "--sem-espera",
+        action="store_true",
+        dest="sem_espera",
+        help="Com -fs sessao, entrega os quadros o mais rápido possível em vez do ritmo gravado.",
+    )
+    parser.add_argument(
+        "--barramento",
+        action="store",
+        dest="barramento",
+        default=NOME_BARRAMENTO,
+        help="Com -fs barramento, nome do barramento publicado por publicador.py.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        dest="pipeline",
+        help="Sobrepõe as etapas da captura em threads (rosto do próximo quadro junto com olhos do atual).",
+    )
+    parser.add_argument(
+        "--profundidade-pipeline",
+        action="store",
+        dest="profundidade_pipeline",
+        type=int,
+        default=1,
+        help="Com --pipeline, quantos quadros ficam em andamento (latência extra em quadros).",
+    )
+    parser.add_argument(
+        "--orcamento-ms",
+        action="store",
+        dest="orcamento_ms",
+        type=float,
+        default=0.0,
+        help="Tempo de processamento por quadro a manter (ms): reduz a qualidade quando passa dele (0 = desligado).",
+    )
+    parser.add_argument(
+        "--telemetria",
+        action="store",
+        dest="telemetria",
+        type=Path,
+        default=None,
+        help="Acrescenta a telemetria de atenção por quadro a este arquivo (relatório: python -m telemetria).",
+    )
+    parser.add_argument(
+        "--janela-telemetria",
+        action="store",
+        dest="janela_telemetria",
+        type=float,
+        default=60.0,
+        help="Janela rolante (s) da razão de atenção mostrada nas métricas.",
+    )
+    args = parser.parse_args()
+    if args.pipeline and args.cache_quadros:
+        # O cache compararia o quadro atual com um resultado de quadros atrás
+        parser.error("--pipeline e --cache-quadros não podem ser usados juntos")
+    if args.pipeline and args.multi_rosto:
+        parser.error("--pipeline ainda não suporta --multi-rosto")
+    return args
 
 
 if __name__ == "__main__":
@@ -59,10 +306,86 @@ if __name__ == "__main__":
     kwargs_fonte = {}
     if args.id_camera is not None and args.fonte == "camera":
         kwargs_fonte["cam_id"] = args.id_camera
+    if args.fonte == "video":
+        kwargs_fonte.update(
+            passo=args.passo, inicio_s=args.inicio_s, fim_s=args.fim_s, repetir=args.repetir, escala=args.escala_video
+        )
+    if args.fonte == "sessao":
+        if args.sessao is None:
+            sys.exit("Informe a pasta da sessão com --sessao.")
+        kwargs_fonte.update(local=args.sessao, tempo_real=not args.sem_espera, repetir=True)
+    if args.fonte == "barramento":
+        # As capturas não escrevem no quadro: a vista do slot basta (sem cópia), conferida depois do process.
+        # A thread de leitura e o pipeline guardam quadros além do tick, e o publicador pode reescrever o slot
+        kwargs_fonte.update(nome=args.barramento, copiar=args.em_thread or args.pipeline)
+
+    fonte = ClasseFonte(**kwargs_fonte)
+    if args.em_thread:
+        fonte = ThreadedFrameSource(
+            fonte, capacidade=args.tamanho_buffer, fps_maximo=1000.0 / max(settings.REFRESH_PERIOD, 1)
+        )
+
+    configuracao = CONFIGURACAO_PADRAO if args.configuracao is None else ConfiguracaoCaptura.ler(args.configuracao)
+    if args.multi_rosto:
+        # Com várias pessoas, cada trilha sempre procura o rosto em volta da própria caixa
+        captura = CapturaMultiRosto(
+            intervalo_varredura=args.intervalo_varredura,
+            escala_varredura=args.escala_varredura,
+            motor_pupila=args.motor_pupila,
+            limiar_automatico=args.limiar_automatico,
+            olhos_geometricos=args.olhos_geometricos,
+            intervalo_verificacao_olhos=args.intervalo_verificacao_olhos,
+            equalizar=args.equalizar,
+            configuracao=configuracao,
+        )
+    else:
+        captura = HaarCascadeBlobCapture(
+            rastrear_rosto=args.rastrear_rosto,
+            intervalo_varredura=args.intervalo_varredura,
+            escala_varredura=args.escala_varredura,
+            motor_pupila=args.motor_pupila,
+            limiar_automatico=args.limiar_automatico,
+            olhos_geometricos=args.olhos_geometricos,
+            intervalo_verificacao_olhos=args.intervalo_verificacao_olhos,
+            equalizar=args.equalizar,
+            configuracao=configuracao,
+        )
+    metricas = None
+    if args.metricas or args.metricas_porta:
+        metricas = Metricas()
+        captura.metricas = metricas
+        if args.metricas_porta:
+            ServidorMetricas(metricas, args.metricas_porta).start()
+    if args.cache_quadros:
+        captura = CacheResultado(captura, limiar_mudanca=args.limiar_mudanca)
+    if args.pipeline:
+        captura = CapturaPipeline(captura, profundidade=args.profundidade_pipeline)
+
+    gravador = None
+    if args.gravar_sessao is not None:
+        gravador = GravadorSessao(args.gravar_sessao)
+        gravador.start()
+
+    telemetria = None
+    if args.telemetria is not None:
+        telemetria = Telemetria(args.telemetria, janela_s=args.janela_telemetria)
+        telemetria.start()
+
+    governador = None
+    if args.orcamento_ms > 0:
+        governador = GovernadorQualidade(args.orcamento_ms, intervalo_padrao_ms=settings.REFRESH_PERIOD)
+
+    # Qt só é carregado aqui: o restante do módulo (e as capturas/fontes) funciona sem PyQt6
+    from gui.application_window import Window
+    from PyQt6.QtWidgets import QApplication
 
-    captura = HaarCascadeBlobCapture()
     app = QApplication(sys.argv)
-    janela = Window(ClasseFonte(**kwargs_fonte), captura)
+    janela = Window(fonte, captura, metricas=metricas, gravador=gravador, telemetria=telemetria, governador=governador)
     janela.setWindowTitle("Eye Tracker - Controle de Atenção")
     janela.show()
-    sys.exit(app.exec())
+    codigo = app.exec()
+    if gravador is not None:
+        gravador.stop()
+    if telemetria is not None:
+        telemetria.stop()
+    sys.exit(codigo)
@@ -0,0 +1,188 @@
+"""
+Instrumentação do pipeline: latência por estágio (janela rolante), contadores e FPS.
+Exposta opcionalmente num endpoint HTTP local no formato texto do Prometheus.
+Quando desligada, quem mede recebe um contexto nulo e o custo é desprezível.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Optional
+
+import numpy
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = "eye_tracker"
+QUANTIS = (0.5, 0.95, 0.99)
+# Contexto reutilizado quando não há coleta de métricas
+SEM_MEDICAO = nullcontext()
+
+
+class HistogramaRolante:
+    """Últimas `tamanho` amostras num buffer circular NumPy, mais soma e contagem desde o início."""
+
+    def __init__(self, tamanho: int = 512):
+        self._amostras = numpy.zeros(tamanho)
+        self._posicao = 0
+        self._preenchidas = 0
+        self.soma = 0.0
+        self.contagem = 0
+
+    def registrar(self, valor: float):
+        self._amostras[self._posicao] = valor
+        self._posicao = (self._posicao + 1) % len(self._amostras)
+        self._preenchidas = min(self._preenchidas + 1, len(self._amostras))
+        self.soma += valor
+        self.contagem += 1
+
+    def quantis(self, quantis=QUANTIS) -> Optional[numpy.ndarray]:
+        if not self._preenchidas:
+            return None
+        return numpy.quantile(self._amostras[: self._preenchidas], quantis)
+
+
+class _Cronometro:
+    __slots__ = ("_metricas", "_estagio", "_inicio")
+
+    def __init__(self, metricas: "Metricas", estagio: str):
+        self._metricas = metricas
+        self._estagio = estagio
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._metricas.registrar(self._estagio, time.perf_counter() - self._inicio)
+        return False
+
+
+class Metricas:
+    """Coleta latências por estágio, contadores (quadros sem rosto, alertas...) e medidores (FPS, descartes)."""
+
+    def __init__(self, janela: int = 512):
+        self.janela = janela
+        self.estagios: dict[str, HistogramaRolante] = {}
+        self.contadores: dict[str, int] = {}
+        self.medidores: dict[str, float] = {}
+        self._instantes_quadro: deque[float] = deque(maxlen=120)
+        self._trava = threading.Lock()
+
+    def medir(self, estagio: str) -> _Cronometro:
+        """Contexto que registra a duração do bloco no estágio indicado."""
+        return _Cronometro(self, estagio)
+
+    def registrar(self, estagio: str, segundos: float):
+        with self._trava:
+            histograma = self.estagios.get(estagio)
+            if histograma is None:
+                histograma = self.estagios[estagio] = HistogramaRolante(self.janela)
+            histograma.registrar(segundos)
+
+    def incrementar(self, contador: str, quantidade: int = 1):
+        with self._trava:
+            self.contadores[contador] = self.contadores.get(contador, 0) + quantidade
+
+    def definir(self, medidor: str, valor: float):
+        self.medidores[medidor] = valor
+
+    def marcar_quadro(self):
+        """Chamado uma vez por quadro processado; alimenta o cálculo de FPS."""
+        self._instantes_quadro.append(time.monotonic())
+
+    def fps(self) -> float:
+        instantes = self._instantes_quadro
+        if len(instantes) < 2 or instantes[-1] == instantes[0]:
+            return 0.0
+        return (len(instantes) - 1) / (instantes[-1] - instantes[0])
+
+    def quantis_ms(self, estagio: str) -> Optional[numpy.ndarray]:
+        histograma = self.estagios.get(estagio)
+        if histograma is None:
+            return None
+        with self._trava:
+            quantis = histograma.quantis()
+        return None if quantis is None else quantis * 1000.0
+
+    def resumo(self, estagios=("process", "rosto", "olhos")) -> str:
+        """Linha curta para sobreposição na tela: FPS e p50 dos estágios pedidos."""
+        partes = [f"FPS {self.fps():.1f}"]
+        for estagio in estagios:
+            quantis = self.quantis_ms(estagio)
+            if quantis is not None:
+                partes.append(f"{estagio} {quantis[0]:.1f} ms")
+        return " | ".join(partes)
+
+    def texto_prometheus(self) -> str:
+        """Todas as métricas no formato de exposição em texto do Prometheus."""
+        linhas = [
+            f"# HELP {PREFIXO}_estagio_segundos Latência por estágio (quantis da janela rolante)",
+            f"# TYPE {PREFIXO}_estagio_segundos summary",
+        ]
+        with self._trava:
+            for estagio, histograma in sorted(self.estagios.items()):
+                quantis = histograma.quantis()
+                if quantis is not None:
+                    for q, valor in zip(QUANTIS, quantis):
+                        linhas.append(f'{PREFIXO}_estagio_segundos{{estagio="{estagio}",quantile="{q}"}} {valor:.6f}')
+                linhas.append(f'{PREFIXO}_estagio_segundos_sum{{estagio="{estagio}"}} {histograma.soma:.6f}')
+                linhas.append(f'{PREFIXO}_estagio_segundos_count{{estagio="{estagio}"}} {histograma.contagem}')
+            contadores = sorted(self.contadores.items())
+        for nome, valor in contadores:
+            linhas.append(f"# TYPE {PREFIXO}_{nome}_total counter")
+            linhas.append(f"{PREFIXO}_{nome}_total {valor}")
+        medidores = dict(self.medidores, fps=self.fps())
+        for nome, valor in sorted(medidores.items()):
+            linhas.append(f"# TYPE {PREFIXO}_{nome} gauge")
+            linhas.append(f"{PREFIXO}_{nome} {valor:g}")
+        return "\n".join(linhas) + "\n"
+
+
+def medir(metricas: Optional[Metricas], estagio: str):
+    """Atalho para quem tem métricas opcionais: contexto nulo quando metricas é None."""
+    return SEM_MEDICAO if metricas is None else metricas.medir(estagio)
+
+
+class ServidorMetricas:
+    """Servidor HTTP local (thread daemon) que responde GET /metrics com o texto do Prometheus."""
+
+    def __init__(self, metricas: Metricas, porta: int, endereco: str = "127.0.0.1"):
+        # Importado aqui: http.server pesa no import de quem só usa medir() (capturas, workers de lote)
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.metricas = metricas
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] not in ("/metrics", "/"):
+                    handler.send_error(404)
+                    return
+                corpo = metricas.texto_prometheus().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(corpo)))
+                handler.end_headers()
+                handler.wfile.write(corpo)
+
+            def log_message(handler, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer((endereco, porta), _Handler)
+        self.servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def porta(self) -> int:
+        return self.servidor.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.servidor.serve_forever, name="servidor-metricas", daemon=True)
+        self._thread.start()
+        logger.info("Métricas em http://%s:%d/metrics", *self.servidor.server_address[:2])
+
+    def stop(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
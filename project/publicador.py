@@ -0,0 +1,52 @@
+"""
+Publica os quadros de uma câmera ou vídeo no barramento em memória compartilhada (frame_sources.barramento),
+para que a interface, o serviço e o supervisor leiam a mesma câmera em processos separados:
+    python publicador.py 0
+    python main.py -fs barramento
+    python servico.py barramento:eyetracker
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import time
+
+from frame_sources import PublicadorBarramento
+from frame_sources.barramento import NOME_PADRAO, SLOTS_PADRAO
+from supervisor import abrir_fonte
+
+logger = logging.getLogger(__name__)
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Publica os quadros de uma câmera ou vídeo no barramento.")
+    parser.add_argument("origem", nargs="?", default="0", help="Índice de câmera (0, 1...) ou caminho de vídeo")
+    parser.add_argument("--nome", dest="nome", default=NOME_PADRAO, help="Nome do barramento")
+    parser.add_argument("--slots", dest="slots", type=int, default=SLOTS_PADRAO, help="Quadros no anel")
+    parser.add_argument(
+        "--fps", dest="fps", type=float, default=None, help="Limita a publicação (padrão: fps do vídeo, câmera livre)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = obter_argumentos()
+    # Vídeo em loop: o barramento se comporta como uma câmera que não acaba
+    publicador = PublicadorBarramento(abrir_fonte(args.origem, repetir=True), args.nome, args.slots, args.fps)
+    try:
+        publicador.start()
+    except FileExistsError as erro:
+        sys.exit(str(erro))
+    # Encerrado pelo sistema (kill, systemd): marca o fim para os leitores e remove o segmento
+    signal.signal(signal.SIGTERM, lambda *_: publicador.stop())
+    try:
+        while publicador.rodando:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publicador.stop()
+        logger.info("Barramento %s: %d quadros publicados", args.nome, publicador.sequencia)
@@ -0,0 +1,358 @@
+"""
+Serviço sem interface que publica o estado de atenção para outros programas da máquina (loggers, pontes de CLP,
+painéis). O laço de captura roda numa thread; o asyncio só distribui as mensagens, em JSON por linha, por um
+socket TCP local, um socket Unix e, opcionalmente, WebSocket (pacote `websockets`).
+Mensagens: "ola" (estado atual, ao conectar), "atencao" (a cada mudança), "resumo" (periódico: fps, rosto,
+pupilas e razão de atenção no período) e "fim" (fim do vídeo).
+Cada cliente tem uma fila limitada: quem não lê a tempo é desconectado, sem nunca segurar o laço de captura.
+`python servico.py --cliente` é um cliente de teste que imprime as mensagens recebidas.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import cv2
+from batch import OpcoesAnalise, criar_captura
+from capturers.haar_blob import MOTOR_BLOB, MOTOR_COMPONENTES, ErroCV2
+from frame_sources import FimDoVideo
+from frame_sources.barramento import quadro_ainda_valido
+from supervisor import abrir_fonte
+
+logger = logging.getLogger(__name__)
+
+VERSAO_PROTOCOLO = 1
+PORTA_PADRAO = 8765
+# Segundos entre resumos
+INTERVALO_RESUMO = 1.0
+# Mensagens que podem esperar na fila de um cliente antes de ele ser desconectado
+TAMANHO_FILA_CLIENTE = 64
+# Tempo máximo (s) que uma escrita pode ficar presa no socket de um cliente
+TEMPO_LIMITE_ESCRITA_S = 5.0
+
+
+def codificar(mensagem: dict) -> bytes:
+    return (json.dumps(mensagem, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class Assinante:
+    """Um cliente conectado: fila limitada e a tarefa que a esvazia no socket."""
+
+    def __init__(self, nome: str, escrever: Callable[[bytes], Awaitable], fechar: Callable[[], object]):
+        self.nome = nome
+        self.fila: asyncio.Queue[bytes] = asyncio.Queue(TAMANHO_FILA_CLIENTE)
+        self._escrever = escrever
+        self._fechar = fechar
+        self.tarefa: Optional[asyncio.Task] = None
+
+    async def executar(self):
+        try:
+            while True:
+                dados = await self.fila.get()
+                await asyncio.wait_for(self._escrever(dados), TEMPO_LIMITE_ESCRITA_S)
+        except (ConnectionError, asyncio.TimeoutError, OSError) as e:
+            logger.info("Cliente %s desconectado: %s", self.nome, e.__class__.__name__)
+        finally:
+            self._fechar()
+
+
+class Publicador:
+    """Distribui mensagens a todos os assinantes sem esperar nenhum deles."""
+
+    def __init__(self):
+        self.assinantes: set[Assinante] = set()
+        self.estado: dict = {"tipo": "ola", "versao": VERSAO_PROTOCOLO, "atencao_ok": None}
+        self.enviadas = 0
+        self.descartados = 0
+
+    def adicionar(self, assinante: Assinante):
+        self.assinantes.add(assinante)
+        assinante.fila.put_nowait(codificar(self.estado))
+        assinante.tarefa = asyncio.create_task(assinante.executar())
+
+    def remover(self, assinante: Assinante):
+        self.assinantes.discard(assinante)
+        if assinante.tarefa is not None and not assinante.tarefa.done():
+            assinante.tarefa.cancel()
+
+    def publicar(self, mensagem: dict):
+        """Chamado no loop do asyncio (via call_soon_threadsafe a partir da thread de captura)."""
+        if mensagem["tipo"] == "atencao":
+            self.estado["atencao_ok"] = mensagem["atencao_ok"]
+        dados = codificar(mensagem)
+        for assinante in list(self.assinantes):
+            try:
+                assinante.fila.put_nowait(dados)
+            except asyncio.QueueFull:
+                # Cliente lento: sai ele, não o laço de captura
+                logger.warning("Cliente %s não acompanhou as mensagens; desconectando", assinante.nome)
+                self.descartados += 1
+                self.remover(assinante)
+        self.enviadas += 1
+
+
+class ServicoAtencao:
+    """Roda a captura numa thread e publica o estado de atenção pelos servidores configurados."""
+
+    def __init__(
+        self,
+        origem: str,
+        opcoes: OpcoesAnalise = OpcoesAnalise(),
+        endereco: str = "127.0.0.1",
+        porta: Optional[int] = PORTA_PADRAO,
+        caminho_unix: Optional[Path] = None,
+        porta_websocket: Optional[int] = None,
+        repetir: bool = False,
+    ):
+        self.origem = origem
+        self.opcoes = opcoes
+        self.endereco = endereco
+        self.porta = porta
+        self.caminho_unix = caminho_unix
+        self.porta_websocket = porta_websocket
+        self.repetir = repetir
+        self.publicador = Publicador()
+        self.quadros = 0
+        self._parar = threading.Event()
+        self._servidores = []
+        # Tarefas das conexões abertas, para encerrá-las sem cancelar no meio
+        self._conexoes: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _atender_socket(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        nome = str(escritor.get_extra_info("peername") or "unix")
+
+        async def escrever(dados: bytes):
+            escritor.write(dados)
+            await escritor.drain()
+
+        assinante = Assinante(nome, escrever, escritor.close)
+        self.publicador.adicionar(assinante)
+        self._conexoes.add(asyncio.current_task())
+        try:
+            # O cliente não envia nada; a leitura só serve para perceber que ele fechou a conexão
+            while await leitor.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.publicador.remover(assinante)
+            escritor.close()
+            self._conexoes.discard(asyncio.current_task())
+
+    async def _atender_websocket(self, conexao):
+        async def escrever(dados: bytes):
+            await conexao.send(dados.decode("utf-8").rstrip("\n"))
+
+        assinante = Assinante(str(conexao.remote_address), escrever, lambda: asyncio.ensure_future(conexao.close()))
+        self.publicador.adicionar(assinante)
+        self._conexoes.add(asyncio.current_task())
+        try:
+            async for _ in conexao:
+                pass
+        except Exception:
+            # Conexão encerrada com erro (websockets.ConnectionClosedError): só sai da lista
+            pass
+        finally:
+            self.publicador.remover(assinante)
+            self._conexoes.discard(asyncio.current_task())
+
+    async def _iniciar_servidores(self):
+        if self.porta is not None:
+            servidor = await asyncio.start_server(self._atender_socket, self.endereco, self.porta)
+            self.porta = servidor.sockets[0].getsockname()[1]
+            self._servidores.append(servidor)
+            logger.info("Publicando em tcp://%s:%d", self.endereco, self.porta)
+        if self.caminho_unix is not None:
+            self.caminho_unix.unlink(missing_ok=True)
+            self._servidores.append(await asyncio.start_unix_server(self._atender_socket, str(self.caminho_unix)))
+            logger.info("Publicando em unix://%s", self.caminho_unix)
+        if self.porta_websocket is not None:
+            try:
+                import websockets
+            except ImportError:
+                raise SystemExit("WebSocket requer o pacote websockets (pip install websockets).")
+            self._servidores.append(
+                await websockets.serve(self._atender_websocket, self.endereco, self.porta_websocket)
+            )
+            logger.info("Publicando em ws://%s:%d", self.endereco, self.porta_websocket)
+
+    def _publicar(self, mensagem: dict):
+        # Da thread de captura para o loop: publicar nunca bloqueia a captura
+        self._loop.call_soon_threadsafe(self.publicador.publicar, mensagem)
+
+    def _laco_captura(self):
+        cv2.setNumThreads(1)
+        fonte = abrir_fonte(self.origem, repetir=self.repetir)
+        captura = criar_captura(self.opcoes)
+        fonte.start()
+        atencao_anterior = None
+        quadros_periodo = atentos_periodo = 0
+        ultimo_resumo = time.monotonic()
+        try:
+            while not self._parar.is_set():
+                try:
+                    quadro = fonte.next_frame()
+                except FimDoVideo:
+                    self._publicar({"tipo": "fim", "quadro": self.quadros, "tempo": time.time()})
+                    return
+                if quadro is None:
+                    continue
+                try:
+                    captura.process(quadro, self.opcoes.limiar_esquerdo, self.opcoes.limiar_direito)
+                except (cv2.error, ErroCV2):
+                    pass
+                if not quadro_ainda_valido(fonte):
+                    # O publicador do barramento reescreveu o slot durante o process
+                    continue
+                resultado = captura.ultimo_resultado
+                self.quadros += 1
+                quadros_periodo += 1
+                atentos_periodo += resultado.atencao_ok
+                if resultado.atencao_ok != atencao_anterior:
+                    atencao_anterior = resultado.atencao_ok
+                    self._publicar(
+                        {
+                            "tipo": "atencao",
+                            "atencao_ok": resultado.atencao_ok,
+                            "quadro": self.quadros,
+                            "tempo": time.time(),
+                        }
+                    )
+                agora = time.monotonic()
+                if agora - ultimo_resumo >= INTERVALO_RESUMO:
+                    self._publicar(
+                        {
+                            "tipo": "resumo",
+                            "quadro": self.quadros,
+                            "tempo": time.time(),
+                            "fps": round(quadros_periodo / (agora - ultimo_resumo), 2),
+                            "razao_atencao": round(atentos_periodo / quadros_periodo, 3),
+                            "atencao_ok": resultado.atencao_ok,
+                            "rosto": resultado.rosto,
+                            "pupila_esquerda": resultado.pupila_esquerda,
+                            "pupila_direita": resultado.pupila_direita,
+                        }
+                    )
+                    ultimo_resumo = agora
+                    quadros_periodo = atentos_periodo = 0
+        finally:
+            fonte.stop()
+
+    async def executar(self):
+        """Serve até a captura terminar (fim do vídeo) ou stop()."""
+        self._loop = asyncio.get_running_loop()
+        await self._iniciar_servidores()
+        try:
+            await asyncio.to_thread(self._laco_captura)
+            # Dá tempo de a mensagem "fim" sair antes de fechar as conexões
+            await asyncio.sleep(0.2)
+        finally:
+            self._parar.set()
+            for servidor in self._servidores:
+                servidor.close()
+            for assinante in list(self.publicador.assinantes):
+                self.publicador.remover(assinante)
+            if self._conexoes:
+                # Sem o assinante, o socket é fechado e a conexão termina sozinha
+                await asyncio.wait(self._conexoes, timeout=TEMPO_LIMITE_ESCRITA_S)
+            if self.caminho_unix is not None:
+                self.caminho_unix.unlink(missing_ok=True)
+
+    def stop(self):
+        self._parar.set()
+
+
+async def executar_cliente(endereco: str, porta: int, caminho_unix: Optional[Path], quantidade: int) -> int:
+    """Cliente de teste: imprime as mensagens; termina depois de `quantidade` (0 = até o servidor fechar)."""
+    if caminho_unix is not None:
+        leitor, escritor = await asyncio.open_unix_connection(str(caminho_unix))
+    else:
+        leitor, escritor = await asyncio.open_connection(endereco, porta)
+    recebidas = 0
+    try:
+        while quantidade <= 0 or recebidas < quantidade:
+            linha = await leitor.readline()
+            if not linha:
+                break
+            mensagem = json.loads(linha)
+            recebidas += 1
+            print(json.dumps(mensagem, ensure_ascii=False), flush=True)
+    finally:
+        escritor.close()
+    return recebidas
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Serviço sem interface que publica o estado de atenção.")
+    parser.add_argument(
+        "origem", nargs="?", default="0", help="Índice de câmera (0, 1...), caminho de vídeo ou barramento:NOME"
+    )
+    parser.add_argument("--endereco", dest="endereco", default="127.0.0.1", help="Endereço do servidor TCP")
+    parser.add_argument("--porta", dest="porta", type=int, default=PORTA_PADRAO, help="Porta TCP (0 = desligado)")
+    parser.add_argument("--unix", dest="caminho_unix", type=Path, default=None, help="Caminho do socket Unix")
+    parser.add_argument(
+        "--websocket", dest="porta_websocket", type=int, default=None, help="Porta WebSocket (requer websockets)"
+    )
+    parser.add_argument("--repetir", action="store_true", dest="repetir", help="Vídeo em loop")
+    parser.add_argument("--limiar-esq", dest="limiar_esquerdo", type=int, default=70, help="Threshold do olho esquerdo")
+    parser.add_argument("--limiar-dir", dest="limiar_direito", type=int, default=70, help="Threshold do olho direito")
+    parser.add_argument(
+        "--motor-pupila",
+        dest="motor_pupila",
+        choices=[MOTOR_BLOB, MOTOR_COMPONENTES],
+        default=MOTOR_BLOB,
+        help="Detecção de pupila: blob (SimpleBlobDetector) ou componentes (componentes conexos)",
+    )
+    parser.add_argument(
+        "--limiar-automatico",
+        action="store_true",
+        dest="limiar_automatico",
+        help="Calibra o threshold de cada olho automaticamente",
+    )
+    parser.add_argument(
+        "--cliente",
+        action="store_true",
+        dest="cliente",
+        help="Cliente de teste: conecta em --endereco/--porta (ou --unix) e imprime as mensagens",
+    )
+    parser.add_argument(
+        "-n", "--quantidade", dest="quantidade", type=int, default=0, help="Cliente: sai depois de N mensagens"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = obter_argumentos()
+    if args.cliente:
+        try:
+            recebidas = asyncio.run(executar_cliente(args.endereco, args.porta, args.caminho_unix, args.quantidade))
+        except (ConnectionError, FileNotFoundError) as e:
+            sys.exit(f"Não foi possível conectar: {e}")
+        sys.exit(0 if recebidas else 1)
+    servico = ServicoAtencao(
+        args.origem,
+        OpcoesAnalise(
+            limiar_esquerdo=args.limiar_esquerdo,
+            limiar_direito=args.limiar_direito,
+            motor_pupila=args.motor_pupila,
+            limiar_automatico=args.limiar_automatico,
+        ),
+        endereco=args.endereco,
+        porta=args.porta or None,
+        caminho_unix=args.caminho_unix,
+        porta_websocket=args.porta_websocket,
+        repetir=args.repetir,
+    )
+    try:
+        asyncio.run(servico.executar())
+    except KeyboardInterrupt:
+        servico.stop()
@@ -27,6 +27,10 @@ class Configuracoes:
     DEBUG_DUMP_LOCATION: Path = None
     STATIC_FILE_PATH: Path = None
     STATIC_VIDEO_PATH: str = None
+    METRICAS: bool = False
+    METRICAS_PORTA: int = 0
+    CAMERA_CACHE: Path = None
+    CAMERA_FALSA: str = None
 
     def __post_init__(self):
         if self.BASE_DIR is None:
@@ -45,5 +49,11 @@ class Configuracoes:
             self.STATIC_FILE_PATH = Path(_obter_env("STATIC_FILE_PATH") or str(self.BASE_DIR / "capturers" / "dump" / "man.png"))
         if self.STATIC_VIDEO_PATH is None:
             self.STATIC_VIDEO_PATH = _obter_env("STATIC_VIDEO_PATH")
+        self.METRICAS = _obter_env("METRICAS", "false").lower() in ("1", "true", "yes")
+        self.METRICAS_PORTA = int(_obter_env("METRICAS_PORTA") or 0)
+        if self.CAMERA_CACHE is None:
+            self.CAMERA_CACHE = Path(_obter_env("CAMERA_CACHE") or str(Path.home() / ".cache" / "eye_tracker" / "camera.json"))
+        if self.CAMERA_FALSA is None:
+            self.CAMERA_FALSA = _obter_env("CAMERA_FALSA")
 # Instância global (compatível com código que usa settings.XXX)
 settings = Configuracoes()
@@ -0,0 +1,298 @@
+"""
+Supervisor de várias estações: cada câmera ou vídeo roda seu próprio pipeline de captura num processo separado.
+Os processos enviam mudanças de atenção e resumos periódicos por uma fila; o supervisor agrega o estado,
+reinicia processos que caírem e mostra o painel consolidado.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import cv2
+from batch import OpcoesAnalise, criar_captura
+from capturers.haar_blob import MOTOR_BLOB, MOTOR_COMPONENTES, ErroCV2
+from frame_sources.barramento import quadro_ainda_valido
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo (s) entre resumos enviados por uma estação, mesmo sem mudança de atenção
+INTERVALO_RESUMO = 1.0
+# Espera antes de reiniciar uma estação que caiu; dobra a cada queda seguida até o máximo
+ESPERA_REINICIO_INICIAL = 1.0
+ESPERA_REINICIO_MAXIMA = 30.0
+# Estação que ficou de pé ao menos este tempo (s) antes de cair volta à espera inicial
+TEMPO_ESTAVEL = 30.0
+# Origem que lê de um barramento de quadros em vez de abrir a câmera: "barramento:NOME"
+PREFIXO_BARRAMENTO = "barramento:"
+
+
+@dataclass
+class EstadoEstacao:
+    """Estado agregado de uma estação, mantido pelo supervisor."""
+
+    nome: str
+    origem: str
+    atencao_ok: Optional[bool] = None
+    quadros: int = 0
+    fps: float = 0.0
+    atualizado_em: float = 0.0
+    reinicios: int = 0
+    finalizada: bool = False
+    processo: Optional[multiprocessing.Process] = field(default=None, repr=False)
+    quedas_seguidas: int = 0
+    reiniciar_em: Optional[float] = None
+    iniciada_em: float = 0.0
+
+
+def abrir_fonte(origem: str, repetir: bool = False):
+    """
+    Número -> câmera com esse índice; "barramento:NOME" -> barramento em memória compartilhada (publicador.py);
+    qualquer outra coisa -> arquivo de vídeo (em loop, se `repetir`).
+    """
+    from frame_sources import BarramentoFrameSource, CameraFrameSource, VideoFrameSource
+
+    if origem.startswith(PREFIXO_BARRAMENTO):
+        # Vista do slot, sem cópia: a captura não escreve no quadro; quem a usa confere quadro_ainda_valido
+        return BarramentoFrameSource(origem[len(PREFIXO_BARRAMENTO) :])
+    if origem.isdigit():
+        return CameraFrameSource(cam_id=int(origem))
+    return VideoFrameSource(Path(origem), repetir=repetir)
+
+
+def executar_estacao(nome: str, origem: str, fila, opcoes: OpcoesAnalise):
+    """Laço de um processo de estação: lê, processa e publica o estado de atenção na fila."""
+    cv2.setNumThreads(1)
+    fonte = abrir_fonte(origem)
+    captura = criar_captura(opcoes)
+    fonte.start()
+    atencao_anterior = None
+    quadros = quadros_resumo = 0
+    ultimo_resumo = time.monotonic()
+    try:
+        while True:
+            try:
+                quadro = fonte.next_frame()
+            except SystemError:
+                if origem.isdigit() or origem.startswith(PREFIXO_BARRAMENTO):
+                    # Câmera ou publicador do barramento caiu: a estação é reiniciada
+                    raise
+                # Fim do vídeo: a estação termina normalmente
+                fila.put(("fim", nome, quadros))
+                return
+            if quadro is None:
+                # Barramento sem quadro novo ainda
+                continue
+            try:
+                atencao_ok = captura.process(quadro, opcoes.limiar_esquerdo, opcoes.limiar_direito)[3]
+            except (cv2.error, ErroCV2):
+                atencao_ok = captura.ultimo_resultado.atencao_ok
+            if not quadro_ainda_valido(fonte):
+                # O publicador reescreveu o slot durante o process: resultado de um quadro misturado
+                continue
+            quadros += 1
+            quadros_resumo += 1
+            agora = time.monotonic()
+            if atencao_ok != atencao_anterior or agora - ultimo_resumo >= INTERVALO_RESUMO:
+                fps = quadros_resumo / (agora - ultimo_resumo) if agora > ultimo_resumo else 0.0
+                fila.put(("estado", nome, atencao_ok, quadros, fps))
+                atencao_anterior = atencao_ok
+                ultimo_resumo = agora
+                quadros_resumo = 0
+    finally:
+        fonte.stop()
+
+
+class Supervisor:
+    """Inicia um processo por estação, agrega o estado de atenção e reinicia estações que caírem."""
+
+    def __init__(self, origens: list[str], opcoes: OpcoesAnalise = OpcoesAnalise()):
+        self.opcoes = opcoes
+        self._contexto = multiprocessing.get_context("spawn")
+        self.fila = self._contexto.Queue()
+        self.estacoes = {f"estacao-{i}": EstadoEstacao(f"estacao-{i}", origem) for i, origem in enumerate(origens)}
+
+    def _iniciar(self, estacao: EstadoEstacao):
+        estacao.processo = self._contexto.Process(
+            target=executar_estacao,
+            args=(estacao.nome, estacao.origem, self.fila, self.opcoes),
+            name=estacao.nome,
+            daemon=True,
+        )
+        estacao.processo.start()
+        estacao.reiniciar_em = None
+        estacao.iniciada_em = time.monotonic()
+
+    def start(self):
+        for estacao in self.estacoes.values():
+            self._iniciar(estacao)
+
+    def stop(self):
+        for estacao in self.estacoes.values():
+            if estacao.processo is not None and estacao.processo.is_alive():
+                estacao.processo.terminate()
+        for estacao in self.estacoes.values():
+            if estacao.processo is not None:
+                estacao.processo.join(timeout=2.0)
+
+    def _tratar_mensagem(self, mensagem):
+        tipo, nome = mensagem[0], mensagem[1]
+        estacao = self.estacoes[nome]
+        estacao.atualizado_em = time.monotonic()
+        if tipo == "estado":
+            _, _, estacao.atencao_ok, estacao.quadros, estacao.fps = mensagem
+        elif tipo == "fim":
+            estacao.quadros = mensagem[2]
+            estacao.finalizada = True
+
+    def _consumir_fila(self, timeout: Optional[float] = None):
+        try:
+            if timeout is not None:
+                self._tratar_mensagem(self.fila.get(timeout=timeout))
+            while True:
+                self._tratar_mensagem(self.fila.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _verificar_processos(self):
+        agora = time.monotonic()
+        for estacao in self.estacoes.values():
+            if estacao.finalizada or estacao.processo is None:
+                continue
+            if estacao.processo.is_alive():
+                continue
+            if estacao.reiniciar_em is None:
+                # O "fim" de uma estação que terminou pode ainda estar a caminho na fila
+                self._consumir_fila()
+                if estacao.finalizada or estacao.processo.exitcode == 0:
+                    estacao.finalizada = True
+                    continue
+                if agora - estacao.iniciada_em >= TEMPO_ESTAVEL:
+                    estacao.quedas_seguidas = 0
+                espera = min(ESPERA_REINICIO_INICIAL * 2**estacao.quedas_seguidas, ESPERA_REINICIO_MAXIMA)
+                logger.error(
+                    "%s (%s) caiu com código %s; reiniciando em %.0f s",
+                    estacao.nome,
+                    estacao.origem,
+                    estacao.processo.exitcode,
+                    espera,
+                )
+                estacao.atencao_ok = None
+                estacao.quedas_seguidas += 1
+                estacao.reiniciar_em = agora + espera
+            elif agora >= estacao.reiniciar_em:
+                estacao.reinicios += 1
+                self._iniciar(estacao)
+
+    def atualizar(self, timeout: float = 0.2):
+        """Consome as mensagens pendentes e verifica os processos; chamar periodicamente."""
+        self._consumir_fila(timeout)
+        self._verificar_processos()
+
+    def estado_geral(self) -> dict:
+        """Resumo consolidado: atenção por estação e quais estações estão em alerta."""
+        return {
+            "estacoes": {
+                nome: {
+                    "origem": e.origem,
+                    "atencao_ok": e.atencao_ok,
+                    "quadros": e.quadros,
+                    "fps": round(e.fps, 1),
+                    "reinicios": e.reinicios,
+                    "finalizada": e.finalizada,
+                }
+                for nome, e in self.estacoes.items()
+            },
+            "em_alerta": [nome for nome, e in self.estacoes.items() if e.atencao_ok is False],
+        }
+
+    def concluido(self) -> bool:
+        return all(e.finalizada for e in self.estacoes.values())
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Supervisor de várias estações: um processo de captura por câmera ou vídeo."
+    )
+    parser.add_argument(
+        "origens", nargs="+", help="Índices de câmera (0, 1...), caminhos de vídeo ou barramento:NOME (publicador.py)"
+    )
+    parser.add_argument("--limiar-esq", dest="limiar_esquerdo", type=int, default=70, help="Threshold do olho esquerdo")
+    parser.add_argument("--limiar-dir", dest="limiar_direito", type=int, default=70, help="Threshold do olho direito")
+    parser.add_argument(
+        "--rastrear-rosto",
+        action="store_true",
+        dest="rastrear_rosto",
+        help="Procura o rosto em volta da posição anterior",
+    )
+    parser.add_argument(
+        "--motor-pupila",
+        dest="motor_pupila",
+        choices=[MOTOR_BLOB, MOTOR_COMPONENTES],
+        default=MOTOR_BLOB,
+        help="Detecção de pupila: blob (SimpleBlobDetector) ou componentes (componentes conexos)",
+    )
+    parser.add_argument(
+        "--cache-quadros",
+        action="store_true",
+        dest="cache_quadros",
+        help="Reaproveita o resultado anterior quando o quadro quase não mudou (menos CPU em cenas paradas)",
+    )
+    parser.add_argument(
+        "--intervalo-painel",
+        dest="intervalo_painel",
+        type=float,
+        default=2.0,
+        help="Segundos entre atualizações do painel",
+    )
+    parser.add_argument(
+        "--limiar-automatico",
+        action="store_true",
+        dest="limiar_automatico",
+        help="Calibra o threshold de cada olho automaticamente (--limiar-esq/--limiar-dir viram o padrão)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = obter_argumentos()
+    supervisor = Supervisor(
+        args.origens,
+        OpcoesAnalise(
+            limiar_esquerdo=args.limiar_esquerdo,
+            limiar_direito=args.limiar_direito,
+            rastrear_rosto=args.rastrear_rosto,
+            motor_pupila=args.motor_pupila,
+            limiar_automatico=args.limiar_automatico,
+            cache_quadros=args.cache_quadros,
+        ),
+    )
+    supervisor.start()
+    ultimo_painel = time.monotonic()
+    try:
+        while not supervisor.concluido():
+            supervisor.atualizar()
+            if time.monotonic() - ultimo_painel >= args.intervalo_painel:
+                ultimo_painel = time.monotonic()
+                estado = supervisor.estado_geral()
+                for nome, e in estado["estacoes"].items():
+                    logger.info(
+                        "%s: atenção=%s quadros=%d fps=%.1f reinícios=%d",
+                        nome,
+                        e["atencao_ok"],
+                        e["quadros"],
+                        e["fps"],
+                        e["reinicios"],
+                    )
+                if estado["em_alerta"]:
+                    logger.warning("Sem atenção: %s", ", ".join(estado["em_alerta"]))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
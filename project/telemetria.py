@@ -0,0 +1,269 @@
+"""
+Telemetria de atenção por quadro, para relatórios de um turno inteiro.
+Cada quadro vira um registro TELEMETRIA_DTYPE (tempo, rosto, olhos, pupilas, thresholds, atenção, alerta) escrito
+em pedaços NumPy pré-alocados, sem objetos Python por quadro. Os registros são acrescentados periodicamente a um
+arquivo binário (cabeçalho MAGICA seguido dos registros crus), legível mesmo se o processo for interrompido.
+Razão de atenção e alertas na janela rolante são mantidos por somas incrementais (O(1) amortizado por quadro);
+consultas por intervalo de tempo usam busca binária na coluna de tempo, em memória ou no arquivo mapeado.
+"""
+
+import argparse
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy
+
+MAGICA = b"EYETEL01"
+TAMANHO_PEDACO = 4096
+JANELA_S = 60.0
+INTERVALO_GRAVACAO_S = 5.0
+SEM_VALOR = -1
+
+TELEMETRIA_DTYPE = numpy.dtype(
+    [
+        ("tempo", "<f8"),  # segundos desde a época (time.time)
+        ("rosto", "<i4", (4,)),  # x, y, w, h; SEM_VALOR sem rosto
+        ("pupila_esquerda", "<f4", (2,)),  # no recorte do olho; NaN sem pupila
+        ("pupila_direita", "<f4", (2,)),
+        ("limiar_esquerdo", "<i2"),
+        ("limiar_direito", "<i2"),
+        ("olho_esquerdo", "?"),
+        ("olho_direito", "?"),
+        ("atencao_quadro", "?"),
+        ("atencao_ok", "?"),
+        ("alerta", "?"),
+        ("inicio_alerta", "?"),  # primeiro quadro de cada alerta
+    ]
+)
+
+
+def ler_telemetria(arquivo: Path) -> numpy.ndarray:
+    """Registros gravados no arquivo, mapeados em memória (um registro incompleto no fim é ignorado)."""
+    arquivo = Path(arquivo)
+    with open(arquivo, "rb") as f:
+        if f.read(len(MAGICA)) != MAGICA:
+            raise ValueError(f"Arquivo de telemetria inválido: {arquivo}")
+    quantidade = (arquivo.stat().st_size - len(MAGICA)) // TELEMETRIA_DTYPE.itemsize
+    if quantidade == 0:
+        return numpy.zeros(0, TELEMETRIA_DTYPE)
+    return numpy.memmap(arquivo, TELEMETRIA_DTYPE, "r", offset=len(MAGICA), shape=(quantidade,))
+
+
+def fatiar(registros: numpy.ndarray, inicio: Optional[float] = None, fim: Optional[float] = None) -> numpy.ndarray:
+    """Registros com tempo em [inicio, fim), por busca binária (os tempos são crescentes)."""
+    tempos = registros["tempo"]
+    i = 0 if inicio is None else int(numpy.searchsorted(tempos, inicio, "left"))
+    j = len(registros) if fim is None else int(numpy.searchsorted(tempos, fim, "left"))
+    return registros[i:j]
+
+
+def resumir(registros: numpy.ndarray) -> dict:
+    """Quadros, razão de atenção, presença do rosto, alertas e tempo em alerta (aproximado pelos intervalos)."""
+    quadros = len(registros)
+    if not quadros:
+        return {"quadros": 0, "razao_atencao": None, "presenca_rosto": None, "alertas": 0, "tempo_alerta_s": 0.0}
+    intervalos = numpy.diff(registros["tempo"], append=registros["tempo"][-1])
+    return {
+        "quadros": quadros,
+        "razao_atencao": float(numpy.count_nonzero(registros["atencao_ok"]) / quadros),
+        "presenca_rosto": float(numpy.count_nonzero(registros["rosto"][:, 2] != SEM_VALOR) / quadros),
+        "alertas": int(numpy.count_nonzero(registros["inicio_alerta"])),
+        "tempo_alerta_s": float(intervalos[registros["alerta"]].sum()),
+    }
+
+
+class Telemetria:
+    """
+    Registro de telemetria em memória, com gravação periódica em `arquivo` (opcional).
+    Com arquivo, só os pedaços ainda não gravados ou dentro da janela rolante ficam em memória; sem arquivo,
+    tudo fica em memória.
+    """
+
+    def __init__(
+        self,
+        arquivo: Optional[Path] = None,
+        janela_s: float = JANELA_S,
+        tamanho_pedaco: int = TAMANHO_PEDACO,
+        intervalo_gravacao_s: float = INTERVALO_GRAVACAO_S,
+    ):
+        self.arquivo = Path(arquivo) if arquivo is not None else None
+        self.janela_s = janela_s
+        self.tamanho_pedaco = tamanho_pedaco
+        self.intervalo_gravacao_s = intervalo_gravacao_s
+        # Número de registros desde o início e quantos já estão no arquivo
+        self.quadros = 0
+        self.gravados = 0
+        self.alertas = 0
+        # Pedaços em memória; o primeiro começa no registro self._base
+        self._pedacos: deque[numpy.ndarray] = deque()
+        self._base = 0
+        self._ultimo_alerta = False
+        # Janela rolante: [self._inicio_janela, self.quadros) e as somas dela
+        self._inicio_janela = 0
+        self._atencao_janela = 0
+        self._alertas_janela = 0
+        self._arquivo = None
+        self._ultima_gravacao = time.monotonic()
+
+    def start(self):
+        if self.arquivo is None:
+            return
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        novo = not self.arquivo.exists() or self.arquivo.stat().st_size == 0
+        if not novo:
+            ler_telemetria(self.arquivo)  # valida o cabeçalho antes de acrescentar
+        self._arquivo = open(self.arquivo, "ab")
+        if novo:
+            self._arquivo.write(MAGICA)
+
+    def _registro(self, indice: int) -> numpy.void:
+        deslocamento = indice - self._base
+        return self._pedacos[deslocamento // self.tamanho_pedaco][deslocamento % self.tamanho_pedaco]
+
+    def registrar(self, resultado, alerta: bool = False, tempo: Optional[float] = None):
+        """Acrescenta o ResultadoQuadro de um quadro e se o alerta estava ativo nele."""
+        tempo = time.time() if tempo is None else tempo
+        posicao = (self.quadros - self._base) % self.tamanho_pedaco
+        if posicao == 0:
+            self._pedacos.append(numpy.zeros(self.tamanho_pedaco, TELEMETRIA_DTYPE))
+        inicio_alerta = alerta and not self._ultimo_alerta
+        # Uma atribuição só, na ordem de TELEMETRIA_DTYPE (campo a campo custa várias vezes mais)
+        self._pedacos[-1][posicao] = (
+            tempo,
+            resultado.rosto if resultado.rosto is not None else (SEM_VALOR,) * 4,
+            resultado.pupila_esquerda if resultado.pupila_esquerda is not None else (numpy.nan, numpy.nan),
+            resultado.pupila_direita if resultado.pupila_direita is not None else (numpy.nan, numpy.nan),
+            SEM_VALOR if resultado.limiar_esquerdo is None else resultado.limiar_esquerdo,
+            SEM_VALOR if resultado.limiar_direito is None else resultado.limiar_direito,
+            resultado.olho_esquerdo,
+            resultado.olho_direito,
+            resultado.atencao_quadro,
+            resultado.atencao_ok,
+            alerta,
+            inicio_alerta,
+        )
+        self._ultimo_alerta = alerta
+        self.quadros += 1
+        self.alertas += inicio_alerta
+        self._atencao_janela += resultado.atencao_ok
+        self._alertas_janela += inicio_alerta
+        self._avancar_janela(tempo)
+        if self._arquivo is not None and time.monotonic() - self._ultima_gravacao >= self.intervalo_gravacao_s:
+            self.gravar()
+
+    def _avancar_janela(self, agora: float):
+        """Tira da janela os registros mais antigos que janela_s; cada registro sai uma única vez."""
+        limite = agora - self.janela_s
+        while self._inicio_janela < self.quadros:
+            registro = self._registro(self._inicio_janela)
+            if registro["tempo"] >= limite:
+                break
+            self._atencao_janela -= bool(registro["atencao_ok"])
+            self._alertas_janela -= bool(registro["inicio_alerta"])
+            self._inicio_janela += 1
+
+    def _descartar_pedacos(self):
+        # Pedaços inteiros já gravados e fora da janela não são mais necessários em memória
+        while len(self._pedacos) > 1 and self._base + self.tamanho_pedaco <= min(self.gravados, self._inicio_janela):
+            self._pedacos.popleft()
+            self._base += self.tamanho_pedaco
+
+    def em_memoria(self, inicio: int = 0) -> numpy.ndarray:
+        """Registros em memória a partir do registro `inicio` (cópia contígua)."""
+        inicio = max(inicio, self._base)
+        if inicio >= self.quadros:
+            return numpy.zeros(0, TELEMETRIA_DTYPE)
+        deslocamento = inicio - self._base
+        primeiro = deslocamento // self.tamanho_pedaco
+        partes = [self._pedacos[i] for i in range(primeiro, len(self._pedacos))]
+        partes[0] = partes[0][deslocamento % self.tamanho_pedaco :]
+        registros = numpy.concatenate(partes) if len(partes) > 1 else partes[0]
+        return registros[: self.quadros - inicio].copy()
+
+    def gravar(self):
+        """Acrescenta ao arquivo os registros ainda não gravados."""
+        self._ultima_gravacao = time.monotonic()
+        if self._arquivo is None or self.gravados == self.quadros:
+            return
+        self._arquivo.write(self.em_memoria(self.gravados).tobytes())
+        self._arquivo.flush()
+        self.gravados = self.quadros
+        self._descartar_pedacos()
+
+    def razao_atencao(self) -> Optional[float]:
+        """Fração dos quadros da janela rolante com atenção OK (None sem quadros)."""
+        quadros = self.quadros - self._inicio_janela
+        return self._atencao_janela / quadros if quadros else None
+
+    def alertas_janela(self) -> int:
+        """Alertas iniciados dentro da janela rolante."""
+        return self._alertas_janela
+
+    def consultar(self, inicio: Optional[float] = None, fim: Optional[float] = None) -> numpy.ndarray:
+        """
+        Registros com tempo em [inicio, fim); com arquivo, grava o pendente e consulta o arquivo mapeado, também
+        depois do stop (os pedaços já gravados saíram da memória). Sem arquivo, ou antes do start, usa a memória.
+        """
+        if self._arquivo is not None:
+            self.gravar()
+        if self.arquivo is not None and self.gravados == self.quadros and self.arquivo.exists():
+            return fatiar(ler_telemetria(self.arquivo), inicio, fim)
+        return fatiar(self.em_memoria(), inicio, fim)
+
+    def resumo(self, inicio: Optional[float] = None, fim: Optional[float] = None) -> dict:
+        return resumir(self.consultar(inicio, fim))
+
+    def stop(self):
+        if self._arquivo is not None:
+            self.gravar()
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def _instante(texto: str) -> float:
+    return datetime.fromisoformat(texto).timestamp()
+
+
+def obter_argumentos():
+    """Interpreta argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Relatório de atenção a partir de um arquivo de telemetria.")
+    parser.add_argument("arquivo", type=Path, help="Arquivo gravado com --telemetria")
+    parser.add_argument(
+        "--inicio", dest="inicio", type=_instante, default=None, help="Início (ISO, ex. 2024-05-01T08:00)"
+    )
+    parser.add_argument("--fim", dest="fim", type=_instante, default=None, help="Fim (ISO)")
+    parser.add_argument(
+        "--intervalo-min",
+        dest="intervalo_min",
+        type=float,
+        default=60.0,
+        help="Agrupa o relatório em intervalos de N minutos",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = obter_argumentos()
+    registros = fatiar(ler_telemetria(args.arquivo), args.inicio, args.fim)
+    if not len(registros):
+        raise SystemExit("Nenhum registro no intervalo pedido.")
+    passo = args.intervalo_min * 60.0
+    print(f"{'início':<20} {'quadros':>8} {'atenção':>8} {'rosto':>8} {'alertas':>8} {'em alerta s':>12}")
+    inicio = registros["tempo"][0]
+    while inicio <= registros["tempo"][-1]:
+        r = resumir(fatiar(registros, inicio, inicio + passo))
+        if r["quadros"]:
+            rotulo = datetime.fromtimestamp(inicio).strftime("%Y-%m-%d %H:%M:%S")
+            print(
+                f"{rotulo:<20} {r['quadros']:>8} {r['razao_atencao']:>8.1%} {r['presenca_rosto']:>8.1%}"
+                f" {r['alertas']:>8} {r['tempo_alerta_s']:>12.1f}"
+            )
+        inicio += passo
+    total = resumir(registros)
+    print(
+        f"{'total':<20} {total['quadros']:>8} {total['razao_atencao']:>8.1%} {total['presenca_rosto']:>8.1%}"
+        f" {total['alertas']:>8} {total['tempo_alerta_s']:>12.1f}"
+    )
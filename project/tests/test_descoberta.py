@@ -0,0 +1,90 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from frame_sources import descoberta
+
+
+class CapturaFalsa:
+    def __init__(self):
+        self.liberada = False
+
+    def release(self):
+        self.liberada = True
+
+    def get(self, _):
+        return 0
+
+
+class TestSondar(unittest.TestCase):
+    def test_primeiro_candidato_travado_nao_impede_o_seguinte(self):
+        liberar = threading.Event()
+        captura = CapturaFalsa()
+
+        def abrir(dispositivo, modo=None):
+            if dispositivo == 0:
+                liberar.wait(3.0)
+                return None
+            return captura
+
+        with mock.patch.object(descoberta, "_abrir", abrir):
+            inicio = time.monotonic()
+            encontrado = descoberta.sondar([0, 1], tempo_limite=0.5)
+            decorrido = time.monotonic() - inicio
+        liberar.set()
+        self.assertIsNotNone(encontrado)
+        self.assertEqual(encontrado[0].dispositivo, 1)
+        self.assertIs(encontrado[1], captura)
+        self.assertFalse(captura.liberada)
+        self.assertLess(decorrido, 2.0)
+
+    def test_preferido_vence_dentro_do_prazo(self):
+        capturas = {0: CapturaFalsa(), 1: CapturaFalsa()}
+
+        def abrir(dispositivo, modo=None):
+            if dispositivo == 0:
+                time.sleep(0.2)
+            return capturas[dispositivo]
+
+        with mock.patch.object(descoberta, "_abrir", abrir):
+            encontrado = descoberta.sondar([0, 1], tempo_limite=2.0)
+        self.assertEqual(encontrado[0].dispositivo, 0)
+        self.assertTrue(capturas[1].liberada)
+
+
+class TestDescobrir(unittest.TestCase):
+    def test_camera_em_cache_travada_cai_para_a_sondagem(self):
+        liberar = threading.Event()
+        captura = CapturaFalsa()
+        modos = {}
+
+        def abrir(dispositivo, modo=None):
+            modos[dispositivo] = modo
+            if dispositivo == 2:
+                liberar.wait(3.0)
+                return None
+            return captura
+
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = Path(pasta) / "camera.json"
+            em_cache = descoberta.DispositivoCamera(2, 640, 480, 30.0)
+            descoberta.gravar_cache(caminho, em_cache)
+            with (
+                mock.patch.object(descoberta, "_abrir", abrir),
+                mock.patch.object(descoberta, "listar_candidatos", lambda: [0, 2]),
+            ):
+                inicio = time.monotonic()
+                encontrado = descoberta.descobrir(caminho, tempo_limite=0.5)
+                decorrido = time.monotonic() - inicio
+            liberar.set()
+            self.assertEqual(descoberta.ler_cache(caminho).dispositivo, 0)
+        self.assertEqual(encontrado[0].dispositivo, 0)
+        self.assertEqual(modos[2], em_cache)
+        self.assertLess(decorrido, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()